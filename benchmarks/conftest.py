@@ -0,0 +1,116 @@
+r"""
+Synthetic data for the benchmarks. Everything is generated locally, so the suite runs offline.
+
+Scales are set with the ZHUTILS_BENCHMARK_SCALES environment variable
+(comma separated 'small', 'medium', 'large', default 'small').
+Results are stored and compared with the pytest-benchmark options:
+
+    python -m pytest benchmarks --benchmark-autosave
+    python -m pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:20%
+"""
+from os import environ
+
+import pytest
+from numpy import arange, nan
+from numpy.random import default_rng
+from pandas import DataFrame, ExcelWriter, date_range
+
+from zhutils.common import Months
+from zhutils.dataframes import DailyDataFrame
+
+
+SCALES = {
+    'small': {'years': 30, 'rows': 200, 'columns': 10, 'trees': 4, 'tree_years': 10, 'colors': 100},
+    'medium': {'years': 100, 'rows': 500, 'columns': 40, 'trees': 20, 'tree_years': 20, 'colors': 1_000},
+    'large': {'years': 300, 'rows': 1_000, 'columns': 150, 'trees': 60, 'tree_years': 40, 'colors': 10_000}
+}
+
+
+def get_scales():
+    return environ.get('ZHUTILS_BENCHMARK_SCALES', 'small').split(',')
+
+
+def make_daily_frame(years: int, seed: int = 0) -> DailyDataFrame:
+    rng = default_rng(seed)
+    dates = date_range(f'{2020 - years}-01-01', '2019-12-31')
+    return DailyDataFrame(DataFrame({
+        'Year': dates.year.astype(int),
+        'Month': dates.month.astype(int),
+        'Day': dates.day.astype(int),
+        'Temperature': rng.normal(size=len(dates)) * 10,
+        'Precipitation': rng.gamma(0.5, 4, size=len(dates))
+    }))
+
+
+def make_chronology(years: int, seed: int = 1) -> DataFrame:
+    return DataFrame({
+        'Year': arange(2020 - years, 2020),
+        'Std': default_rng(seed).normal(1, 0.2, size=years)
+    })
+
+
+def make_monthly_wide(years: int, seed: int = 2) -> DataFrame:
+    rng = default_rng(seed)
+    result = DataFrame({'Year': arange(2020 - years, 2020)})
+    for month in Months:
+        result[month.name] = rng.gamma(2, 5, size=years)
+    return result
+
+
+def make_columns(rows: int, columns: int, seed: int = 3) -> DataFrame:
+    rng = default_rng(seed)
+    values = rng.normal(size=(rows, columns))
+    values[rng.random(values.shape) < 0.05] = nan
+    return DataFrame(values, columns=[f'C{i}' for i in range(columns)])
+
+
+def write_tracheids_workbook(file_path: str, trees: int, years: int, seed: int = 4) -> list:
+    rng = default_rng(seed)
+    names = [f'T{i}' for i in range(trees)]
+    with ExcelWriter(file_path) as writer:
+        for name in names:
+            rows = [
+                (year, trw, cell, *rng.random(3) * (30, 30, 5))
+                for year in range(2020 - years, 2020)
+                for trw in [rng.random() * 1000]
+                for cell in range(1, rng.integers(10, 40) + 1)
+            ]
+            DataFrame(rows, columns=['Год', 'ШГК', '№', 'Dr', 'Dt', 'CWT']).to_excel(writer, sheet_name=name, index=False)
+    return names
+
+
+@pytest.fixture(scope='session', params=get_scales())
+def scale(request):
+    return request.param, SCALES[request.param]
+
+
+@pytest.fixture(scope='session')
+def daily(scale):
+    return make_daily_frame(scale[1]['years'])
+
+
+@pytest.fixture(scope='session')
+def chronology(scale):
+    return make_chronology(scale[1]['years'])
+
+
+@pytest.fixture(scope='session')
+def monthly_wide_files(scale, tmp_path_factory):
+    directory = tmp_path_factory.mktemp(f'monthly-{scale[0]}')
+    paths = []
+    for i, clim_index in enumerate(['Temperature', 'Precipitation']):
+        paths.append(str(directory / f'{clim_index}.csv'))
+        make_monthly_wide(scale[1]['years'], seed=i).to_csv(paths[-1], index=False)
+    return paths
+
+
+@pytest.fixture(scope='session')
+def columns_frame(scale):
+    return make_columns(scale[1]['rows'], scale[1]['columns'])
+
+
+@pytest.fixture(scope='session')
+def tracheids_workbook(scale, tmp_path_factory):
+    file_path = str(tmp_path_factory.mktemp(f'tracheids-{scale[0]}') / 'tracheids.xlsx')
+    trees = write_tracheids_workbook(file_path, scale[1]['trees'], scale[1]['tree_years'])
+    return file_path, trees
@@ -0,0 +1,60 @@
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from math import ceil
+from numpy.random import default_rng
+from zhutils.plots.colors import (
+    combine_hex_colors,
+    get_colormap,
+    interpolate_colors,
+    interpotate_between_colors
+)
+
+
+COLORS = [['#FF0000', '#0000FF'], ['#FF0000', '#00FF00', '#0000FF', '#FFFFFF']]
+
+
+def reference_interpotate_between_colors(colors, points):
+    # interpotate_between_colors before the vectorized interpolation
+    points_for_color = ceil(points / (len(colors) - 1))
+    result = []
+    color_number = 0
+    color_weight = 0
+    for _ in range(points):
+        color_weight += 1
+        color_proportion = color_weight * (1.0 / points_for_color)
+        result.append(combine_hex_colors({
+            colors[color_number]: 1.0 - color_proportion,
+            colors[color_number + 1]: color_proportion
+        }))
+        if color_proportion >= 1:
+            color_weight = 0
+            color_number += 1
+    return result
+
+
+@pytest.mark.parametrize('colors', COLORS, ids=['2', '4'])
+def test_reference_interpotate_between_colors(benchmark, scale, colors):
+    benchmark.group = f'interpotate_between_colors {scale[0]}'
+    benchmark(reference_interpotate_between_colors, colors, scale[1]['colors'])
+
+
+@pytest.mark.parametrize('colors', COLORS, ids=['2', '4'])
+def test_interpotate_between_colors(benchmark, scale, colors):
+    benchmark.group = f'interpotate_between_colors {scale[0]}'
+    result = benchmark(interpotate_between_colors, colors, scale[1]['colors'])
+    assert result == reference_interpotate_between_colors(colors, scale[1]['colors'])
+
+
+@pytest.mark.parametrize('colors', COLORS, ids=['2', '4'])
+def test_interpolate_colors_rgb(benchmark, scale, colors):
+    benchmark.group = f'interpotate_between_colors {scale[0]}'
+    benchmark(interpolate_colors, colors, scale[1]['colors'], False)
+
+
+def test_colormap(benchmark, scale):
+    benchmark.group = f'colormap {scale[0]}'
+    values = default_rng(0).uniform(-1, 1, size=(scale[1]['columns'], scale[1]['columns']))
+    colormap = get_colormap(('#FF0000', '#FFFFFF', '#0000FF'))
+    benchmark(colormap, values)
@@ -0,0 +1,38 @@
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from zhutils.comparison import CorrComparison
+from zhutils.correlation import dropna_pearsonr
+
+
+def per_day_comparison(df, index):
+    # Generic ComparisonFunction without compare_arrays
+    return dropna_pearsonr(df[index], df['Std'])
+
+
+@pytest.mark.parametrize('using', [CorrComparison('Std'), per_day_comparison], ids=['arrays', 'generic'])
+def test_compare_with(benchmark, scale, daily, chronology, using):
+    benchmark.group = f'daily compare_with {scale[0]}'
+    benchmark.pedantic(daily.compare_with, (chronology, using, 'Temperature', 7), rounds=3)
+
+
+def test_get_full_comparison(benchmark, scale, daily, chronology):
+    benchmark.group = f'daily get_full_comparison {scale[0]}'
+    benchmark(daily.get_full_comparison, chronology, CorrComparison('Std'), 7)
+
+
+@pytest.mark.parametrize('nanmean', [False, True])
+def test_moving_avg(benchmark, scale, daily, nanmean):
+    benchmark.group = f'daily moving_avg {scale[0]}'
+    benchmark(daily.moving_avg, 7, None, nanmean)
+
+
+def test_to_monthly(benchmark, scale, daily):
+    benchmark.group = f'daily to_monthly {scale[0]}'
+    benchmark(daily.to_monthly)
+
+
+def test_cut(benchmark, scale, daily):
+    benchmark.group = f'daily cut {scale[0]}'
+    benchmark(daily.cut, 4, 9, 15, 10)
@@ -0,0 +1,24 @@
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from zhutils.comparison import CorrComparison
+from zhutils.correlation import dropna_pearsonr
+from zhutils.dataframes import MonthlyDataFrame
+
+
+def per_month_comparison(df, index):
+    # Generic ComparisonFunction without compare_arrays
+    return dropna_pearsonr(df[index], df['Std'])
+
+
+def test_from_wide(benchmark, scale, monthly_wide_files):
+    benchmark.group = f'monthly from_wide {scale[0]}'
+    benchmark(MonthlyDataFrame.from_wide, monthly_wide_files, ['Temperature', 'Precipitation'])
+
+
+@pytest.mark.parametrize('using', [CorrComparison('Std'), per_month_comparison], ids=['arrays', 'generic'])
+def test_compare_with(benchmark, scale, monthly_wide_files, chronology, using):
+    benchmark.group = f'monthly compare_with {scale[0]}'
+    monthly = MonthlyDataFrame.from_wide(monthly_wide_files, ['Temperature', 'Precipitation'])
+    benchmark(monthly.compare_with, chronology, using, 'Temperature', True)
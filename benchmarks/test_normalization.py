@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from numpy import allclose
+from numpy.random import default_rng
+from zhutils.normalization import get_normalized_array, get_normalized_list
+
+
+def reference_get_normalized_list(x, norm):
+    # get_normalized_list before the O(n + norm) kernel
+    l_raw = []
+    n = len(x)
+    for el in x:
+        l_raw.extend([el] * norm)
+    l_norm = []
+    for i in range(norm):
+        l_norm.append(1 / n * sum([l_raw[j] for j in range(n * i, n * (i + 1))]))
+    return l_norm
+
+
+@pytest.mark.parametrize('cells', [30, 150])
+@pytest.mark.parametrize('norm', [15, 100])
+def test_reference_get_normalized_list(benchmark, cells, norm):
+    benchmark.group = f'normalization cells={cells} norm={norm}'
+    x = default_rng(0).normal(size=cells).tolist()
+    benchmark(reference_get_normalized_list, x, norm)
+
+
+@pytest.mark.parametrize('cells', [30, 150])
+@pytest.mark.parametrize('norm', [15, 100])
+def test_get_normalized_list(benchmark, cells, norm):
+    benchmark.group = f'normalization cells={cells} norm={norm}'
+    x = default_rng(0).normal(size=cells).tolist()
+    result = benchmark(get_normalized_list, x, norm)
+    assert allclose(result, reference_get_normalized_list(x, norm), rtol=1e-12)
+
+
+@pytest.mark.parametrize('cells', [30, 150])
+@pytest.mark.parametrize('norm', [15, 100])
+def test_get_normalized_array_columns(benchmark, cells, norm):
+    benchmark.group = f'normalization cells={cells} norm={norm}'
+    x = default_rng(0).normal(size=(cells, 8))
+    benchmark(get_normalized_array, x, norm)
@@ -0,0 +1,58 @@
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from numpy import allclose, nan, nanmean
+from numpy.random import default_rng
+from pandas import DataFrame
+from zhutils.rolling import rolling
+
+
+def make_daily_values(rows=40_000, columns=4):
+    rng = default_rng(0)
+    values = rng.normal(size=(rows, columns)) * 10
+    values[rng.random(values.shape) < 0.03] = nan
+    return DataFrame(values)
+
+
+def reference_nanmean(df, window):
+    # DailyDataFrame.moving_avg(nanmean=True) before the rolling kernels
+    return df.rolling(window=window, center=True).apply(nanmean)
+
+
+@pytest.mark.parametrize('window', [7, 31])
+def test_reference_nanmean(benchmark, window):
+    benchmark.group = f'rolling nanmean window={window}'
+    df = make_daily_values(rows=4_000)
+    benchmark.pedantic(reference_nanmean, (df, window), rounds=1)
+
+
+@pytest.mark.parametrize('window', [7, 31])
+def test_pandas_rolling_mean(benchmark, window):
+    benchmark.group = f'rolling nanmean window={window}'
+    df = make_daily_values(rows=4_000)
+    benchmark(lambda: df.rolling(window=window, center=True).mean())
+
+
+@pytest.mark.parametrize('window', [7, 31])
+def test_rolling_mean(benchmark, window):
+    benchmark.group = f'rolling nanmean window={window}'
+    df = make_daily_values(rows=4_000)
+    result = benchmark(rolling, df.to_numpy(), window, 'mean', window)
+    assert allclose(result, reference_nanmean(df, window).to_numpy(), rtol=1e-12, equal_nan=True)
+
+
+@pytest.mark.parametrize('how', ['sum', 'min', 'max'])
+def test_rolling(benchmark, how):
+    benchmark.group = f'rolling {how}'
+    df = make_daily_values()
+    result = benchmark(rolling, df.to_numpy(), 7, how)
+    expected = getattr(df.rolling(window=7, center=True, min_periods=1), how)()
+    assert allclose(result, expected.to_numpy(), rtol=1e-12, atol=1e-12, equal_nan=True)
+
+
+@pytest.mark.parametrize('how', ['sum', 'min', 'max'])
+def test_pandas_rolling(benchmark, how):
+    benchmark.group = f'rolling {how}'
+    df = make_daily_values()
+    benchmark(lambda: getattr(df.rolling(window=7, center=True, min_periods=1), how)())
@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from zhutils.correlation import dropna_spearmanr
+from zhutils.dataframes import SuperbDataFrame
+
+
+def test_corr_and_p_values(benchmark, scale, columns_frame):
+    benchmark.group = f'corr_and_p_values {scale[0]}'
+    df = SuperbDataFrame(columns_frame)
+    benchmark(df.corr_and_p_values)
+
+
+def test_corr_and_p_values_highlight(benchmark, scale, columns_frame):
+    benchmark.group = f'corr_and_p_values {scale[0]}'
+    df = SuperbDataFrame(columns_frame)
+    benchmark(lambda: df.corr_and_p_values(highlight_from=0.05).to_html())
+
+
+def test_bootstrap_corr_batched(benchmark, scale, columns_frame):
+    benchmark.group = f'bootstrap_corr {scale[0]}'
+    df = SuperbDataFrame(columns_frame.iloc[:, :5])
+    parameters = {'n_resamples': 199, 'method': 'BCa'}
+    benchmark.pedantic(df.bootstrap_corr, (parameters, dropna_spearmanr), {'batched': True, 'seed': 0}, rounds=3)
+
+
+def test_bootstrap_corr(benchmark, scale, columns_frame):
+    benchmark.group = f'bootstrap_corr {scale[0]}'
+    df = SuperbDataFrame(columns_frame.iloc[:, :3])
+    parameters = {'n_resamples': 199, 'method': 'percentile'}
+    benchmark.pedantic(df.bootstrap_corr, (parameters, dropna_spearmanr), {'seed': 0}, rounds=1)
+
+
+def test_pairwise_len(benchmark, scale, columns_frame):
+    benchmark.group = f'pairwise_len {scale[0]}'
+    df = SuperbDataFrame(columns_frame)
+    benchmark(df.pairwise_len)
+
+
+def test_median_index(benchmark, scale, columns_frame):
+    benchmark.group = f'median_index {scale[0]}'
+    df = SuperbDataFrame(columns_frame)
+    benchmark(df.median_index)
@@ -0,0 +1,26 @@
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from zhutils.tracheids import Tracheids
+
+
+def test_load_xlsx(benchmark, scale, tracheids_workbook):
+    benchmark.group = f'tracheids loading {scale[0]}'
+    file_path, trees = tracheids_workbook
+    benchmark.pedantic(Tracheids, ('bench', file_path, trees), rounds=1)
+
+
+def test_load_cached_xlsx(benchmark, scale, tracheids_workbook, tmp_path):
+    benchmark.group = f'tracheids loading {scale[0]}'
+    file_path, trees = tracheids_workbook
+    Tracheids('bench', file_path, trees, cache_dir=str(tmp_path))
+    benchmark(Tracheids, 'bench', file_path, trees, str(tmp_path))
+
+
+@pytest.mark.parametrize('to', ['mean', 30])
+def test_normalize(benchmark, scale, tracheids_workbook, tmp_path, to):
+    benchmark.group = f'tracheids normalize {scale[0]}'
+    file_path, trees = tracheids_workbook
+    tracheids = Tracheids('bench', file_path, trees, cache_dir=str(tmp_path))
+    benchmark(tracheids.normalize, to)
@@ -12,7 +12,7 @@ setuptools.setup(
     install_requires=[
         'numpy',
         'scipy',
-        'pandas',
+        'pandas<3',
         'pandera',
         'matplotlib'
     ]
@@ -1,5 +1,21 @@
-import zhutils.correlation
-import zhutils.dataframes
-import zhutils.normalization
-import zhutils.tracheids
-import zhutils.plots
\ No newline at end of file
+from importlib import import_module
+
+# Submodules are imported on the first access (zhutils.correlation, ...), so importing zhutils is cheap
+SUBMODULES = (
+    'comparison',
+    'correlation',
+    'dataframes',
+    'normalization',
+    'tracheids',
+    'plots'
+)
+
+
+def __getattr__(name):
+    if name in SUBMODULES:
+        return import_module(f'{__name__}.{name}')
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(set(globals()) | set(SUBMODULES))
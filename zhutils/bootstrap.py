@@ -0,0 +1,374 @@
+from concurrent.futures import Executor
+from functools import partial
+from math import ceil
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple
+)
+
+from numpy import (
+    arange,
+    asarray,
+    bincount,
+    clip,
+    concatenate,
+    cumsum,
+    empty,
+    errstate,
+    eye,
+    flatnonzero,
+    integer,
+    isnan,
+    ndarray,
+    ones,
+    packbits,
+    percentile,
+    r_,
+    sqrt,
+    zeros
+)
+from numpy.random import SeedSequence, default_rng
+
+from zhutils.common import CorrFunction
+from zhutils.correlation import dropna
+from zhutils.lazy import lazy_import
+from zhutils.parallel import (
+    CHUNKS_PER_WORKER,
+    get_n_workers,
+    map_shared,
+    split_into_chunks
+)
+
+special = lazy_import('scipy.special')
+stats = lazy_import('scipy.stats')
+
+
+BOOTSTRAP_CACHE_BYTES = 2 ** 28
+# scipy.stats.bootstrap parameters supported by bootstrap_corr_pairs
+BATCHED_BOOTSTRAP_PARAMETERS = ('n_resamples', 'confidence_level', 'method', 'random_state')
+
+
+def batched_bootstrap_options(bootstrap_parameters: Dict, seed: Optional[int] = None) -> Dict:
+    r"""
+    Keyword arguments of bootstrap_corr_pairs for the scipy.stats.bootstrap parameters.
+    An integer random_state is used as the seed
+
+    Raises:
+        ValueError for the parameters that the batched bootstrap does not support
+    """
+    unsupported = [key for key in bootstrap_parameters if key not in BATCHED_BOOTSTRAP_PARAMETERS]
+    if unsupported:
+        raise ValueError(
+            f"Batched bootstrap does not support the parameters {', '.join(unsupported)}. "
+            f"Expected {', '.join(BATCHED_BOOTSTRAP_PARAMETERS)}"
+        )
+
+    random_state = bootstrap_parameters.get('random_state')
+    if random_state is not None:
+        if not isinstance(random_state, (int, integer)):
+            raise ValueError('Batched bootstrap supports only integer random_state (use seed)')
+        if seed is not None and seed != random_state:
+            raise ValueError(f'Different seed {seed} and random_state {random_state}')
+        seed = int(random_state)
+
+    return {
+        'n_resamples': bootstrap_parameters.get('n_resamples', 9999),
+        'confidence_level': bootstrap_parameters.get('confidence_level', 0.95),
+        'ci_method': bootstrap_parameters.get('method', 'BCa'),
+        'seed': seed
+    }
+
+
+def overlap_groups(mask: ndarray, pairs: ndarray) -> List[Tuple[ndarray, ndarray]]:
+    r"""
+    Groups column pairs by the rows where both columns are observed
+
+    Params:
+        mask: 2D boolean array, True for the observed values
+        pairs: Integer array of shape (k, 2) with column numbers
+    Returns:
+        List of (rows, pair numbers) in the order of the first appearance in pairs
+    """
+    common = mask[:, pairs[:, 0]] & mask[:, pairs[:, 1]]
+    groups: Dict[bytes, List[int]] = {}
+    for pair_number, key in enumerate(packbits(common, axis=0).T):
+        groups.setdefault(key.tobytes(), []).append(pair_number)
+
+    return [
+        (flatnonzero(common[:, pair_numbers[0]]), asarray(pair_numbers))
+        for pair_numbers in groups.values()
+    ]
+
+
+def resample_counts(n: int, n_resamples: int, seed: SeedSequence) -> ndarray:
+    r"""
+    Draws bootstrap resamples of n observations.
+    Uses the same index matrix as scipy.stats.bootstrap with rng=default_rng(seed)
+
+    Returns:
+        Array of shape (n_resamples, n) with the number of times every observation was drawn
+    """
+    index = default_rng(seed).integers(0, n, (n_resamples, n))
+    index += arange(n_resamples)[:, None] * n
+    return bincount(index.ravel(), minlength=n_resamples * n).reshape(n_resamples, n).astype(float)
+
+
+def weighted_ranks(x: ndarray, counts: ndarray) -> ndarray:
+    r"""
+    Average ranks of the observations of x in every weighted resample.
+    Same as rankdata(x[index], axis=1) without sorting every resample
+
+    Params:
+        x: 1D array of observations
+        counts: Array of shape (resamples, len(x)) with observation weights
+    """
+    order = x.argsort(kind='stable')
+    sorted_x = x[order]
+    tie_starts = r_[True, sorted_x[1:] != sorted_x[:-1]]
+    tie_group = cumsum(tie_starts) - 1
+    starts = flatnonzero(tie_starts)
+    ends = r_[starts[1:], len(x)]
+
+    drawn = cumsum(counts[:, order], axis=1)
+    drawn = concatenate((zeros((len(counts), 1)), drawn), axis=1)
+    before = drawn[:, starts]
+    average = before + (drawn[:, ends] - before + 1) / 2
+
+    ranks = empty(counts.shape)
+    ranks[:, order] = average[:, tie_group]
+    return ranks
+
+
+def weighted_scores(x: ndarray, counts: ndarray, method: str = 'pearson') -> ndarray:
+    r"""
+    Centered and normalized values of x in every weighted resample,
+    so the correlation of two resampled variables is (counts * scores_x * scores_y).sum(axis=1)
+
+    Params:
+        x: 1D array of observations
+        counts: Array of shape (resamples, len(x)) with observation weights
+        method: 'pearson' or 'spearman'
+    """
+    if method == 'spearman':
+        values = weighted_ranks(x, counts)
+    elif method == 'pearson':
+        values = x[None, :]
+    else:
+        raise ValueError(f"Wrong correlation method {method}. Expected 'pearson' or 'spearman'")
+
+    centered = values - (counts * values).sum(axis=1, keepdims=True) / counts.sum(axis=1, keepdims=True)
+    with errstate(divide='ignore', invalid='ignore'):
+        return centered / sqrt((counts * centered * centered).sum(axis=1, keepdims=True))
+
+
+def confidence_interval(
+        theta_hat: float,
+        theta_hat_b: ndarray,
+        theta_hat_i: ndarray,
+        confidence_level: float = 0.95,
+        method: str = 'BCa'
+    ) -> Tuple[float, float]:
+    r"""
+    Two-sided bootstrap confidence interval as in scipy.stats.bootstrap
+
+    Params:
+        theta_hat: Statistic of the original sample
+        theta_hat_b: Statistics of the bootstrap resamples
+        theta_hat_i: Statistics of the jackknife resamples (used only by BCa)
+        confidence_level: Confidence level of the interval
+        method: 'percentile', 'basic' or 'BCa'
+    """
+    alpha = (1 - confidence_level) / 2
+
+    if method.lower() == 'bca':
+        score = ((theta_hat_b < theta_hat).sum() + (theta_hat_b <= theta_hat).sum()) / (2 * len(theta_hat_b))
+        z0_hat = special.ndtri(score)
+
+        u = theta_hat_i.mean() - theta_hat_i
+        with errstate(divide='ignore', invalid='ignore'):
+            a_hat = (u ** 3).sum() / (6 * (u ** 2).sum() ** 1.5)
+
+        z_alpha = special.ndtri(alpha)
+        num1 = z0_hat + z_alpha
+        num2 = z0_hat - z_alpha
+        with errstate(divide='ignore', invalid='ignore'):
+            alpha_1 = special.ndtr(z0_hat + num1 / (1 - a_hat * num1))
+            alpha_2 = special.ndtr(z0_hat + num2 / (1 - a_hat * num2))
+        if isnan(alpha_1) or isnan(alpha_2):
+            return float('nan'), float('nan')
+        low, high = percentile(theta_hat_b, [alpha_1 * 100, alpha_2 * 100])
+    elif method in ('percentile', 'basic'):
+        low, high = percentile(theta_hat_b, [alpha * 100, (1 - alpha) * 100])
+        if method == 'basic':
+            low, high = 2 * theta_hat - high, 2 * theta_hat - low
+    else:
+        raise ValueError(f"Wrong confidence interval method {method}. Expected 'percentile', 'basic' or 'BCa'")
+
+    return low, high
+
+
+def bootstrap_corr_group(
+        values: ndarray,
+        pairs: ndarray,
+        method: str = 'spearman',
+        n_resamples: int = 9999,
+        confidence_level: float = 0.95,
+        ci_method: str = 'BCa',
+        seed: Optional[SeedSequence] = None
+    ) -> Tuple[ndarray, ndarray, ndarray]:
+    r"""
+    Bootstrap correlations for column pairs that are observed on the same rows.
+    One resample matrix is drawn for the group and reused for every pair,
+    the statistics of all resamples of a pair are computed as one array operation.
+
+    Params:
+        values: 2D array with the common rows of the group (without NaN in the paired columns)
+        pairs: Integer array of shape (k, 2) with column numbers
+        method: 'pearson' or 'spearman'
+        n_resamples: Number of bootstrap resamples
+        confidence_level: Confidence level of the interval
+        ci_method: 'percentile', 'basic' or 'BCa'
+        seed: Seed of the group resamples
+    Returns:
+        low, high and standard error arrays of length k
+    """
+    n = len(values)
+    weights = {
+        'sample': ones((1, n)),
+        'bootstrap': resample_counts(n, n_resamples, seed),
+        'jackknife': 1 - eye(n)
+    }
+    cache: Dict[Tuple[str, int], ndarray] = {}
+
+    def scores(kind: str, column: int) -> ndarray:
+        if (kind, column) not in cache:
+            while cache and len(cache) * weights['bootstrap'].nbytes > BOOTSTRAP_CACHE_BYTES:
+                cache.pop(next(iter(cache)))
+            cache[kind, column] = weighted_scores(values[:, column], weights[kind], method)
+        return cache[kind, column]
+
+    def statistic(kind: str, c1: int, c2: int) -> ndarray:
+        theta = (weights[kind] * scores(kind, c1) * scores(kind, c2)).sum(axis=1)
+        return clip(theta, -1.0, 1.0)
+
+    low, high, se = empty(len(pairs)), empty(len(pairs)), empty(len(pairs))
+
+    for k, (c1, c2) in enumerate(pairs):
+        theta_hat_b = statistic('bootstrap', c1, c2)
+        low[k], high[k] = confidence_interval(
+            statistic('sample', c1, c2)[0],
+            theta_hat_b,
+            statistic('jackknife', c1, c2) if ci_method.lower() == 'bca' else None,
+            confidence_level,
+            ci_method
+        )
+        se[k] = theta_hat_b.std(ddof=1)
+
+    return low, high, se
+
+
+def bootstrap_task(
+        method: str,
+        n_resamples: int,
+        confidence_level: float,
+        ci_method: str,
+        values: ndarray,
+        task: Tuple[ndarray, ndarray, SeedSequence]
+    ) -> Tuple[ndarray, ndarray, ndarray]:
+    r"""
+    bootstrap_corr_group for the (rows, pairs, group seed) task of bootstrap_corr_pairs
+    """
+    rows, pairs, seed = task
+    return bootstrap_corr_group(values[rows], pairs, method, n_resamples, confidence_level, ci_method, seed)
+
+
+def bootstrap_corr_pairs(
+        values: ndarray,
+        pairs: ndarray,
+        method: str = 'spearman',
+        n_resamples: int = 9999,
+        confidence_level: float = 0.95,
+        ci_method: str = 'BCa',
+        seed: Optional[int] = None,
+        n_jobs: Optional[int] = None,
+        executor: Optional[Executor] = None
+    ) -> Tuple[ndarray, ndarray, ndarray, ndarray]:
+    r"""
+    Bootstrap confidence intervals of the pairwise-complete correlations between column pairs.
+    Pairs with the same overlap pattern share one resample matrix (see bootstrap_corr_group).
+
+    Params:
+        values: 2D array with variables in columns
+        pairs: Integer array of shape (k, 2) with column numbers
+        method: 'pearson' or 'spearman'
+        n_resamples: Number of bootstrap resamples
+        confidence_level: Confidence level of the interval
+        ci_method: 'percentile', 'basic' or 'BCa'
+        seed: Seed for reproducible results
+        n_jobs: Number of worker processes (see zhutils.parallel.map_shared).
+                Large groups are split between workers, every part draws the same group resamples
+        executor: Executor for the groups of pairs
+    Returns:
+        low, high, standard error and number of complete pairs arrays of length k
+    """
+    values = asarray(values, dtype=float)
+    pairs = asarray(pairs, dtype=int).reshape(-1, 2)
+    groups = overlap_groups(~isnan(values), pairs)
+
+    n_workers = get_n_workers(n_jobs, executor)
+    max_pairs = ceil(len(pairs) / (n_workers * CHUNKS_PER_WORKER)) if n_workers > 1 else len(pairs)
+
+    low, high, se = empty(len(pairs)), empty(len(pairs)), empty(len(pairs))
+    n = empty(len(pairs), dtype=int)
+    tasks, task_pairs = [], []
+
+    for (rows, pair_numbers), group_seed in zip(groups, SeedSequence(seed).spawn(len(groups))):
+        n[pair_numbers] = len(rows)
+        if len(rows) < 2:
+            low[pair_numbers] = high[pair_numbers] = se[pair_numbers] = float('nan')
+            continue
+        for part in split_into_chunks(pair_numbers, ceil(len(pair_numbers) / max(1, max_pairs))):
+            tasks.append((rows, pairs[part], group_seed))
+            task_pairs.append(part)
+
+    results = map_shared(
+        partial(bootstrap_task, method, n_resamples, confidence_level, ci_method),
+        (values,),
+        tasks,
+        n_jobs,
+        executor
+    )
+
+    for part, (part_low, part_high, part_se) in zip(task_pairs, results):
+        low[part], high[part], se[part] = part_low, part_high, part_se
+
+    return low, high, se, n
+
+
+def scipy_bootstrap_task(
+        corr_function: CorrFunction,
+        bootstrap_parameters: Dict,
+        values: ndarray,
+        task: Tuple[int, int, Optional[SeedSequence]]
+    ) -> Tuple[float, float, float, int]:
+    r"""
+    scipy.stats.bootstrap of corr_function for the (column, column, seed) task.
+    Without seed scipy uses its default random state
+
+    Returns:
+        low, high, standard error and number of complete pairs
+    """
+    c1, c2, seed = task
+    x, y = values[:, c1], values[:, c2]
+
+    if seed is not None:
+        bootstrap_parameters = {**bootstrap_parameters, 'random_state': default_rng(seed)}
+
+    def get_corr(x, y):
+        return corr_function(x, y)[0]
+
+    res = stats.bootstrap(data=(x, y), statistic=get_corr, vectorized=False, paired=True, **bootstrap_parameters)
+    low, high = res.confidence_interval
+    return low, high, res.standard_error, len(dropna(x, y)[0])
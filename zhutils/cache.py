@@ -0,0 +1,350 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from copy import deepcopy
+from functools import wraps
+from hashlib import sha1
+from inspect import isfunction, ismethod, signature
+from types import CodeType, ModuleType
+from os import listdir, makedirs, path, remove, replace, stat, utime
+from sys import builtin_module_names, modules
+from sysconfig import get_paths
+from pickle import HIGHEST_PROTOCOL, PicklingError, dump, dumps, load
+from tempfile import mkstemp
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    Optional,
+    Set,
+    Tuple
+)
+
+from numpy import ascontiguousarray, ndarray
+from pandas import DataFrame, Series
+from pandas.util import hash_pandas_object
+
+from zhutils.lazy import LazyModule
+
+
+cache_options = {
+    'cache': None
+}
+
+# Functions and classes of the installed packages and the standard library are hashed by name and version
+LIBRARY_PATHS = tuple({get_paths()[name] for name in ('stdlib', 'platstdlib', 'purelib', 'platlib')})
+
+
+def _library_version(module_name: Optional[str]) -> Optional[str]:
+    r"""
+    Version of the installed package of the module, None for the user code
+    """
+    if not module_name:
+        return None
+    package = module_name.split('.')[0]
+    if package in builtin_module_names:
+        return 'builtin'
+    module_file = getattr(modules.get(module_name), '__file__', None)
+    if module_file is None or not path.abspath(module_file).startswith(LIBRARY_PATHS):
+        return None
+    return str(getattr(modules.get(package), '__version__', ''))
+
+
+def _update_hash(digest, obj: Any, seen: Optional[Set[int]] = None) -> None:
+    seen = set() if seen is None else seen
+
+    if isinstance(obj, (DataFrame, Series)):
+        digest.update(f'{type(obj).__name__}{obj.shape}'.encode())
+        if isinstance(obj, DataFrame):
+            digest.update(repr((list(obj.columns), [str(dtype) for dtype in obj.dtypes])).encode())
+            for _, column in obj.items():
+                digest.update(hash_pandas_object(column, index=False).to_numpy().tobytes())
+        else:
+            digest.update(repr((obj.name, str(obj.dtype))).encode())
+            digest.update(hash_pandas_object(obj, index=False).to_numpy().tobytes())
+        digest.update(hash_pandas_object(obj.index).to_numpy().tobytes())
+    elif isinstance(obj, ndarray):
+        digest.update(f'ndarray{obj.shape}{obj.dtype}'.encode())
+        digest.update(ascontiguousarray(obj).tobytes() if obj.dtype != object else dumps(obj.tolist()))
+    elif obj is None or isinstance(obj, (bool, int, float, complex, str, bytes)):
+        digest.update(repr(obj).encode())
+    elif isinstance(obj, (tuple, list)):
+        digest.update(f'{type(obj).__name__}{len(obj)}'.encode())
+        for item in obj:
+            _update_hash(digest, item, seen)
+    elif isinstance(obj, (set, frozenset)):
+        # Iteration order of sets of strings changes between processes
+        digest.update(f'{type(obj).__name__}{len(obj)}'.encode())
+        for item in sorted(obj, key=repr):
+            _update_hash(digest, item, seen)
+    elif isinstance(obj, dict):
+        digest.update(f'dict{len(obj)}'.encode())
+        for key, value in sorted(obj.items(), key=lambda item: repr(item[0])):
+            _update_hash(digest, key, seen)
+            _update_hash(digest, value, seen)
+    elif isinstance(obj, LazyModule):
+        # The name only: attributes of a lazy module import it
+        digest.update(f'module {obj._name}'.encode())
+    elif isinstance(obj, ModuleType):
+        digest.update(f'module {obj.__name__}'.encode())
+    elif isinstance(obj, type) or (callable(obj) and hasattr(obj, '__qualname__')
+                                   and _library_version(getattr(obj, '__module__', None)) is not None):
+        # Classes and library functions are identified by name (and version of their package)
+        module_name = getattr(obj, '__module__', None)
+        digest.update(f'{module_name}.{obj.__qualname__} {_library_version(module_name)}'.encode())
+    elif isfunction(obj):
+        _update_function_hash(digest, obj, seen)
+    elif ismethod(obj):
+        _update_hash(digest, obj.__func__, seen)
+        _update_hash(digest, obj.__self__, seen)
+    else:
+        # Callable objects (e.g. CorrComparison) are identified by their type and pickled state
+        digest.update(f'{type(obj).__module__}.{type(obj).__qualname__}'.encode())
+        try:
+            digest.update(dumps(obj, protocol=HIGHEST_PROTOCOL))
+        except AttributeError as error:
+            # Local objects raise AttributeError
+            raise PicklingError(str(error)) from error
+
+
+def _code_names(code: CodeType) -> Set[str]:
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            names |= _code_names(const)
+    return names
+
+
+def _update_code_hash(digest, code: CodeType, seen: Set[int]) -> None:
+    # Nested code objects (lambdas, comprehensions) are hashed by content, their repr holds a memory address
+    digest.update(code.co_code)
+    _update_hash(digest, code.co_names, seen)
+    digest.update(f'consts{len(code.co_consts)}'.encode())
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            _update_code_hash(digest, const, seen)
+        else:
+            _update_hash(digest, const, seen)
+
+
+def _update_function_hash(digest, func: Callable, seen: Set[int]) -> None:
+    # Lambdas and local functions share their qualname, so their code, constants,
+    # defaults, closures and the globals they read are hashed too
+    digest.update(f'{func.__module__}.{func.__qualname__}'.encode())
+    if id(func) in seen:
+        # Recursive references are hashed by name only
+        return
+    seen.add(id(func))
+
+    _update_code_hash(digest, func.__code__, seen)
+    _update_hash(digest, func.__defaults__, seen)
+    _update_hash(digest, func.__kwdefaults__, seen)
+    _update_hash(digest, [cell.cell_contents for cell in func.__closure__ or ()], seen)
+    _update_hash(
+        digest,
+        {name: func.__globals__[name] for name in _code_names(func.__code__) if name in func.__globals__},
+        seen
+    )
+
+
+def content_hash(*objects: Any) -> str:
+    r"""
+    Hash of the contents of objects: values, index, columns and dtypes of DataFrames and Series,
+    bytes of numpy arrays, code of functions with the globals they read and pickled state of other objects.
+    Raises TypeError or pickle.PicklingError for objects that can not be hashed
+    """
+    digest = sha1()
+    for obj in objects:
+        _update_hash(digest, obj)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    r"""
+    Two-tier cache of computation results: in-memory LRU and optional on-disk pickles
+    (the least recently used files are removed when the directory exceeds max_disk_bytes).
+    Results are copied on the way in and out, so changing a returned DataFrame does not change the cache.
+
+    Enabled with set_result_cache or the result_cache context manager
+    for the methods decorated with cached_method (compare_with, get_full_comparison, corr_result).
+
+    Params:
+        max_entries: Number of results kept in memory
+        cache_dir: Directory of the on-disk tier. Default None: memory only
+        max_disk_bytes: Maximal size of the on-disk tier
+    """
+
+    def __init__(
+            self,
+            max_entries: int = 128,
+            cache_dir: Optional[str] = None,
+            max_disk_bytes: int = 1 << 30
+        ):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if cache_dir:
+            makedirs(cache_dir, exist_ok=True)
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    def info(self) -> Dict[str, int]:
+        r"""
+        Hit / miss counters and the current size of the tiers
+        """
+        return {
+            'hits': self.hits,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'memory_entries': len(self._memory),
+            'disk_bytes': sum(size for _, _, size in self._disk_files())
+        }
+
+    def _file_path(self, key: str) -> str:
+        return path.join(self.cache_dir, f'{key}.pkl')
+
+    def _disk_files(self) -> Iterator[Tuple[str, float, int]]:
+        if not self.cache_dir:
+            return
+        for name in listdir(self.cache_dir):
+            if name.endswith('.pkl'):
+                file_stat = stat(path.join(self.cache_dir, name))
+                yield path.join(self.cache_dir, name), file_stat.st_mtime, file_stat.st_size
+
+    def _remember(self, key: str, value: Any) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        r"""
+        Returns:
+            (found, copy of the cached value)
+        """
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return True, deepcopy(self._memory[key])
+
+        if self.cache_dir and path.exists(self._file_path(key)):
+            try:
+                with open(self._file_path(key), 'rb') as file:
+                    value = load(file)
+            except (OSError, EOFError):
+                pass
+            else:
+                utime(self._file_path(key))
+                self.disk_hits += 1
+                self._remember(key, value)
+                return True, deepcopy(value)
+
+        self.misses += 1
+        return False, None
+
+    def put(self, key: str, value: Any) -> None:
+        self._remember(key, deepcopy(value))
+
+        if self.cache_dir:
+            handle, temp_path = mkstemp(prefix='.zhutils-', dir=self.cache_dir)
+            try:
+                with open(handle, 'wb') as file:
+                    dump(value, file, protocol=HIGHEST_PROTOCOL)
+            except (PicklingError, AttributeError, TypeError):
+                # Unpicklable results (e.g. Styler with local functions) stay in memory only
+                remove(temp_path)
+                return
+            replace(temp_path, self._file_path(key))
+            self._evict_files()
+
+    def _evict_files(self) -> None:
+        files = sorted(self._disk_files(), key=lambda file: file[1])
+        total = sum(size for _, _, size in files)
+        for file_path, _, size in files:
+            if total <= self.max_disk_bytes:
+                break
+            remove(file_path)
+            total -= size
+
+    def clear(self) -> None:
+        r"""
+        Removes all results from both tiers and resets the counters
+        """
+        self._memory.clear()
+        for file_path, _, _ in list(self._disk_files()):
+            remove(file_path)
+        self.memory_hits = self.disk_hits = self.misses = 0
+
+
+def set_result_cache(cache: Optional[ResultCache]) -> None:
+    r"""
+    Sets the cache of the methods decorated with cached_method. None disables caching (default)
+    """
+    cache_options['cache'] = cache
+
+
+@contextmanager
+def result_cache(cache: Optional[ResultCache]) -> Iterator[Optional[ResultCache]]:
+    r"""
+    Context manager that temporarily sets the result cache (see set_result_cache)
+    """
+    previous = cache_options['cache']
+    set_result_cache(cache)
+    try:
+        yield cache
+    finally:
+        cache_options['cache'] = previous
+
+
+def cached_method(*ignored: str) -> Callable[[Callable], Callable]:
+    r"""
+    Decorator that caches the results of a method in the current result cache (see set_result_cache).
+    The key is the content hash of the method (its code and the globals it reads, see content_hash)
+    and all bound arguments including self and the defaults, so equal DataFrames share results
+    and results of an older implementation of the method are not reused.
+    Calls with arguments that can not be hashed are not cached
+
+    Params:
+        ignored: Parameters that do not change the result (e.g. n_jobs, executor)
+    """
+    def decorator(method: Callable) -> Callable:
+        method_signature = signature(method)
+        # Hashed on the first call: the globals of the method are not defined yet at decoration time
+        method_key = []
+
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            cache = cache_options['cache']
+            if cache is None:
+                return method(*args, **kwargs)
+
+            bound = method_signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {key: value for key, value in bound.arguments.items() if key not in ignored}
+
+            try:
+                if not method_key:
+                    method_key.append(content_hash(method))
+                key = content_hash(method_key[0], arguments)
+            except (TypeError, PicklingError):
+                return method(*args, **kwargs)
+
+            found, value = cache.get(key)
+            if found:
+                return value
+
+            value = method(*args, **kwargs)
+            cache.put(key, value)
+            return value
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,117 @@
+from hashlib import sha1
+from json import dump, load as load_json
+from os import path, replace, stat
+from shutil import rmtree
+from tempfile import mkdtemp
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Optional
+)
+
+from numpy import (
+    asarray,
+    load,
+    save
+)
+from pandas import DataFrame
+
+
+META_FILE = 'meta.json'
+
+
+def get_file_key(file_path: str, *parts: Iterable[Any]) -> str:
+    r"""
+    Key of the file state: absolute path, modification time, size and extra parts (e.g. tree list).
+    The key changes whenever the file is modified
+    """
+    file_stat = stat(file_path)
+    key = [path.abspath(file_path), file_stat.st_mtime_ns, file_stat.st_size, *[list(part) for part in parts]]
+    return sha1(repr(key).encode()).hexdigest()
+
+
+def save_columns(df: DataFrame, bundle_path: str, meta: Optional[Dict] = None, overwrite: bool = True) -> None:
+    r"""
+    Saves the columns of df as a bundle of .npy files (one file per column) with a json description.
+    The bundle is written to a temporary directory first and moved into place, so readers never see a partial bundle
+
+    Params:
+        df: DataFrame with numeric, bool or str columns. Object columns must not have missing values
+        bundle_path: Directory of the bundle
+        meta: Additional json-serializable description stored with the bundle
+        overwrite: Replace an existing bundle. False for content-addressed bundles (e.g. the cache of Tracheids):
+                   an existing bundle is kept and a bundle moved into place by a concurrent writer counts as saved,
+                   so bundles that other processes read are never removed
+    """
+    if not overwrite and path.isdir(bundle_path):
+        return
+
+    for column in df.columns:
+        if df[column].dtype == object and df[column].isna().any():
+            raise ValueError(f'Column {column} has missing values. Object columns are saved as strings')
+
+    directory = path.dirname(path.abspath(bundle_path))
+    temp_path = mkdtemp(prefix='.zhutils-', dir=directory)
+
+    columns = []
+    try:
+        for i, column in enumerate(df.columns):
+            values = df[column].to_numpy()
+            if values.dtype == object:
+                values = values.astype(str)
+            save(path.join(temp_path, f'{i}.npy'), values)
+            columns.append(str(column))
+
+        with open(path.join(temp_path, META_FILE), 'w', encoding='utf-8') as file:
+            dump({'columns': columns, 'meta': meta or {}}, file, ensure_ascii=False)
+
+        if overwrite and path.isdir(bundle_path):
+            # The old bundle is moved aside in one step and removed after the new one is in place
+            old_path = mkdtemp(prefix='.zhutils-', dir=directory)
+            replace(bundle_path, path.join(old_path, 'bundle'))
+            try:
+                replace(temp_path, bundle_path)
+            except OSError:
+                replace(path.join(old_path, 'bundle'), bundle_path)
+                raise
+            finally:
+                rmtree(old_path, ignore_errors=True)
+        else:
+            try:
+                replace(temp_path, bundle_path)
+            except OSError:
+                # A concurrent writer of the same content-addressed bundle was faster
+                if overwrite or not path.isfile(path.join(bundle_path, META_FILE)):
+                    raise
+    finally:
+        rmtree(temp_path, ignore_errors=True)
+
+
+def load_meta(bundle_path: str) -> Dict:
+    r"""
+    Returns the meta description saved with the bundle
+    """
+    with open(path.join(bundle_path, META_FILE), encoding='utf-8') as file:
+        return load_json(file)['meta']
+
+
+def load_columns(bundle_path: str, mmap: bool = True) -> DataFrame:
+    r"""
+    Loads a bundle written by save_columns
+
+    Params:
+        bundle_path: Directory of the bundle
+        mmap: Memory-map the column files (copy-on-write: changes of the DataFrame are not written to the files)
+              instead of reading them
+    """
+    with open(path.join(bundle_path, META_FILE), encoding='utf-8') as file:
+        columns = load_json(file)['columns']
+
+    data = {}
+    for i, column in enumerate(columns):
+        values = load(path.join(bundle_path, f'{i}.npy'), mmap_mode='c' if mmap else None)
+        data[column] = values.astype(object) if values.dtype.kind == 'U' else asarray(values)
+
+    # Without copy=False the DataFrame consolidates the columns into new arrays
+    return DataFrame(data, copy=False)
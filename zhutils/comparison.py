@@ -0,0 +1,43 @@
+from dataclasses import dataclass
+from numpy import ndarray
+from pandas import DataFrame
+from typing import Tuple
+
+from zhutils.correlation import (
+    dropna_pearsonr,
+    dropna_spearmanr,
+    nan_corr_matrix
+)
+
+
+@dataclass(frozen=True)
+class CorrComparison:
+    r"""
+    ComparisonFunction that correlates the climate index with a column of the compared DataFrame.
+    DailyDataFrame and MonthlyDataFrame compute it for all days / months at once with compare_arrays
+
+    Params:
+        column: Column of the compared DataFrame (e.g. chronology)
+        method: 'pearson' or 'spearman'
+    """
+    column: str
+    method: str = 'pearson'
+
+    def __post_init__(self):
+        if self.method not in ('pearson', 'spearman'):
+            raise ValueError(f"Wrong correlation method {self.method}. Expected 'pearson' or 'spearman'")
+
+    def __call__(self, df: DataFrame, index: str) -> Tuple[float, float]:
+        corr_function = dropna_pearsonr if self.method == 'pearson' else dropna_spearmanr
+        return corr_function(df[index], df[self.column])
+
+    def compare_arrays(self, climate: ndarray, other: DataFrame) -> Tuple[ndarray, ndarray]:
+        r"""
+        Params:
+            climate: Array of shape (years, k) with the climate index for k days / months
+            other: Compared DataFrame with rows aligned to the years of climate
+        Returns:
+            Stat and P-value arrays of length k
+        """
+        r, p, _ = nan_corr_matrix(climate, other[[self.column]].to_numpy(dtype=float), self.method)
+        return r[:, 0], p[:, 0]
@@ -1,21 +1,51 @@
+from concurrent.futures import Executor
+from functools import partial
 from typing import (
     Iterable,
-    Optional
+    List,
+    Optional,
+    Tuple
 )
+from warnings import catch_warnings, simplefilter
 
 from numpy import (
+    arange,
     array,
+    asarray,
+    clip,
+    concatenate,
+    cumsum,
+    diag_indices,
+    empty,
+    errstate,
+    flatnonzero,
+    full,
     isnan,
+    ix_,
     logical_or,
-    sqrt
-)
-from scipy.stats import (
-    pearsonr,
-    spearmanr,
-    t
+    nan,
+    nanmean,
+    ndarray,
+    outer,
+    packbits,
+    sqrt,
+    unique,
+    where,
+    zeros
 )
 
+from zhutils.common import CorrFunction
+from zhutils.lazy import lazy_import
 from zhutils.math import fexp
+from zhutils.parallel import map_shared
+
+stats = lazy_import('scipy.stats')
+
+
+CORR_BLOCK_SIZE = 64
+CONSTANT_TOLERANCE = 1e-10
+HIGHLIGHT_POSITIVE = 'background-color: lightgreen'
+HIGHLIGHT_NEGATIVE = 'background-color: lightcoral'
 
 
 def dropna(x: Iterable, y: Iterable) -> tuple[array, array]:
@@ -27,13 +57,13 @@ def dropna(x: Iterable, y: Iterable) -> tuple[array, array]:
 
 def dropna_pearsonr(x: Iterable, y: Iterable) -> tuple[float, float]:
     x, y = dropna(x, y)
-    r, p = pearsonr(x, y)
+    r, p = stats.pearsonr(x, y)
     return r, p
 
 
 def dropna_spearmanr(x: Iterable, y: Iterable) -> tuple[float, float]:
     x, y = dropna(x, y)
-    r, p = spearmanr(x, y)
+    r, p = stats.spearmanr(x, y)
     return r, p
 
 
@@ -44,7 +74,282 @@ def get_t_stat(r: float, n: int) -> float:
 def get_p_value(r: float, n: int) -> float:
     r = abs(r)
     t_stat = get_t_stat(r, n)
-    return t.sf(t_stat, n-2)*2
+    return stats.t.sf(t_stat, n-2)*2
+
+
+def get_p_values(r: ndarray, n: ndarray) -> ndarray:
+    r"""
+    Vectorized get_p_value. Follows scipy.stats.pearsonr conventions for the edge cases:
+    p=0 for |r|=1, p=1 for two observations and NaN when r is undefined
+    """
+    r, n = asarray(r, dtype=float), asarray(n)
+    with errstate(divide='ignore', invalid='ignore'):
+        p = get_p_value(r, n)
+    p = where(abs(r) == 1, 0.0, p)
+    p = where(n == 2, 1.0, p)
+    p = where((n < 2) | isnan(r), nan, p)
+    return p
+
+
+def column_blocks(
+        mask: ndarray,
+        by_pattern: bool = False,
+        block_size: int = CORR_BLOCK_SIZE
+    ) -> List[ndarray]:
+    r"""
+    Splits the columns of a 2D array into blocks of at most block_size columns.
+
+    Params:
+        mask: 2D boolean array, True for the observed values
+        by_pattern: Put only columns with the same pattern of observed values into one block
+        block_size: Maximum number of columns in a block
+    """
+    if by_pattern and mask.shape[1]:
+        _, patterns = unique(packbits(mask, axis=0).T, axis=0, return_inverse=True)
+        groups = [flatnonzero(patterns.ravel() == i) for i in range(patterns.max() + 1)]
+    else:
+        groups = [arange(mask.shape[1])]
+
+    return [
+        group[start:start + block_size]
+        for group in groups
+        for start in range(0, len(group), block_size)
+    ]
+
+
+def corr_block(
+        x: ndarray,
+        y: ndarray,
+        method: str = 'pearson'
+    ) -> Tuple[ndarray, ndarray]:
+    r"""
+    Pairwise-complete correlations between every column of x and every column of y.
+
+    Pearson coefficients are computed from the masked moments with a few matrix products.
+    For Spearman all columns of x and all columns of y must have one pattern of observed values
+    (see column_blocks), so the complete rows are ranked once for the whole block.
+
+    Params:
+        x: 2D array of shape (n, a)
+        y: 2D array of shape (n, b)
+        method: 'pearson' or 'spearman'
+    Returns:
+        r and n arrays of shape (a, b)
+    """
+    if method == 'pearson':
+        mask_x, mask_y = ~isnan(x), ~isnan(y)
+        x, y = where(mask_x, x, 0.0), where(mask_y, y, 0.0)
+        mask_x, mask_y = mask_x.astype(float), mask_y.astype(float)
+
+        n = mask_x.T @ mask_y
+        sum_x, sum_y = x.T @ mask_y, mask_x.T @ y
+        sum_xx, sum_yy = (x * x).T @ mask_y, mask_x.T @ (y * y)
+        with errstate(divide='ignore', invalid='ignore'):
+            cov = x.T @ y - sum_x * sum_y / n
+            var_x = sum_xx - sum_x * sum_x / n
+            var_y = sum_yy - sum_y * sum_y / n
+            r = cov / sqrt(var_x * var_y)
+        # Constant inputs leave only rounding errors in the variances
+        r = where((var_x <= CONSTANT_TOLERANCE * sum_xx) | (var_y <= CONSTANT_TOLERANCE * sum_yy), nan, r)
+        n = n.round().astype(int)
+
+    elif method == 'spearman':
+        rows = ~logical_or(isnan(x).any(axis=1), isnan(y).any(axis=1))
+        x, y = stats.rankdata(x[rows], axis=0), stats.rankdata(y[rows], axis=0)
+        x, y = x - x.mean(axis=0), y - y.mean(axis=0)
+        with errstate(divide='ignore', invalid='ignore'):
+            r = (x.T @ y) / outer(sqrt((x * x).sum(axis=0)), sqrt((y * y).sum(axis=0)))
+        n = full(r.shape, rows.sum())
+
+    else:
+        raise ValueError(f"Wrong correlation method {method}. Expected 'pearson' or 'spearman'")
+
+    r = where(n < 2, nan, clip(r, -1.0, 1.0))
+    return r, n
+
+
+def corr_task(method: str, x: ndarray, y: ndarray, task: Tuple[ndarray, ndarray]) -> Tuple[ndarray, ndarray]:
+    r"""
+    corr_block for the (columns of x, columns of y) task of nan_corr_matrix
+    """
+    columns_x, columns_y = task
+    return corr_block(x[:, columns_x], y[:, columns_y], method)
+
+
+def corr_function_task(corr_function: CorrFunction, values: ndarray, task: Tuple[int, int]) -> Tuple[float, float]:
+    r"""
+    corr_function for the (column, column) task
+    """
+    c1, c2 = task
+    return corr_function(values[:, c1], values[:, c2])
+
+
+def overlap_task(mask_x: ndarray, mask_y: ndarray, task: Tuple[ndarray, ndarray]) -> ndarray:
+    r"""
+    Numbers of rows where both columns are observed for the (columns of x, columns of y) task
+    """
+    columns_x, columns_y = task
+    return (mask_x[:, columns_x].T.astype(float) @ mask_y[:, columns_y].astype(float)).round().astype(int)
+
+
+def get_block_tasks(blocks_x: List[ndarray], blocks_y: List[ndarray], symmetric: bool) -> List[Tuple[ndarray, ndarray]]:
+    r"""
+    Returns (columns of x, columns of y) pairs of blocks, only the upper triangle for symmetric matrices
+    """
+    return [
+        (columns_x, columns_y)
+        for i, columns_x in enumerate(blocks_x)
+        for j, columns_y in enumerate(blocks_y)
+        if not symmetric or i <= j
+    ]
+
+
+def fill_blocks(
+        matrix: ndarray,
+        tasks: List[Tuple[ndarray, ndarray]],
+        blocks: List[ndarray],
+        symmetric: bool
+    ) -> ndarray:
+    r"""
+    Writes block results into the matrix (and their transpositions for symmetric matrices)
+    """
+    for (columns_x, columns_y), block in zip(tasks, blocks):
+        matrix[ix_(columns_x, columns_y)] = block
+        if symmetric:
+            matrix[ix_(columns_y, columns_x)] = block.T
+    return matrix
+
+
+def nan_corr_matrix(
+        x: ndarray,
+        y: Optional[ndarray] = None,
+        method: str = 'pearson',
+        n_jobs: Optional[int] = None,
+        executor: Optional[Executor] = None
+    ) -> Tuple[ndarray, ndarray, ndarray]:
+    r"""
+    Pairwise-complete correlation matrices between the columns of x and the columns of y.
+    Same as calling dropna_pearsonr / dropna_spearmanr for every pair of columns.
+
+    Params:
+        x: 2D array with variables in columns
+        y: 2D array with variables in columns. Default None: columns of x with each other
+           (only the upper triangle is computed, r = 1 and p = 0 on the diagonal)
+        method: 'pearson' or 'spearman'
+        n_jobs: Number of worker processes for the blocks of columns (see zhutils.parallel.map_shared)
+        executor: Executor for the blocks of columns
+    Returns:
+        r, p and n arrays of shape (x columns, y columns)
+    """
+    x = asarray(x, dtype=float)
+    symmetric = y is None
+    y = x if symmetric else asarray(y, dtype=float)
+
+    if method == 'pearson':
+        # Centering makes the moments of the pairwise-complete subsets numerically stable
+        with catch_warnings():
+            simplefilter('ignore', RuntimeWarning)
+            x = x - nanmean(x, axis=0)
+            y = x if symmetric else y - nanmean(y, axis=0)
+
+    by_pattern = method == 'spearman'
+    blocks_x = column_blocks(~isnan(x), by_pattern)
+    blocks_y = blocks_x if symmetric else column_blocks(~isnan(y), by_pattern)
+    tasks = get_block_tasks(blocks_x, blocks_y, symmetric)
+
+    results = map_shared(partial(corr_task, method), (x, y), tasks, n_jobs, executor)
+
+    shape = (x.shape[1], y.shape[1])
+    r = fill_blocks(empty(shape), tasks, [block_r for block_r, _ in results], symmetric)
+    n = fill_blocks(empty(shape, dtype=int), tasks, [block_n for _, block_n in results], symmetric)
+
+    if symmetric:
+        diagonal = diag_indices(x.shape[1])
+        r[diagonal] = where(isnan(r[diagonal]), nan, 1.0)
+
+    return r, get_p_values(r, n), n
+
+
+def pairwise_overlap(
+        mask: ndarray,
+        n_jobs: Optional[int] = None,
+        executor: Optional[Executor] = None
+    ) -> ndarray:
+    r"""
+    Square matrix with the numbers of rows where both columns are observed
+
+    Params:
+        mask: 2D boolean array, True for the observed values
+        n_jobs: Number of worker processes for the blocks of columns (see zhutils.parallel.map_shared)
+        executor: Executor for the blocks of columns
+    """
+    blocks = column_blocks(mask)
+    tasks = get_block_tasks(blocks, blocks, symmetric=True)
+    results = map_shared(overlap_task, (mask, mask), tasks, n_jobs, executor)
+    return fill_blocks(empty((mask.shape[1], mask.shape[1]), dtype=int), tasks, results, symmetric=True)
+
+
+
+def window_sums(values: ndarray, window: int) -> ndarray:
+    r"""
+    Sums over all windows of window consecutive rows, computed from the cumulative sums
+    """
+    cumulative = concatenate((zeros((1,) + values.shape[1:]), cumsum(values, axis=0)))
+    return cumulative[window:] - cumulative[:-window]
+
+
+def moving_corr(
+        x: ndarray,
+        y: ndarray,
+        window: int,
+        step: int = 1
+    ) -> Tuple[ndarray, ndarray, ndarray]:
+    r"""
+    Pairwise-complete Pearson correlations of the columns of x with y in sliding windows of rows.
+    The moments of all windows are differences of cumulative sums, so every window costs O(1)
+    instead of a new pass over its rows. Same as dropna_pearsonr for every window.
+
+    Params:
+        x: 2D array of shape (rows, k)
+        y: 1D array of length rows or 2D array of shape (rows, k)
+        window: Number of rows in a window
+        step: Step between the first rows of the windows
+    Returns:
+        r, p and n arrays of shape (windows, k)
+    """
+    x = asarray(x, dtype=float)
+    y = asarray(y, dtype=float)
+    y = y[:, None] if y.ndim == 1 else y
+
+    if not 0 < window <= len(x):
+        raise ValueError(f'Wrong window {window}. Expected from 1 to {len(x)} rows')
+
+    # Centering makes the differences of the cumulative sums numerically stable
+    with catch_warnings():
+        simplefilter('ignore', RuntimeWarning)
+        x = x - nanmean(x, axis=0)
+        y = y - nanmean(y, axis=0)
+
+    mask = ~isnan(x) & ~isnan(y)
+    x, y = where(mask, x, 0.0), where(mask, y, 0.0)
+
+    def sums(values: ndarray) -> ndarray:
+        return window_sums(values, window)[::step]
+
+    n = sums(mask.astype(float))
+    sum_x, sum_y = sums(x), sums(y)
+    sum_xx, sum_yy = sums(x * x), sums(y * y)
+    with errstate(divide='ignore', invalid='ignore'):
+        cov = sums(x * y) - sum_x * sum_y / n
+        var_x = sum_xx - sum_x * sum_x / n
+        var_y = sum_yy - sum_y * sum_y / n
+        r = cov / sqrt(var_x * var_y)
+    r = where((var_x <= CONSTANT_TOLERANCE * sum_xx) | (var_y <= CONSTANT_TOLERANCE * sum_yy), nan, r)
+
+    n = n.round().astype(int)
+    r = where(n < 2, nan, clip(r, -1.0, 1.0))
+
+    return r, get_p_values(r, n), n
 
 
 def print_r_anp_p(
@@ -87,8 +392,26 @@ def check_highlight(
     
     if p < highlight_from:
         if r > 0:
-            return 'background-color: lightgreen'
+            return HIGHLIGHT_POSITIVE
         else:
-            return 'background-color: lightcoral'
+            return HIGHLIGHT_NEGATIVE
     
     return ''
+
+
+def highlight_css(r: ndarray, p: ndarray, highlight_from: Optional[float]) -> ndarray:
+    r"""
+    Vectorized check_highlight: CSS of every cell of the r and p matrices at once
+    """
+    if not highlight_from:
+        return full(asarray(r).shape, '', dtype=object)
+
+    with errstate(invalid='ignore'):
+        significant, positive = asarray(p) < highlight_from, asarray(r) > 0
+    return where(significant, where(positive, HIGHLIGHT_POSITIVE, HIGHLIGHT_NEGATIVE), '').astype(object)
+
+
+BATCHED_CORR_METHODS = {
+    dropna_pearsonr: 'pearson',
+    dropna_spearmanr: 'spearman'
+}
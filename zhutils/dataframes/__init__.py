@@ -1,3 +1,27 @@
-from zhutils.dataframes.superb_dataframe import SuperbDataFrame
-from zhutils.dataframes.monthly_dataframe import MonthlyDataFrame
-from zhutils.dataframes.daily_dataframe import DailyDataFrame
+from importlib import import_module
+
+# Public names are imported from their modules on the first access
+EXPORTS = {
+    'SuperbDataFrame': 'zhutils.dataframes.superb_dataframe',
+    'MonthlyDataFrame': 'zhutils.dataframes.monthly_dataframe',
+    'DailyDataFrame': 'zhutils.dataframes.daily_dataframe',
+    'DailyStream': 'zhutils.dataframes.daily_stream',
+    'set_validation_mode': 'zhutils.dataframes.validation',
+    'validation_mode': 'zhutils.dataframes.validation',
+    'DailyArray': 'zhutils.dataframes.daily_array',
+    'CorrResult': 'zhutils.dataframes.corr_result'
+}
+
+__all__ = list(EXPORTS)
+
+
+def __getattr__(name):
+    if name in EXPORTS:
+        value = getattr(import_module(EXPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
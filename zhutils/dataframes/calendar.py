@@ -0,0 +1,216 @@
+from numpy import (
+    add,
+    arange,
+    array,
+    asarray,
+    bincount,
+    concatenate,
+    cumsum,
+    errstate,
+    flatnonzero,
+    fmax,
+    full,
+    isnan,
+    nan,
+    ndarray,
+    r_,
+    searchsorted,
+    sort,
+    unique,
+    where,
+    zeros
+)
+from pandas import DataFrame
+from typing import List, Optional, Tuple
+
+
+DAYS_IN_YEAR = 366
+DAYS_IN_MONTH = array([31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+MONTH_OFFSETS = cumsum(DAYS_IN_MONTH) - DAYS_IN_MONTH
+
+
+def day_of_year(month: ndarray, day: ndarray) -> ndarray:
+    r"""
+    Returns the 0-based day of the leap year (0 -- January 1, 59 -- February 29, 365 -- December 31)
+    """
+    return MONTH_OFFSETS[asarray(month) - 1] + asarray(day) - 1
+
+
+def month_and_day(slots: ndarray) -> Tuple[ndarray, ndarray]:
+    r"""
+    Inverse of day_of_year
+    """
+    slots = asarray(slots)
+    month = searchsorted(MONTH_OFFSETS, slots, side='right')
+    return month, slots - MONTH_OFFSETS[month - 1] + 1
+
+
+def slot_between(month: int, day: int, last: bool = False) -> int:
+    r"""
+    Slot of the first (or the last) day of the leap year that is not before (after) month and day.
+    Days out of the month range are allowed: (2, 31) starts from March 1, (3, 0) ends with February 29
+    """
+    days = DAYS_IN_MONTH[month - 1]
+    if last:
+        return int(MONTH_OFFSETS[month - 1] + min(max(day, 0), days) - 1)
+    return int(MONTH_OFFSETS[month - 1] + min(max(day, 1), days + 1) - 1)
+
+
+class CalendarIndex:
+    r"""
+    Integer calendar index of the rows of a daily table (Year, Month, Day).
+    Built once per table and reused for grouping by the days of the year and by months,
+    selecting periods of the year and pivoting
+
+    Params:
+        year, month, day: Date columns of the table
+    """
+
+    def __init__(self, year: ndarray, month: ndarray, day: ndarray):
+        self.slots = day_of_year(month, day)
+        self.years, self.year_rows = unique(asarray(year), return_inverse=True)
+        self.by_slot = self.slots.argsort(kind='stable')
+        self.slot_starts = concatenate(([0], cumsum(bincount(self.slots, minlength=DAYS_IN_YEAR))))
+        self._month_groups: Optional[Tuple[ndarray, ndarray, ndarray]] = None
+
+    @property
+    def present_slots(self) -> ndarray:
+        r"""
+        Sorted days of the year present in the table
+        """
+        return flatnonzero(self.slot_starts[1:] > self.slot_starts[:-1])
+
+    def day_groups(self) -> List[Tuple[int, ndarray]]:
+        r"""
+        (slot, rows) for every present day of the year, rows in the table order.
+        Same as groupby(['Month', 'Day']).indices
+        """
+        return [
+            (slot, self.by_slot[self.slot_starts[slot]:self.slot_starts[slot + 1]])
+            for slot in self.present_slots
+        ]
+
+    def rows_between(self, first_slot: int, last_slot: int) -> ndarray:
+        r"""
+        Rows with the days of the year from first_slot to last_slot (inclusive) in the table order
+        """
+        if first_slot > last_slot:
+            return arange(0)
+        return sort(self.by_slot[self.slot_starts[first_slot]:self.slot_starts[last_slot + 1]])
+
+    def shift_years(self, values: ndarray) -> ndarray:
+        r"""
+        Values of the previous row with the same day of the year (NaN for the first one).
+        Same as groupby(['Month', 'Day']).shift()
+        """
+        values = asarray(values, dtype=float)
+        result = full(values.shape, nan)
+        previous, current = self.by_slot[:-1], self.by_slot[1:]
+        same = self.slots[previous] == self.slots[current]
+        result[current[same]] = values[previous[same]]
+        return result
+
+    def pivot(self, values: ndarray) -> Tuple[ndarray, ndarray]:
+        r"""
+        Array of shape (years, 366, columns) with NaN for the missing days and the present mask
+        (see pivot_days)
+        """
+        values = asarray(values, dtype=float)
+        result = full((len(self.years), DAYS_IN_YEAR) + values.shape[1:], nan)
+        result[self.year_rows, self.slots] = values
+
+        present = zeros((len(self.years), DAYS_IN_YEAR), dtype=bool)
+        present[self.year_rows, self.slots] = True
+
+        return result, present
+
+    def month_groups(self) -> Tuple[ndarray, ndarray, ndarray]:
+        r"""
+        Rows sorted by (year, month) with the group starts
+
+        Returns:
+            order: Rows in the order of (year, month), table order inside a group
+            starts: First positions of the groups in order
+            keys: Group numbers year_row * 12 + month - 1 of the groups
+        """
+        if self._month_groups is None:
+            months = searchsorted(MONTH_OFFSETS, self.slots, side='right') - 1
+            groups = self.year_rows * 12 + months
+            order = groups.argsort(kind='stable')
+            sorted_groups = groups[order]
+            starts = flatnonzero(r_[True, sorted_groups[1:] != sorted_groups[:-1]]) if len(order) else arange(0)
+            self._month_groups = order, starts, sorted_groups[starts]
+        return self._month_groups
+
+    def month_aggregate(self, values: ndarray, how: str) -> ndarray:
+        r"""
+        Aggregates values by (year, month) groups (see month_groups), NaN are skipped as in pandas
+
+        Params:
+            values: 1D array with a value for every row
+            how: 'sum', 'mean' or 'max'
+        """
+        order, starts, _ = self.month_groups()
+        values = asarray(values, dtype=float)[order]
+        if not len(starts):
+            return values[:0]
+
+        if how == 'max':
+            return fmax.reduceat(values, starts)
+
+        observed = ~isnan(values)
+        sums = add.reduceat(where(observed, values, 0.0), starts)
+        if how == 'sum':
+            return sums
+
+        counts = add.reduceat(observed.astype(float), starts)
+        with errstate(invalid='ignore', divide='ignore'):
+            return sums / counts
+
+
+def pivot_days(df: DataFrame, columns: List[str]) -> Tuple[ndarray, ndarray, ndarray]:
+    r"""
+    Pivots a long daily DataFrame (Year, Month, Day, columns) into a years × days of the year array
+
+    Returns:
+        years: Sorted unique years
+        values: Array of shape (years, 366, columns), NaN for the missing days
+        present: Boolean array of shape (years, 366), True for the days present in df
+    """
+    index = CalendarIndex(df['Year'].to_numpy(), df['Month'].to_numpy(), df['Day'].to_numpy())
+    values, present = index.pivot(df[columns].to_numpy(dtype=float))
+    return index.years, values, present
+
+
+def align_years(
+        years_x: ndarray,
+        x: ndarray,
+        years_y: ndarray,
+        y: ndarray
+    ) -> Tuple[ndarray, ndarray, ndarray]:
+    r"""
+    Aligns the rows of x and y on every year of the common period, missing years are NaN
+
+    Params:
+        years_x: Unique years of the rows of x
+        x: Array with rows for years_x
+        years_y: Unique years of the rows of y
+        y: Array with rows for years_y
+    Returns:
+        years: Consecutive years from the latest first year to the earliest last year
+        x, y: Arrays with rows for years
+    """
+    years_x, years_y = asarray(years_x), asarray(years_y)
+    start = max(years_x.min(), years_y.min())
+    end = min(years_x.max(), years_y.max())
+    years = arange(start, end + 1)
+
+    aligned = []
+    for source_years, values in ((years_x, x), (years_y, y)):
+        values = asarray(values, dtype=float)
+        result = full((len(years),) + values.shape[1:], nan)
+        rows = (source_years >= start) & (source_years <= end)
+        result[source_years[rows] - start] = values[rows]
+        aligned.append(result)
+
+    return years, aligned[0], aligned[1]
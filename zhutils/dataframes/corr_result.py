@@ -0,0 +1,279 @@
+from numpy import (
+    arange,
+    array_equal,
+    asarray,
+    atleast_1d,
+    errstate,
+    full,
+    load,
+    nan,
+    ndarray,
+    nonzero,
+    savez_compressed,
+    where
+)
+from pandas import DataFrame, Index, Series
+from typing import (
+    Any,
+    BinaryIO,
+    Optional,
+    Union
+)
+
+from zhutils.common import OutputFunction
+from zhutils.correlation import highlight_css, print_r_anp_p
+from zhutils.dataframes.export import check_table_extension, write_styled_table
+
+
+class CorrResult:
+    r"""
+    Numeric result of SuperbDataFrame.corr_result and SuperbDataFrame.bootstrap_corr_result:
+    float matrices of shape (index, columns), cell [j, i] belongs to the pair (columns[i], index[j]).
+    Cells are formatted only on demand (see format), so the numbers are never parsed back from strings.
+
+    Params:
+        index: Row labels
+        columns: Column labels
+        r: Correlation coefficients
+        p: p-values
+        n: Numbers of complete pairs
+        low: Lower bounds of the bootstrap confidence intervals
+        high: Upper bounds of the bootstrap confidence intervals
+        se: Bootstrap standard errors
+    """
+
+    FIELDS = ('r', 'p', 'n', 'low', 'high', 'se')
+
+    def __init__(
+            self,
+            index,
+            columns,
+            r: ndarray,
+            p: ndarray,
+            n: Optional[ndarray] = None,
+            low: Optional[ndarray] = None,
+            high: Optional[ndarray] = None,
+            se: Optional[ndarray] = None
+        ):
+        self.index = Index(index)
+        self.columns = Index(columns)
+        shape = (len(self.index), len(self.columns))
+
+        for field, value in zip(self.FIELDS, (r, p, n, low, high, se)):
+            if value is not None:
+                value = asarray(value, dtype=float)
+                if value.shape != shape:
+                    raise ValueError(f'Wrong shape of {field} {value.shape}. Expected {shape}')
+            setattr(self, field, value)
+
+    @property
+    def shape(self) -> tuple:
+        return len(self.index), len(self.columns)
+
+    @property
+    def is_bootstrap(self) -> bool:
+        return self.se is not None
+
+    @property
+    def nbytes(self) -> int:
+        return sum(value.nbytes for value in self._arrays().values())
+
+    def _arrays(self) -> dict:
+        return {field: getattr(self, field) for field in self.FIELDS if getattr(self, field) is not None}
+
+    def _take(self, rows: ndarray, columns: ndarray) -> 'CorrResult':
+        arrays = {field: value[rows][:, columns] for field, value in self._arrays().items()}
+        return CorrResult(self.index[rows], self.columns[columns], **arrays)
+
+    def __getitem__(self, key) -> 'CorrResult':
+        r"""
+        Sub-matrix by labels: result[['A', 'B']] takes the same rows and columns,
+        result[rows, columns] takes them separately. Labels, lists of labels, slices and boolean masks are supported
+        """
+        rows, columns = key if isinstance(key, tuple) else (key, key)
+        return self._take(self._positions(self.index, rows), self._positions(self.columns, columns))
+
+    @staticmethod
+    def _positions(labels: Index, key) -> ndarray:
+        return atleast_1d(asarray(Series(arange(len(labels)), index=labels).loc[key]))
+
+    def significant(self, alpha: float = 0.05) -> ndarray:
+        r"""
+        Boolean matrix of the cells with p < alpha (False for NaN p-values)
+        """
+        with errstate(invalid='ignore'):
+            return self.p < alpha
+
+    def where_significant(self, alpha: float = 0.05) -> 'CorrResult':
+        r"""
+        Copy of the result with NaN in all the fields of the cells with p >= alpha
+        """
+        mask = self.significant(alpha)
+        return CorrResult(
+            self.index,
+            self.columns,
+            **{field: where(mask, value, nan) for field, value in self._arrays().items()}
+        )
+
+    def to_frame(self, field: str = 'r') -> DataFrame:
+        r"""
+        Float DataFrame of one field (r, p, n, low, high, se) with the labels of the result
+        """
+        if field not in self.FIELDS or getattr(self, field) is None:
+            raise KeyError(f'CorrResult has no field {field!r}')
+        return DataFrame(getattr(self, field), index=self.index, columns=self.columns)
+
+    def to_long(self, alpha: Optional[float] = None) -> DataFrame:
+        r"""
+        Long DataFrame with a row per cell: row and column labels and all the fields.
+
+        Params:
+            alpha: Keep only the cells with p < alpha. Default None: all cells
+        """
+        if alpha is None:
+            rows, columns = nonzero(full(self.shape, True))
+        else:
+            rows, columns = nonzero(self.significant(alpha))
+
+        result = DataFrame({'Row': self.index[rows], 'Column': self.columns[columns]})
+        for field, value in self._arrays().items():
+            result[field] = value[rows, columns]
+        return result
+
+    def save(self, file: Union[str, BinaryIO]) -> None:
+        r"""
+        Writes the result to a compressed .npz file (see numpy.savez_compressed).
+        Labels of object dtype are stored as strings
+        """
+        labels = {}
+        for name, value in (('index', self.index), ('columns', self.columns)):
+            value = value.to_numpy()
+            labels[name] = value.astype(str) if value.dtype == object else value
+        savez_compressed(file, **labels, **self._arrays())
+
+    @classmethod
+    def load(cls, file: Union[str, BinaryIO]) -> 'CorrResult':
+        r"""
+        Reads the result written by save
+        """
+        with load(file, allow_pickle=False) as data:
+            arrays = {field: data[field] for field in cls.FIELDS if field in data.files}
+            return cls(data['index'], data['columns'], **arrays)
+
+    def row_cells(
+            self,
+            row: int,
+            output_function: OutputFunction = print_r_anp_p,
+            r_decimals: int = 2,
+            p_decimals: int = 3,
+            print_p_exponent: bool = True
+        ) -> ndarray:
+        r"""
+        Object array of the formatted cells of one row (see cells)
+        """
+        result = full(self.shape[1], nan, dtype=object)
+
+        for i in range(self.shape[1]):
+            if not self.is_bootstrap:
+                result[i] = output_function(
+                    self.r[row, i], self.p[row, i], r_decimals, p_decimals, print_p_exponent
+                )
+            elif self.index[row] != self.columns[i]:
+                result[i] = output_function(
+                    r=self.r[row, i],
+                    p=self.p[row, i],
+                    low=self.low[row, i],
+                    high=self.high[row, i],
+                    se=self.se[row, i],
+                    r_decimals=r_decimals,
+                    p_decimals=p_decimals
+                )
+
+        return result
+
+    def cells(
+            self,
+            output_function: OutputFunction = print_r_anp_p,
+            r_decimals: int = 2,
+            p_decimals: int = 3,
+            print_p_exponent: bool = True
+        ) -> ndarray:
+        r"""
+        Object array of the formatted cells.
+
+        Correlation results call output_function(r, p, r_decimals, p_decimals, print_p_exponent)
+        (see SuperbDataFrame.corr_and_p_values). Bootstrap results call
+        output_function(r=, p=, low=, high=, se=, r_decimals=, p_decimals=) and have NaN
+        on the cells with the same row and column label (see SuperbDataFrame.bootstrap_corr)
+        """
+        result = full(self.shape, nan, dtype=object)
+        for j in range(self.shape[0]):
+            result[j] = self.row_cells(j, output_function, r_decimals, p_decimals, print_p_exponent)
+        return result
+
+    def format(
+            self,
+            output_function: OutputFunction = print_r_anp_p,
+            r_decimals: int = 2,
+            p_decimals: int = 3,
+            print_p_exponent: bool = True,
+            highlight_from: Optional[float] = None
+        ) -> DataFrame:
+        r"""
+        Formatted table of the result, the same as returned by corr_and_p_values and bootstrap_corr.
+
+        Params:
+            output_function: Function for describing the cell format (default '0.90\n(p=0.001)')
+            r_decimals: Number of decimal places of the correlation coefficient
+            p_decimals: Number of decimal places of the p-value
+            highlight_from: Minimum highlighted p-value. Default None: DataFrame without highlighting
+        """
+        result = DataFrame(
+            self.cells(output_function, r_decimals, p_decimals, print_p_exponent),
+            index=self.index,
+            columns=self.columns,
+            dtype=object
+        )
+
+        if highlight_from:
+            css = highlight_css(self.r, self.p, highlight_from)
+            return result.style.apply(lambda _: css, axis=None)
+
+        return result
+
+    def export(
+            self,
+            path: str,
+            output_function: OutputFunction = print_r_anp_p,
+            r_decimals: int = 2,
+            p_decimals: int = 3,
+            print_p_exponent: bool = True,
+            highlight_from: Optional[float] = None
+        ) -> str:
+        r"""
+        Writes the formatted and highlighted table to an .html or .xlsx file
+        (see zhutils.dataframes.export.write_styled_table). Every row is formatted while it is written,
+        so the table of cells is never kept in memory
+        """
+        check_table_extension(path)
+        rows = range(self.shape[0])
+
+        return write_styled_table(
+            path,
+            (self.row_cells(j, output_function, r_decimals, p_decimals, print_p_exponent) for j in rows),
+            (highlight_css(self.r[j], self.p[j], highlight_from) for j in rows),
+            self.index,
+            self.columns
+        )
+
+    def __repr__(self) -> str:
+        fields = ', '.join(self._arrays())
+        return f'<CorrResult {self.shape[0]}x{self.shape[1]} ({fields})>'
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, CorrResult):
+            return NotImplemented
+        if not (self.index.equals(other.index) and self.columns.equals(other.columns)):
+            return False
+        own, others = self._arrays(), other._arrays()
+        return own.keys() == others.keys() and all(array_equal(own[field], others[field], equal_nan=True) for field in own)
@@ -0,0 +1,146 @@
+from numpy import (
+    arange,
+    asarray,
+    concatenate,
+    full,
+    maximum,
+    nan,
+    nanmean,
+    ndarray,
+    nonzero,
+    where
+)
+from pandas import DataFrame
+from pandas.api.types import is_numeric_dtype
+from typing import List, Optional, Union
+from warnings import catch_warnings, simplefilter
+
+from zhutils.dataframes.calendar import (
+    DAYS_IN_YEAR,
+    CalendarIndex,
+    month_and_day
+)
+
+
+class DailyArray:
+    r"""
+    Dense representation of a long daily table: array of shape (years, 366, columns)
+    with NaN for the missing values and a mask of the days present in the table.
+    Takes (years × 366 × columns) floats instead of (rows × (columns + 3)) values of the long table,
+    the long table is built only on demand (see to_frame)
+
+    Params:
+        years: Sorted unique years
+        values: Array of shape (years, 366, columns). Day 59 is February 29
+        columns: Names of the value columns
+        present: Boolean array of shape (years, 366), True for the days present in the table.
+                 Default None: the days with at least one value
+    """
+
+    def __init__(
+            self,
+            years: ndarray,
+            values: ndarray,
+            columns: List[str],
+            present: Optional[ndarray] = None
+        ):
+        self.years = asarray(years)
+        self.values = asarray(values)
+        self.columns = list(columns)
+        self.present = (self.values == self.values).any(axis=2) if present is None else asarray(present, dtype=bool)
+
+        if self.values.shape != (len(self.years), DAYS_IN_YEAR, len(self.columns)):
+            raise ValueError(
+                f'Wrong shape of values {self.values.shape}. '
+                f'Expected {(len(self.years), DAYS_IN_YEAR, len(self.columns))}'
+            )
+
+    @staticmethod
+    def value_columns(df: DataFrame) -> List[str]:
+        r"""
+        Default value columns of a long table: numeric columns except Year, Month and Day
+        """
+        return [
+            column for column in df.columns
+            if column not in ('Year', 'Month', 'Day') and is_numeric_dtype(df[column])
+        ]
+
+    @classmethod
+    def from_frame(
+            cls,
+            df: DataFrame,
+            columns: Optional[List[str]] = None,
+            dtype: Union[str, type] = float,
+            calendar: Optional[CalendarIndex] = None
+        ) -> 'DailyArray':
+        r"""
+        Params:
+            df: Long DataFrame with Year, Month, Day columns and unique dates
+            columns: Value columns. Default: numeric columns except Year, Month and Day
+                     (e.g. a Station column is skipped)
+            dtype: dtype of values (e.g. 'float32' to halve the memory)
+            calendar: Calendar index of df, if it is already built
+        """
+        columns = columns or cls.value_columns(df)
+        if calendar is None:
+            calendar = CalendarIndex(df['Year'].to_numpy(), df['Month'].to_numpy(), df['Day'].to_numpy())
+
+        values, present = calendar.pivot(df[columns].to_numpy(dtype=float))
+        return cls(calendar.years, values.astype(dtype), columns, present)
+
+    @property
+    def nbytes(self) -> int:
+        return self.years.nbytes + self.values.nbytes + self.present.nbytes
+
+    def __getitem__(self, column: str) -> ndarray:
+        r"""
+        Array of shape (years, 366) with the values of column
+        """
+        return self.values[:, :, self.columns.index(column)]
+
+    def to_frame(self) -> DataFrame:
+        r"""
+        Long DataFrame with the present days sorted by Year, Month and Day
+        (DailyDataFrame.from_array makes a DailyDataFrame of it)
+        """
+        year_rows, slots = nonzero(self.present)
+        month, day = month_and_day(slots)
+        values = self.values[year_rows, slots].astype(float)
+
+        return DataFrame({
+            'Year': self.years[year_rows],
+            'Month': month,
+            'Day': day,
+            **{column: values[:, i] for i, column in enumerate(self.columns)}
+        })
+
+    def shift_years(self) -> 'DailyArray':
+        r"""
+        Values of the previous year with the same day present in the table (NaN for the first one).
+        Same as DailyDataFrame.groupby(['Month', 'Day']).shift() on the long table
+        """
+        year_numbers = where(self.present, arange(len(self.years))[:, None], -1)
+        last_present = maximum.accumulate(year_numbers, axis=0)
+        previous = concatenate((full((1, DAYS_IN_YEAR), -1), last_present[:-1]))
+
+        shifted = self.values[previous, arange(DAYS_IN_YEAR)]
+        shifted = where(((previous >= 0) & self.present)[:, :, None], shifted, nan)
+
+        return DailyArray(self.years, shifted.astype(self.values.dtype), self.columns, self.present)
+
+    def climatology(self) -> DataFrame:
+        r"""
+        Mean values of every day of the year over all years (rows -- Month and Day of the present days)
+        """
+        slots = self.present.any(axis=0).nonzero()[0]
+        month, day = month_and_day(slots)
+
+        with catch_warnings():
+            simplefilter('ignore', RuntimeWarning)
+            means = nanmean(self.values[:, slots].astype(float), axis=0)
+
+        return DataFrame({
+            'Month': month,
+            'Day': day,
+            **{column: means[:, i] for i, column in enumerate(self.columns)}
+        })
@@ -1,69 +1,197 @@
-import matplotlib.pylab as plt
-from matplotlib.ticker import NullFormatter
-from matplotlib.dates import MonthLocator, DateFormatter
-from numpy import nanmean as np_nanmean
+from numpy import (
+    array,
+    column_stack,
+    concatenate,
+    full,
+    nan,
+    searchsorted,
+    unique,
+    zeros,
+    intersect1d,
+    ndarray,
+    repeat,
+    tile
+)
 from pandas import (
     merge,
-    read_excel, 
-    DataFrame
+    read_csv,
+    read_excel,
+    read_parquet,
+    DataFrame,
+    Index,
+    MultiIndex
 )
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple, Union
 
+from zhutils.cache import cached_method
 from zhutils.common import ComparisonFunction
-from zhutils.dataframes.schemas import *
+from zhutils.correlation import moving_corr, nan_corr_matrix
+from zhutils.dataframes.calendar import (
+    DAYS_IN_YEAR,
+    CalendarIndex,
+    align_years,
+    day_of_year,
+    month_and_day,
+    slot_between
+)
+from zhutils.dataframes.daily_array import DailyArray
+from zhutils.dataframes.errors import FileExtentionError
 from zhutils.dataframes.superb_dataframe import SuperbDataFrame
+from zhutils.profiling import profiled, stage
+from zhutils.rolling import rolling
 from zhutils.dataframes.monthly_dataframe import MonthlyDataFrame
+from zhutils.lazy import lazy_import
+
+plt = lazy_import('matplotlib.pylab')
+daily_plots = lazy_import('zhutils.plots.daily')
+schemas = lazy_import('zhutils.dataframes.schemas')
 
 
 class DailyDataFrame(SuperbDataFrame):
+    r"""
+    Long daily climate table (Year, Month, Day, Temperature, Precipitation).
+    The calendar index of the rows (see CalendarIndex) and the dense array of the values (see to_array)
+    are built on the first use and cached, changes of the table through pandas
+    (assignment, loc / iloc, inplace methods) drop the caches
+    """
+    _schema = 'daily_dataframe_schema'
+    _internal_names = SuperbDataFrame._internal_names + ['_calendar', '_daily_array']
+    _internal_names_set = set(_internal_names)
+    _calendar: Optional[CalendarIndex] = None
+    _daily_array: Optional[DailyArray] = None
+
+    @property
+    def calendar(self) -> CalendarIndex:
+        if self._calendar is None:
+            self._calendar = CalendarIndex(
+                self['Year'].to_numpy(),
+                self['Month'].to_numpy(),
+                self['Day'].to_numpy()
+            )
+        return self._calendar
+
+    @classmethod
+    def from_array(cls, array: DailyArray) -> 'DailyDataFrame':
+        r"""
+        Builds the long table from the dense representation (see DailyArray).
+        The array is kept as the cached to_array of the table
+        """
+        result = cls(array.to_frame())
+        result._daily_array = array
+        return result
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        daily_dataframe_schema.validate(self)
+    def to_array(self, columns: Optional[List[str]] = None, dtype: Union[str, type] = float) -> DailyArray:
+        r"""
+        Dense representation years × 366 × columns (see DailyArray).
+        The array is cached until the table is changed, so repeated calls do not pivot the table again.
+        The cached array is shared by the callers and must not be changed in place
+
+        Params:
+            columns: Value columns. Default: numeric columns except Year, Month and Day
+            dtype: dtype of values (e.g. 'float32' to halve the memory)
+        """
+        columns = list(columns or DailyArray.value_columns(self))
+        cached = self._daily_array
+        if cached is not None and cached.columns == columns and cached.values.dtype == dtype:
+            return cached
+
+        self._daily_array = DailyArray.from_frame(self, columns, dtype, self.calendar)
+        return self._daily_array
+
+    def _clear_item_cache(self) -> None:
+        super()._clear_item_cache()
+        self._calendar = None
+        self._daily_array = None
+
+    def __delitem__(self, key) -> None:
+        super().__delitem__(key)
+        self._calendar = None
+        self._daily_array = None
+
+    def copy(self, deep: bool = True):
+        # DataFrame.copy clears the item cache of the source, but does not change its data
+        calendar, daily_array = self._calendar, self._daily_array
+        result = super().copy(deep=deep)
+        self._calendar, self._daily_array = calendar, daily_array
+        return result
+
+    def _moving(
+            self,
+            how: str,
+            window: int,
+            columns: Optional[List[str]],
+            min_count: int
+        ) -> DataFrame:
+        columns = columns or ['Temperature', 'Precipitation']
 
+        result = DataFrame(
+            rolling(self[columns].to_numpy(dtype=float), window, how, min_count),
+            index=self.index,
+            columns=columns
+        )
+        
+        result['Year'] = self['Year']
+        result['Month'] = self['Month']
+        result['Day'] = self['Day']
+
+        return result
+
+    @profiled
     def moving_avg(
             self,
             window: int = 7,
             columns: Optional[List[str]] = None,
-            nanmean: Optional[bool] = False
+            nanmean: Optional[bool] = False,
+            min_count: Optional[int] = None
         ) -> DataFrame:
         r"""
         Возвращает скользящее среднее
         window : окно
         nanmean : используем nanmean для сглаживания? (тогда потеряются данные по краям)
+        min_count : минимальное число значений (не NaN) в окне, иначе NaN.
+                    По-умолчанию 1, с nanmean -- window
         """
-        columns = columns or ['Temperature', 'Precipitation']
-        result = self[columns]
-        if nanmean:
-            result = result.rolling(window=window, center=True).apply(np_nanmean)
-        else:
-            result = result.rolling(window=window, center=True, min_periods=1).mean()
-        
-        result['Year'] = self['Year']
-        result['Month'] = self['Month']
-        result['Day'] = self['Day']
-
-        return result
+        min_count = min_count or (window if nanmean else 1)
+        return self._moving('mean', window, columns, min_count)
 
     def moving_sum(
             self, 
             window: int = 7,
             columns: Optional[List[str]] = None,
+            min_count: int = 1
         )-> DataFrame:
         r"""
         Возвращает скользящую сумму для выбранных колонок
         window : окно
+        min_count : минимальное число значений (не NaN) в окне, иначе NaN
         """
-        columns = columns or ['Temperature', 'Precipitation']
+        return self._moving('sum', window, columns, min_count)
 
-        result = self[columns]
-        result = self.rolling(window=window, center=True, min_periods=1).sum()
-        
-        result['Year'] = self['Year']
-        result['Month'] = self['Month']
-        result['Day'] = self['Day']
+    def moving_min(
+            self, 
+            window: int = 7,
+            columns: Optional[List[str]] = None,
+            min_count: int = 1
+        )-> DataFrame:
+        r"""
+        Возвращает скользящий минимум для выбранных колонок
+        window : окно
+        min_count : минимальное число значений (не NaN) в окне, иначе NaN
+        """
+        return self._moving('min', window, columns, min_count)
 
-        return result
+    def moving_max(
+            self, 
+            window: int = 7,
+            columns: Optional[List[str]] = None,
+            min_count: int = 1
+        )-> DataFrame:
+        r"""
+        Возвращает скользящий максимум для выбранных колонок
+        window : окно
+        min_count : минимальное число значений (не NaN) в окне, иначе NaN
+        """
+        return self._moving('max', window, columns, min_count)
     
     def plot_total(
             self,
@@ -71,43 +199,23 @@ class DailyDataFrame(SuperbDataFrame):
             prec_ylim: List[float] = [0, 70],
             title: str = '',
             temperature_label: str = 'T, °C',
-            precipitation_label: str = 'P, mm'
+            precipitation_label: str = 'P, mm',
+            dpi: int = 300
         ) -> tuple:
         r"""
-        Plots mean monthly teperatures and total precipitatioins for all years
+        Plots mean monthly teperatures and total precipitatioins for all years.
+        For many plots use zhutils.plots.daily.render with TotalTemplate
         """
-        fig, ax = plt.subplots(nrows=1, ncols=1, dpi=300, figsize=(6, 6))
-        plt.subplots_adjust(top=0.95, bottom=.1, right=.89, left=.11)
-        
-        ax.yaxis.set_label_coords(-.08, .5)
-        ax2 = ax.twinx()
-        ax.set_zorder(1)  # default zorder is 0 for ax1 and ax2
-        ax.patch.set_visible(False)  # prevents ax1 from hiding ax2
-        ax2.patch.set_visible(True)
-        mean_prec = []
-        mean_temp = []
-
-        for i in range(1, 13):
-            month_df = self[self['Month'] == i]
-            mean_prec.append(month_df.groupby('Year').sum()['Precipitation'].mean())
-            mean_temp.append(month_df.groupby('Year').mean()['Temperature'].mean())
-        
-        ax.axhline(0, c='lightgrey')
-        ax.plot(mean_temp, c='firebrick', linewidth=3)
-        ax2.bar(range(12), mean_prec, color='royalblue', width=1)
-        ax.set_xticks(range(12))
-        ax.set_xticklabels(['J', 'F', 'M', 'A', 'M ', 'J', 'J', 'A', 'S', 'O', 'N', 'D'])
-        ax.set_ylabel(temperature_label)
-
-        ax2.set_ylabel(precipitation_label)
-        ax.set_ylim(temp_ylim)
-        ax2.set_ylim(prec_ylim)
-        ax.set_xlabel('Month')
-
-        ax.set_title(title)
-        
+        fig, ax = plt.subplots(nrows=1, ncols=1, dpi=dpi, figsize=(6, 6))
+        mean_temp, mean_prec = daily_plots.total_plot_data(self)
+        daily_plots.draw_total(
+            fig, ax, mean_temp, mean_prec, temp_ylim, prec_ylim, title, temperature_label, precipitation_label
+        )
+
         return fig, ax
     
+    @profiled
+    @cached_method()
     def compare_with(
             self,
             other: DataFrame,
@@ -120,38 +228,222 @@ class DailyDataFrame(SuperbDataFrame):
         r"""
         Params:
             other: DataFrame с которым происходит сравнение,
-            using: Функция сравнения (Принимает на вход DataFrame с колонкой Year),
+            using: Функция сравнения (Принимает на вход DataFrame с колонкой Year).
+                   Функции с методом compare_arrays (например, CorrComparison) считаются сразу для всех дней
             index: 'Temperature', или 'Precipitation'
             moving_avg_window: Окно скользящего среднего для сглаживания климатики. По-умолчанию None -- сглаживание не применяется
             previous_year: Флаг того, сравнивается ли климатика этого года или предыдущего
         """
 
-        other_schema.validate(other)
+        return self.compare_variants(other, using, [(index, previous_year)], moving_avg_window)[0]
+
+    @profiled
+    def compare_variants(
+            self,
+            other: DataFrame,
+            using: ComparisonFunction,
+            variants: List[Tuple[str, bool]],
+            moving_avg_window: Optional[int] = None
+        ) -> List[DataFrame]:
+        r"""
+        Сравнивает климатику с other для каждого варианта (index, previous_year) за один проход:
+        other присоединяется по Year один раз, климатика предыдущего года сдвигается один раз.
+        Если у using есть метод compare_arrays(climate, other), сравнение считается сразу
+        для массива годы × дни года, иначе using вызывается для каждого (Month, Day).
+
+        Params:
+            other: DataFrame с которым происходит сравнение,
+            using: Функция сравнения (Принимает на вход DataFrame с колонкой Year),
+            variants: Список пар (index, previous_year)
+            moving_avg_window: Окно скользящего среднего для сглаживания климатики. По-умолчанию None -- сглаживание не применяется
+        Returns:
+            Список DataFrame с колонками Month, Day, Stat, P-value в порядке variants
+        """
+
+        with stage('other schema', 'validate'):
+            schemas.other_schema.validate(other)
+
+        if hasattr(using, 'compare_arrays') and other['Year'].is_unique:
+            with stage('DailyDataFrame.compare_variants pivot', 'group'):
+                years, month, day, values = self._pivot_variants(variants, moving_avg_window)
+
+            _, rows, other_rows = intersect1d(years, other['Year'].to_numpy(), return_indices=True)
+            other = other.iloc[other_rows].reset_index(drop=True)
+
+            result = []
+            with stage(f'{type(using).__name__}.compare_arrays', 'compute'):
+                for i in range(len(variants)):
+                    stat, p_value = using.compare_arrays(values[rows, :, i], other)
+                    result.append(DataFrame({'Month': month, 'Day': day, 'Stat': stat, 'P-value': p_value}))
+            return result
 
         if moving_avg_window:
             df = self.moving_avg(window=moving_avg_window)
         else:
             df = self
 
-        groups = df.drop(columns=['Year']).groupby(['Month', 'Day']).groups
+        frames = {False: df}
+        if any(previous_year for _, previous_year in variants):
+            shifted_columns = ['Temperature', 'Precipitation']
+            frames[True] = df.assign(**{
+                column: self.calendar.shift_years(df[column].to_numpy()) for column in shifted_columns
+            })
+
+        with stage('DailyDataFrame.compare_variants join other', 'merge'):
+            joined = {previous_year: frame.merge(other, on='Year') for previous_year, frame in frames.items()}
+        with stage('DailyDataFrame.compare_variants day groups', 'group'):
+            groups = {
+                previous_year: dict(CalendarIndex(frame['Year'], frame['Month'], frame['Day']).day_groups())
+                for previous_year, frame in joined.items()
+            }
+        slots = self.calendar.present_slots
+        keys = list(zip(slots, *month_and_day(slots)))
+
+        result = []
+        for index, previous_year in variants:
+            comparison = []
+
+            for slot, month, day in keys:
+                rows = groups[previous_year].get(slot, [])
+                to_compare = joined[previous_year].iloc[rows].reset_index(drop=True)
+                with stage(getattr(using, '__qualname__', type(using).__name__), 'compute'):
+                    stat, p_value = using(to_compare, index)
+
+                comparison.append([month, day, stat, p_value])
+
+            columns = {0: 'Month', 1:'Day', 2:'Stat', 3:'P-value'}
+            result.append(DataFrame(comparison).rename(columns=columns))
+        
+        return result
+    
+    def _pivot_variants(
+            self,
+            variants: List[Tuple[str, bool]],
+            moving_avg_window: Optional[int] = None
+        ) -> Tuple[ndarray, ndarray, ndarray, ndarray]:
+        r"""
+        Массив климатики годы × дни года × варианты (index, previous_year)
 
-        comparison = []
+        Returns:
+            years, month, day (дни, присутствующие в данных) и values формы (years, days, variants)
+        """
 
-        for key in groups:
-            temp_df = df.loc[groups[key]]
-            if previous_year:
-                temp_df['Temperature'] = temp_df['Temperature'].shift()
-                temp_df['Precipitation'] = temp_df['Precipitation'].shift()
+        if moving_avg_window:
+            df = self.moving_avg(window=moving_avg_window)
+        else:
+            df = self
 
-            to_compare = temp_df.merge(other, on='Year')
-            stat, p_value = using(to_compare, index)
+        calendar = self.calendar
+        variant_values = column_stack([
+            calendar.shift_years(df[index].to_numpy()) if previous_year else df[index].to_numpy(dtype=float)
+            for index, previous_year in variants
+        ])
 
-            comparison.append([*key, stat, p_value])
-        
-        columns = {0: 'Month', 1:'Day', 2:'Stat', 3:'P-value'}
-        result = DataFrame(comparison).rename(columns=columns)
-        return result
-    
+        values, _ = calendar.pivot(variant_values)
+        slots = calendar.present_slots
+        month, day = month_and_day(slots)
+
+        return calendar.years, month, day, values[:, slots]
+
+    @profiled
+    def compare_chronologies(
+            self,
+            chronologies: DataFrame,
+            variants: List[Tuple[str, bool]] = [('Temperature', False)],
+            method: str = 'pearson',
+            moving_avg_window: Optional[int] = None,
+            n_jobs: Optional[int] = None
+        ) -> DataFrame:
+        r"""
+        Корреляции климатики со многими хронологиями сразу: климатика группируется и сдвигается один раз,
+        корреляции всех дней, вариантов и хронологий считаются одной матрицей (см. nan_corr_matrix)
+
+        Params:
+            chronologies: Широкий DataFrame с колонкой Year и колонкой для каждой хронологии
+            variants: Список пар (index, previous_year)
+            method: 'pearson' или 'spearman'
+            moving_avg_window: Окно скользящего среднего для сглаживания климатики. По-умолчанию None -- сглаживание не применяется
+            n_jobs: Число процессов для блоков матрицы корреляций
+        Returns:
+            DataFrame с колонками Chronology, Index, Previous year, Month, Day, Stat, P-value
+        """
+
+        schemas.other_schema.validate(chronologies)
+        if not chronologies['Year'].is_unique:
+            raise ValueError('Years of chronologies must be unique!')
+
+        years, month, day, values = self._pivot_variants(variants, moving_avg_window)
+        names = [column for column in chronologies.columns if column != 'Year']
+
+        _, rows, other_rows = intersect1d(years, chronologies['Year'].to_numpy(), return_indices=True)
+        climate = values[rows].transpose(0, 2, 1).reshape(len(rows), -1)
+        stat, p_value, _ = nan_corr_matrix(
+            climate,
+            chronologies[names].to_numpy(dtype=float)[other_rows],
+            method,
+            n_jobs
+        )
+
+        n_variants, n_days, n_chronologies = len(variants), len(month), len(names)
+        indexes, previous_years = zip(*variants)
+
+        return DataFrame({
+            'Chronology': tile(names, n_variants * n_days),
+            'Index': repeat(indexes, n_days * n_chronologies),
+            'Previous year': repeat(previous_years, n_days * n_chronologies),
+            'Month': tile(repeat(month, n_chronologies), n_variants),
+            'Day': tile(repeat(day, n_chronologies), n_variants),
+            'Stat': stat.ravel(),
+            'P-value': p_value.ravel()
+        })
+
+    @profiled
+    def moving_corr(
+            self,
+            chronology: DataFrame,
+            column: str,
+            index: str = 'Temperature',
+            previous_year: bool = False,
+            window: int = 30,
+            step: int = 1,
+            moving_avg_window: Optional[int] = None
+        ) -> Tuple[DataFrame, DataFrame]:
+        r"""
+        Скользящая корреляция Пирсона климатики каждого дня с хронологией в окнах по window лет
+        (см. zhutils.correlation.moving_corr). Пропущенные годы и значения учитываются как NaN
+
+        Params:
+            chronology: DataFrame с колонкой Year
+            column: Колонка chronology с хронологией
+            index: 'Temperature', или 'Precipitation'
+            previous_year: Флаг того, сравнивается ли климатика этого года или предыдущего
+            window: Число лет в окне
+            step: Шаг окна в годах
+            moving_avg_window: Окно скользящего среднего для сглаживания климатики. По-умолчанию None -- сглаживание не применяется
+        Returns:
+            DataFrame коэффициентов корреляции и DataFrame p-value: строки -- первые годы окон, колонки -- (Month, Day)
+        """
+
+        schemas.other_schema.validate(chronology)
+        if not chronology['Year'].is_unique:
+            raise ValueError('Years of chronology must be unique!')
+
+        years, month, day, values = self._pivot_variants([(index, previous_year)], moving_avg_window)
+        years, climate, tree_ring = align_years(
+            years,
+            values[:, :, 0],
+            chronology['Year'].to_numpy(),
+            chronology[column].to_numpy(dtype=float)
+        )
+        r, p_value, _ = moving_corr(climate, tree_ring, window, step)
+
+        starts = Index(years[:len(years) - window + 1:step], name='Start year')
+        columns = MultiIndex.from_arrays([month, day], names=['Month', 'Day'])
+
+        return DataFrame(r, index=starts, columns=columns), DataFrame(p_value, index=starts, columns=columns)
+
+    @profiled
+    @cached_method()
     def get_full_comparison(
             self,
             other: DataFrame,
@@ -167,10 +459,12 @@ class DailyDataFrame(SuperbDataFrame):
             moving_avg_window: Окно скользящего среднего для сглаживания климатики. По-умолчанию None -- сглаживание не применяется
         """
 
-        temp = self.compare_with(other, using, moving_avg_window=moving_avg_window)
-        temp_prev = self.compare_with(other, using, moving_avg_window=moving_avg_window, previous_year=True)
-        prec = self.compare_with(other, using, moving_avg_window=moving_avg_window, index='Precipitation')
-        prec_prev = self.compare_with(other, using, moving_avg_window=moving_avg_window, previous_year=True, index='Precipitation')
+        temp, temp_prev, prec, prec_prev = self.compare_variants(
+            other,
+            using,
+            [('Temperature', False), ('Temperature', True), ('Precipitation', False), ('Precipitation', True)],
+            moving_avg_window
+        )
 
         temp_interim = merge(temp, temp_prev, on=['Month', 'Day'], suffixes=(' Temp', ' Temp prev'))
         prec_interim = merge(prec, prec_prev, on=['Month', 'Day'], suffixes=(' Prec', ' Prec prev'))
@@ -179,6 +473,7 @@ class DailyDataFrame(SuperbDataFrame):
 
         return result
 
+    @profiled
     def plot_full_comparison(
             self,
             other: DataFrame,
@@ -186,7 +481,8 @@ class DailyDataFrame(SuperbDataFrame):
             title: str,
             moving_avg_window: Optional[int] = None,
             xlim: List[int] = [-180, 280],
-            comparison: Optional[DataFrame] = None
+            comparison: Optional[DataFrame] = None,
+            dpi: int = 200
         ) -> tuple:
 
         r"""
@@ -199,43 +495,34 @@ class DailyDataFrame(SuperbDataFrame):
             moving_avg_window: Окно скользящего среднего для сглаживания климатики. По-умолчанию None -- сглаживание не применяется
             xlim: Пределы по оси x графика
             comparison: Результат self.get_full_comparison
+            dpi: Разрешение графика
+        Для большого числа графиков см. zhutils.plots.daily.render с ComparisonTemplate
         """
 
         if comparison is not None:
-            comparison_schema.validate(comparison)
+            schemas.comparison_schema.validate(comparison)
         else:
             comparison = self.get_full_comparison(other, using, moving_avg_window)
 
-        fig, ax = plt.subplots(nrows=1, ncols=1, dpi=200, figsize=(15, 3))
-
-        ax.xaxis.set_major_locator(MonthLocator())
-        ax.xaxis.set_minor_locator(MonthLocator(bymonthday=15))
-        ax.xaxis.set_major_formatter(NullFormatter())
-        ax.xaxis.set_minor_formatter(DateFormatter('%b'))
-
-        x = range(1, len(comparison) + 1)
-        prev_x = range(-len(comparison) + 1, 1)
-        
-        ax.plot(x, comparison['Stat Temp'], color='red')
-        ax.plot(x, comparison['Stat Prec'], color='blue')
-        ax.plot(prev_x, comparison['Stat Temp prev'], color='red', label='Temperature')
-        ax.plot(prev_x, comparison['Stat Prec prev'], color='blue', label='Precipitation')
-
-        ax.legend()
-        ax.set_xlim(xlim)
-        ax.set_title(title)
+        fig, ax = plt.subplots(nrows=1, ncols=1, dpi=dpi, figsize=(15, 3))
+        daily_plots.draw_comparison(ax, comparison, xlim, title)
 
         return fig, ax
     
+    @profiled
     def to_monthly(self) -> MonthlyDataFrame:
-        return MonthlyDataFrame(
-            self.
-            groupby(['Year', 'Month']).
-            agg({'Temperature': 'mean', 'Precipitation': 'sum', 'Day': 'max'}).
-            reset_index().
-            rename(columns={'Day':'Days'})
-        )
+        calendar = self.calendar
+        _, _, keys = calendar.month_groups()
+
+        return MonthlyDataFrame(DataFrame({
+            'Year': calendar.years[keys // 12],
+            'Month': keys % 12 + 1,
+            'Temperature': calendar.month_aggregate(self['Temperature'].to_numpy(), 'mean'),
+            'Precipitation': calendar.month_aggregate(self['Precipitation'].to_numpy(), 'sum'),
+            'Days': calendar.month_aggregate(self['Day'].to_numpy(), 'max').astype(int)
+        }))
     
+    @profiled
     def cut(
             self,
             start_month: int,
@@ -247,44 +534,83 @@ class DailyDataFrame(SuperbDataFrame):
         Возвращает только те строки, даты которых лежат между
         start_day start_month и end_day end_month
         """
-        return self[
-            (
-                ((start_month == self['Month']) & (start_day <= self['Day'])) |
-                (start_month < self['Month'])
-            ) &
-            (
-                (self['Month'] < end_month) |
-                ((self['Month'] == end_month) & (self['Day'] <= end_day))
-            )
-        ].reset_index(drop=True)
+        rows = self.calendar.rows_between(
+            slot_between(start_month, start_day),
+            slot_between(end_month, end_day, last=True)
+        )
+        return self.__class__(self.iloc[rows], validated=self._validated).reset_index(drop=True)
+
+
+def read_wide_daily_table(path: str, sheet_name: Union[int, str] = 0) -> DataFrame:
+    r"""
+    Reads a wide daily table (Month, Day and a column for every year) from csv, parquet, xls or xlsx
+    """
+    if path.endswith('.csv'):
+        return read_csv(path)
+    if path.endswith('.parquet'):
+        return read_parquet(path)
+    if path.endswith('.xls') or path.endswith('.xlsx'):
+        return read_excel(path, sheet_name=sheet_name)
+    raise FileExtentionError(
+        f"""Wrong file extention for wide daily dataframe! 
+        Expected CSV, PARQUET, XLS or XLSX, 
+        got {path}"""
+    )
+
+
+def daily_wide_to_daily(
+        tables: Dict[str, Union[str, DataFrame]],
+        sheet_names: Optional[Dict[str, Union[int, str]]] = None
+    ) -> DailyDataFrame:
+    r"""
+    Builds a long DailyDataFrame from wide daily tables of any number of variables.
+    The tables are aligned directly on the years × days of the year array (see DailyArray)
+    without melting and merging, so Year stays integer when the tables cover different years
+
+    Params:
+        tables: Variable name (e.g. 'Temperature') -> wide table (Month, Day and a column for every year)
+                or path to it (csv, parquet, xls, xlsx)
+        sheet_names: Only for xls / xlsx files. Variable name -> sheet with its wide table
+    """
+    sheet_names = sheet_names or {}
+    wide_tables = {
+        variable: table if isinstance(table, DataFrame) else read_wide_daily_table(table, sheet_names.get(variable, 0))
+        for variable, table in tables.items()
+    }
+
+    table_years = {
+        variable: array([int(column) for column in table.columns if column not in ('Month', 'Day')])
+        for variable, table in wide_tables.items()
+    }
+    years = unique(concatenate(list(table_years.values())))
+
+    values = full((len(years), DAYS_IN_YEAR, len(wide_tables)), nan)
+    present = zeros((len(years), DAYS_IN_YEAR), dtype=bool)
+
+    for i, (variable, table) in enumerate(wide_tables.items()):
+        slots = day_of_year(table['Month'].to_numpy(dtype=int), table['Day'].to_numpy(dtype=int))
+        year_rows = searchsorted(years, table_years[variable])
+        year_columns = [column for column in table.columns if column not in ('Month', 'Day')]
+
+        values[year_rows[:, None], slots, i] = table[year_columns].to_numpy(dtype=float).T
+        present[year_rows[:, None], slots] = True
+
+    return DailyDataFrame.from_array(DailyArray(years, values, list(wide_tables), present))
 
 
 def daily_wide_to_long(file_path: str, temp_sheet: str, prec_sheet: str) -> SuperbDataFrame:
     r"""
     Function for merging two wide daily tables into one long SuperbDataFrame
+    (see daily_wide_to_daily for other variables and file formats)
 
     Params:
         file_path: Path to the xlsx file with daily climate data
         temp_sheet: Name of sheet with daily temperature data
         prec_sheet: Name of sheet with daily precipitation data
     """
-    temp = read_excel(file_path, sheet_name=temp_sheet)
-    prec = read_excel(file_path, sheet_name=prec_sheet)
-    temp = temp.melt(
-        id_vars = ['Month', 'Day'],
-        var_name='Year',
-        value_name = 'Temperature'
-    )
-    prec = prec.melt(
-        id_vars = ['Month', 'Day'],
-        var_name='Year',
-        value_name = 'Precipitation'
+    result = daily_wide_to_daily(
+        {'Temperature': file_path, 'Precipitation': file_path},
+        {'Temperature': temp_sheet, 'Precipitation': prec_sheet}
     )
 
-    # BUG: Усли температура короче осадков, то годы температуры меняют тип на float и 
-    # слияние идёт криво. 
-
-    result = merge(temp, prec, on=('Year', 'Month', 'Day'), how='outer')
-    result.insert(0, 'Year', result.pop('Year'))
-
     return SuperbDataFrame(result)
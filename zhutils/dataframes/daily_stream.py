@@ -0,0 +1,155 @@
+from numpy import flatnonzero, r_
+from pandas import DataFrame, concat, read_csv
+from typing import (
+    Callable,
+    Iterator,
+    List,
+    Optional
+)
+
+from zhutils.dataframes.daily_dataframe import DailyDataFrame
+from zhutils.dataframes.monthly_dataframe import MonthlyDataFrame
+
+
+class DailyStream:
+    r"""
+    Reads a long daily csv file (Year, Month, Day, Temperature, Precipitation) by chunks
+    and yields validated DailyDataFrame chunks, so memory depends on the chunk size, not on the file size.
+
+    Chunks contain whole years: rows of `years` consecutive years (aligned to multiples of years, e.g. decades)
+    and, if `by` is set, of one station. The file must be sorted by (by, Year).
+
+    Params:
+        path: Path to the csv file
+        years: Number of years in a chunk
+        by: Column with the station name. Stations are never mixed in one chunk
+        chunksize: Number of csv rows read at once
+        read_csv_kwargs: Other parameters of pandas.read_csv
+    """
+
+    def __init__(
+            self,
+            path: str,
+            years: int = 10,
+            by: Optional[str] = None,
+            chunksize: int = 100_000,
+            **read_csv_kwargs
+        ):
+        self.path = path
+        self.years = years
+        self.by = by
+        self.chunksize = chunksize
+        self.read_csv_kwargs = read_csv_kwargs
+
+    def _chunk_starts(self, df: DataFrame) -> List[int]:
+        block = df['Year'].to_numpy() // self.years
+        changed = block[1:] != block[:-1]
+        if self.by:
+            series = df[self.by].to_numpy()
+            changed |= series[1:] != series[:-1]
+        return list(r_[0, flatnonzero(changed) + 1])
+
+    def _read_chunks(self) -> Iterator[DataFrame]:
+        buffer = None
+
+        for part in read_csv(self.path, chunksize=self.chunksize, **self.read_csv_kwargs):
+            buffer = part if buffer is None else concat([buffer, part])
+            starts = self._chunk_starts(buffer)
+            for start, end in zip(starts[:-1], starts[1:]):
+                yield buffer.iloc[start:end]
+            buffer = buffer.iloc[starts[-1]:]
+
+        if buffer is not None and len(buffer):
+            yield buffer
+
+    def __iter__(self) -> Iterator[DailyDataFrame]:
+        for chunk in self._read_chunks():
+            yield DailyDataFrame(chunk)
+
+    def _with_series(self, result: DataFrame, chunk: DataFrame) -> DataFrame:
+        if self.by and self.by not in result.columns:
+            result.insert(0, self.by, chunk[self.by].iloc[0])
+        return result
+
+    def _same_series(self, first: DataFrame, second: DataFrame) -> bool:
+        return not self.by or first[self.by].iloc[-1] == second[self.by].iloc[0]
+
+    def _with_halo(
+            self,
+            function: Callable[[DailyDataFrame], DataFrame],
+            before: List[DataFrame],
+            current: DataFrame,
+            after: List[DataFrame],
+            halo: int
+        ) -> DataFrame:
+        before = concat([*before, current.iloc[:0]])
+        before = before.iloc[max(len(before) - halo, 0):]
+        after = concat([current.iloc[:0], *after]).iloc[:halo]
+        frame = DailyDataFrame(concat([before, current, after]).reset_index(drop=True), validated=True)
+
+        result = function(frame).iloc[len(before):len(before) + len(current)].copy()
+        result.index = current.index
+        return self._with_series(result, current)
+
+    def map_with_halo(self, function: Callable[[DailyDataFrame], DataFrame], halo: int) -> Iterator[DataFrame]:
+        r"""
+        Applies a row-aligned window function (e.g. a rolling function) to every chunk.
+        The chunk is extended by halo rows of the neighbouring chunks of the same station
+        (taken from as many chunks as needed), so the result is the same as for the whole file
+        as long as the function looks at most halo rows away.
+        If by is set, the results have the station column (as in map)
+
+        Params:
+            function: Function that takes a DailyDataFrame and returns a DataFrame with the same rows
+            halo: Number of neighbouring rows on each side
+        """
+        # Chunks of the current station: the last ones before the current chunk with at least halo rows,
+        # the current chunk and the chunks read ahead
+        before, pending = [], []
+
+        def next_result(after: List[DataFrame]) -> DataFrame:
+            current = pending.pop(0)
+            result = self._with_halo(function, before, current, after, halo)
+            before.append(current)
+            while len(before) > 1 and sum(len(chunk) for chunk in before[1:]) >= halo:
+                before.pop(0)
+            return result
+
+        for chunk in self:
+            if pending and not self._same_series(pending[-1], chunk):
+                while pending:
+                    yield next_result(pending[1:])
+                before.clear()
+
+            pending.append(chunk)
+            while len(pending) > 1 and sum(len(chunk) for chunk in pending[1:]) >= halo:
+                yield next_result(pending[1:])
+
+        while pending:
+            yield next_result(pending[1:])
+
+    def moving_avg(
+            self,
+            window: int = 7,
+            columns: Optional[List[str]] = None,
+            nanmean: Optional[bool] = False
+        ) -> Iterator[DataFrame]:
+        r"""
+        DailyDataFrame.moving_avg computed chunk by chunk (see map_with_halo)
+        """
+        return self.map_with_halo(lambda df: df.moving_avg(window, columns, nanmean), window)
+
+    def map(self, function: Callable[[DailyDataFrame], DataFrame]) -> Iterator[DataFrame]:
+        r"""
+        Applies function to every chunk. Chunks contain whole years,
+        so yearly and monthly aggregations of the chunks do not overlap.
+        If by is set, the station column is added to the results that do not keep it
+        """
+        for chunk in self:
+            yield self._with_series(function(chunk), chunk)
+
+    def to_monthly(self) -> MonthlyDataFrame:
+        r"""
+        DailyDataFrame.to_monthly of the whole file (with the station column if by is set)
+        """
+        return MonthlyDataFrame(concat(self.map(DailyDataFrame.to_monthly), ignore_index=True))
@@ -0,0 +1,95 @@
+from html import escape
+from typing import Iterable, Sequence
+
+from zhutils.correlation import HIGHLIGHT_NEGATIVE, HIGHLIGHT_POSITIVE
+from zhutils.dataframes.errors import FileExtentionError
+from zhutils.lazy import lazy_import
+
+openpyxl = lazy_import('openpyxl')
+openpyxl_styles = lazy_import('openpyxl.styles')
+
+XLSX_FILLS = {
+    HIGHLIGHT_POSITIVE: '90EE90',
+    HIGHLIGHT_NEGATIVE: 'F08080'
+}
+
+
+def check_table_extension(path: str) -> None:
+    r"""
+    Raises FileExtentionError if write_styled_table can not write path
+    """
+    if not path.endswith(('.html', '.xlsx')):
+        raise FileExtentionError(
+            f"""Wrong file extention for styled table!
+            Expected HTML or XLSX,
+            got {path}"""
+        )
+
+
+def write_styled_html(path: str, cells: Iterable, css: Iterable, index: Sequence, columns: Sequence) -> str:
+    r"""
+    Writes the table of cells with the CSS of every cell to an html file row by row,
+    without building a pandas Styler
+
+    Params:
+        path: Output .html file
+        cells: Rows of cell texts (line breaks are kept), e.g. a 2D array or a generator of rows
+        css: Rows of cell CSS of the same shape ('' for no style)
+        index: Row labels
+        columns: Column labels
+    """
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('<style>td {white-space: pre-line}</style>\n<table>\n<thead>\n<tr><th></th>')
+        file.write(''.join(f'<th>{escape(str(column))}</th>' for column in columns))
+        file.write('</tr>\n</thead>\n<tbody>\n')
+
+        for label, row_cells, row_css in zip(index, cells, css):
+            file.write(f'<tr><th>{escape(str(label))}</th>')
+            file.write(''.join(
+                f'<td style="{style}">{escape(str(cell))}</td>' if style else f'<td>{escape(str(cell))}</td>'
+                for cell, style in zip(row_cells, row_css)
+            ))
+            file.write('</tr>\n')
+
+        file.write('</tbody>\n</table>\n')
+
+    return path
+
+
+def write_styled_xlsx(path: str, cells: Iterable, css: Iterable, index: Sequence, columns: Sequence) -> str:
+    r"""
+    Writes the table of cells to an xlsx file row by row (openpyxl write-only workbook).
+    Highlighted cells (see zhutils.correlation.highlight_css) are filled with the same colors
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    fills = {
+        style: openpyxl_styles.PatternFill(start_color=color, end_color=color, fill_type='solid')
+        for style, color in XLSX_FILLS.items()
+    }
+    wrap = openpyxl_styles.Alignment(wrap_text=True)
+
+    def styled_cell(value, style: str = ''):
+        cell = openpyxl.cell.WriteOnlyCell(sheet, value=value)
+        cell.alignment = wrap
+        if style in fills:
+            cell.fill = fills[style]
+        return cell
+
+    sheet.append([None, *[str(column) for column in columns]])
+    for label, row_cells, row_css in zip(index, cells, css):
+        sheet.append([str(label), *[styled_cell(cell, style) for cell, style in zip(row_cells, row_css)]])
+
+    workbook.save(path)
+    return path
+
+
+def write_styled_table(path: str, cells: Iterable, css: Iterable, index: Sequence, columns: Sequence) -> str:
+    r"""
+    Writes the styled table to .html or .xlsx depending on the extension of path.
+    Rows of cells and css are consumed one by one, so they can be generated while writing
+    """
+    check_table_extension(path)
+    if path.endswith('.html'):
+        return write_styled_html(path, cells, css, index, columns)
+    return write_styled_xlsx(path, cells, css, index, columns)
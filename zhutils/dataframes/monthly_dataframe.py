@@ -1,28 +1,39 @@
+import numpy as np
 import pandas as pd
 
-from typing import Optional, List, Union
+from typing import Optional, List, Tuple, Union
+from zhutils.cache import cached_method
 from zhutils.common import ComparisonFunction, Months
+from zhutils.correlation import moving_corr, nan_corr_matrix
+from zhutils.dataframes.calendar import align_years
 from zhutils.dataframes.errors import FileExtentionError
 from zhutils.dataframes.superb_dataframe import SuperbDataFrame
-from zhutils.dataframes.schemas import (
-    other_schema,
-    monthly_long_dataframe_schema,
-    monthly_wide_dataframe_schema
-)
+from zhutils.lazy import lazy_import
+from zhutils.loading import load_sheets
+from zhutils.profiling import profiled, stage
 
+schemas = lazy_import('zhutils.dataframes.schemas')
+
+
+def read_wide_table(path: str, sheet_name: Union[int, str]) -> pd.DataFrame:
+    if path.endswith('.csv'):
+        return pd.read_csv(path)
+    return pd.read_excel(path, sheet_name)
 
-class MonthlyDataFrame(SuperbDataFrame):
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        monthly_long_dataframe_schema.validate(self)
+class MonthlyDataFrame(SuperbDataFrame):
+    _schema = 'monthly_long_dataframe_schema'
     
     @classmethod
+    @profiled
     def from_wide(
             cls,
             paths: List[Union[str, pd.DataFrame]],
             clim_indexes: List[str],
-            sheet_names: Optional[List[Union[int, str]]]=None
+            sheet_names: Optional[List[Union[int, str]]]=None,
+            n_jobs: Optional[int] = None,
+            loading_mode: str = 'process',
+            return_timings: bool = False
         ):
         """
         Creates a MonthlyDataFrame from multiple wide tables (csv, xls, xlsx, pd.DataFrame)
@@ -31,6 +42,9 @@ class MonthlyDataFrame(SuperbDataFrame):
             paths: Paths to the wide table files or wide DataFrames
             clim_indexes: Names of climate index contained in each file
             sheet_names: Only for xls / xlsx files. Names of sheets with wide tables
+            n_jobs: Number of workers that read the files (see zhutils.loading.load_sheets)
+            loading_mode: 'process' or 'thread' workers
+            return_timings: Also return the DataFrame with the reading time of every file
         """
 
         sheet_names = [0] * len(paths) or sheet_names
@@ -39,35 +53,45 @@ class MonthlyDataFrame(SuperbDataFrame):
                 "Lengths of paths, clim_indexes and sheet_names lists must be the same!"
             )
 
+        for path in paths:
+            if not isinstance(path, pd.DataFrame) and not path.endswith(('.csv', '.xls', '.xlsx')):
+                raise FileExtentionError(
+                    f"""Wrong file extention for wide monthly dataframe! 
+                    Expected CSV, XLS or XLSX, 
+                    got {path}"""
+                )
+
+        files = [
+            (path, sheet_name)
+            for path, sheet_name in zip(paths, sheet_names)
+            if not isinstance(path, pd.DataFrame)
+        ]
+        loaded, timings = load_sheets(read_wide_table, files, n_jobs, loading_mode)
+        loaded = iter(loaded)
+
         long_dfs = []
 
-        for path, clim_index, sheet_name in zip(paths, clim_indexes, sheet_names): 
-            if isinstance(path, pd.DataFrame):
-                wide_df = path
-            else:
-                if path.endswith('.csv'):
-                    wide_df = pd.read_csv(path)
-                elif path.endswith('.xls') or path.endswith('.xlsx'):
-                    wide_df = pd.read_excel(path, sheet_name)
-                else:
-                    raise FileExtentionError(
-                        f"""Wrong file extention for wide monthly dataframe! 
-                        Expected CSV, XLS or XLSX, 
-                        got {path}"""
-                    )
+        for path, clim_index in zip(paths, clim_indexes):
+            wide_df = path if isinstance(path, pd.DataFrame) else next(loaded)
             
-            monthly_wide_dataframe_schema.validate(wide_df)
+            with stage('monthly wide schema', 'validate'):
+                schemas.monthly_wide_dataframe_schema.validate(wide_df)
 
-            long_df = wide_df.melt(id_vars='Year', value_name=clim_index, var_name='Month')
-            long_df['Month'] = long_df['Month'].apply(lambda month: Months[month].value)
-            long_df = long_df.set_index(['Year', 'Month'])
+            with stage('MonthlyDataFrame.from_wide melt', 'merge'):
+                long_df = wide_df.melt(id_vars='Year', value_name=clim_index, var_name='Month')
+                long_df['Month'] = long_df['Month'].apply(lambda month: Months[month].value)
+                long_df = long_df.set_index(['Year', 'Month'])
 
             long_dfs.append(long_df)
         
-        result = pd.concat(long_dfs, axis=1, join='outer').sort_index().reset_index()
+        with stage('MonthlyDataFrame.from_wide concat', 'merge'):
+            merged = pd.concat(long_dfs, axis=1, join='outer').sort_index().reset_index()
+        result = MonthlyDataFrame(merged)
         
-        return MonthlyDataFrame(result)
+        return (result, timings) if return_timings else result
     
+    @profiled
+    @cached_method()
     def compare_with(
             self,
             other: pd.DataFrame,
@@ -83,24 +107,231 @@ class MonthlyDataFrame(SuperbDataFrame):
             previous_year: Флаг того, сравнивается ли климатика этого года или предыдущего
         """
 
-        other_schema.validate(other)
-        groups = self.drop(columns=['Year']).groupby('Month').groups
-        comparison = []
+        return self.compare_variants(other, using, [(clim_index, previous_year)])[0]
 
-        for key in groups:
-            temp_df = self.loc[groups[key]]
-            if previous_year:
-                temp_df[clim_index] = temp_df[clim_index].shift()
+    @profiled
+    def compare_variants(
+            self,
+            other: pd.DataFrame,
+            using: ComparisonFunction,
+            variants: List[Tuple[str, bool]]
+        ) -> List[pd.DataFrame]:
+        """
+        Сравнивает климатику с other для каждого варианта (clim_index, previous_year) за один проход:
+        other присоединяется по Year один раз, климатика предыдущего года сдвигается один раз.
+        Если у using есть метод compare_arrays(climate, other), все месяцы и варианты считаются
+        одним вызовом для массива годы × (месяцы · варианты), иначе using вызывается для каждого месяца.
 
-            to_compare = temp_df.merge(other, on='Year')
-            stat, p_value = using(to_compare, clim_index)
+        Params:
+            other: DataFrame с которым происходит сравнение (должен иметь колонку 'Year'),
+            using: Функция сравнения (Принимает на вход DataFrame с колонкой 'Year'),
+            variants: Список пар (clim_index, previous_year)
+        Returns:
+            Список DataFrame с колонками Month, Stat, P-value в порядке variants
+        """
+
+        with stage('other schema', 'validate'):
+            schemas.other_schema.validate(other)
+
+        if hasattr(using, 'compare_arrays') and other['Year'].is_unique:
+            with stage('MonthlyDataFrame.compare_variants pivot', 'group'):
+                years, months, values = self._pivot_variants(variants)
+
+            _, rows, other_rows = np.intersect1d(years, other['Year'].to_numpy(), return_indices=True)
+            other = other.iloc[other_rows].reset_index(drop=True)
+            climate = values[rows].transpose(0, 2, 1).reshape(len(rows), -1)
+
+            with stage(f'{type(using).__name__}.compare_arrays', 'compute'):
+                stat, p_value = using.compare_arrays(climate, other)
+            stat = stat.reshape(len(variants), len(months))
+            p_value = p_value.reshape(len(variants), len(months))
+
+            return [
+                pd.DataFrame({'Month': months, 'Stat': stat[i], 'P-value': p_value[i]})
+                for i in range(len(variants))
+            ]
+
+        clim_indexes = list(dict.fromkeys(clim_index for clim_index, _ in variants))
+        if any(previous_year for _, previous_year in variants):
+            shifted = self.groupby('Month')[clim_indexes].shift()
+
+        frames = {False: self}
+        if any(previous_year for _, previous_year in variants):
+            frames[True] = self.assign(**{clim_index: shifted[clim_index] for clim_index in clim_indexes})
+
+        with stage('MonthlyDataFrame.compare_variants join other', 'merge'):
+            joined = {previous_year: frame.merge(other, on='Year') for previous_year, frame in frames.items()}
+        with stage('MonthlyDataFrame.compare_variants month groups', 'group'):
+            groups = {previous_year: frame.groupby('Month').indices for previous_year, frame in joined.items()}
+        keys = self.drop(columns=['Year']).groupby('Month').groups
+
+        result = []
+        for clim_index, previous_year in variants:
+            comparison = []
+
+            for key in keys:
+                rows = groups[previous_year].get(key, [])
+                to_compare = joined[previous_year].iloc[rows].reset_index(drop=True)
+                with stage(getattr(using, '__qualname__', type(using).__name__), 'compute'):
+                    stat, p_value = using(to_compare, clim_index)
+
+                comparison.append([key, stat, p_value])
+
+            columns = {0: 'Month', 1:'Stat', 2:'P-value'}
+            result.append(pd.DataFrame(comparison).rename(columns=columns))
 
-            comparison.append([key, stat, p_value])
-        
-        columns = {0: 'Month', 1:'Stat', 2:'P-value'}
-        result = pd.DataFrame(comparison).rename(columns=columns)
         return result
 
+    def _pivot_variants(self, variants: List[Tuple[str, bool]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Массив климатики годы × месяцы × варианты (clim_index, previous_year)
+
+        Returns:
+            years, months и values формы (years, months, variants)
+        """
+
+        clim_indexes = list(dict.fromkeys(clim_index for clim_index, _ in variants))
+        if any(previous_year for _, previous_year in variants):
+            shifted = self.groupby('Month')[clim_indexes].shift()
+
+        variant_values = np.column_stack([
+            (shifted if previous_year else self)[clim_index].to_numpy(dtype=float)
+            for clim_index, previous_year in variants
+        ])
+
+        years, year_rows = np.unique(self['Year'].to_numpy(), return_inverse=True)
+        months, month_columns = np.unique(self['Month'].to_numpy(), return_inverse=True)
+        values = np.full((len(years), len(months), len(variants)), np.nan)
+        values[year_rows, month_columns] = variant_values
+
+        return years, months, values
+
+    @profiled
+    def compare_chronologies(
+            self,
+            chronologies: pd.DataFrame,
+            variants: List[Tuple[str, bool]] = [('Temperature', False)],
+            method: str = 'pearson',
+            n_jobs: Optional[int] = None
+        ) -> pd.DataFrame:
+        """
+        Корреляции климатики со многими хронологиями сразу: климатика группируется и сдвигается один раз,
+        корреляции всех месяцев, вариантов и хронологий считаются одной матрицей (см. nan_corr_matrix)
+
+        Params:
+            chronologies: Широкий DataFrame с колонкой Year и колонкой для каждой хронологии
+            variants: Список пар (clim_index, previous_year)
+            method: 'pearson' или 'spearman'
+            n_jobs: Число процессов для блоков матрицы корреляций
+        Returns:
+            DataFrame с колонками Chronology, Index, Previous year, Month, Stat, P-value
+        """
+
+        schemas.other_schema.validate(chronologies)
+        if not chronologies['Year'].is_unique:
+            raise ValueError('Years of chronologies must be unique!')
+
+        years, months, values = self._pivot_variants(variants)
+        names = [column for column in chronologies.columns if column != 'Year']
+
+        _, rows, other_rows = np.intersect1d(years, chronologies['Year'].to_numpy(), return_indices=True)
+        climate = values[rows].transpose(0, 2, 1).reshape(len(rows), -1)
+        stat, p_value, _ = nan_corr_matrix(
+            climate,
+            chronologies[names].to_numpy(dtype=float)[other_rows],
+            method,
+            n_jobs
+        )
+
+        n_variants, n_months, n_chronologies = len(variants), len(months), len(names)
+        clim_indexes, previous_years = zip(*variants)
+
+        return pd.DataFrame({
+            'Chronology': np.tile(names, n_variants * n_months),
+            'Index': np.repeat(clim_indexes, n_months * n_chronologies),
+            'Previous year': np.repeat(previous_years, n_months * n_chronologies),
+            'Month': np.tile(np.repeat(months, n_chronologies), n_variants),
+            'Stat': stat.ravel(),
+            'P-value': p_value.ravel()
+        })
+
+    @profiled
+    def moving_corr(
+            self,
+            chronology: pd.DataFrame,
+            column: str,
+            clim_index: str = 'Temperature',
+            previous_year: bool = False,
+            window: int = 30,
+            step: int = 1
+        ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Скользящая корреляция Пирсона климатики каждого месяца с хронологией в окнах по window лет
+        (см. zhutils.correlation.moving_corr). Пропущенные годы и значения учитываются как NaN
+
+        Params:
+            chronology: DataFrame с колонкой Year
+            column: Колонка chronology с хронологией
+            clim_index: 'Temperature', 'Precipitation' or other climate index from current DataFrame columns
+            previous_year: Флаг того, сравнивается ли климатика этого года или предыдущего
+            window: Число лет в окне
+            step: Шаг окна в годах
+        Returns:
+            DataFrame коэффициентов корреляции и DataFrame p-value: строки -- первые годы окон, колонки -- месяцы
+        """
+
+        schemas.other_schema.validate(chronology)
+        if not chronology['Year'].is_unique:
+            raise ValueError('Years of chronology must be unique!')
+
+        years, months, values = self._pivot_variants([(clim_index, previous_year)])
+        years, climate, tree_ring = align_years(
+            years,
+            values[:, :, 0],
+            chronology['Year'].to_numpy(),
+            chronology[column].to_numpy(dtype=float)
+        )
+        r, p_value, _ = moving_corr(climate, tree_ring, window, step)
+
+        starts = pd.Index(years[:len(years) - window + 1:step], name='Start year')
+        columns = pd.Index(months, name='Month')
+
+        return pd.DataFrame(r, index=starts, columns=columns), pd.DataFrame(p_value, index=starts, columns=columns)
+
+    @profiled
+    @cached_method()
+    def get_full_comparison(
+            self,
+            other: pd.DataFrame,
+            using: ComparisonFunction,
+            clim_indexes: Optional[List[str]] = None,
+            previous_years: Tuple[bool, ...] = (False, True)
+        ) -> pd.DataFrame:
+        """
+        Возвращает tidy DataFrame со сравнением климатики с other для всех месяцев,
+        климатических индексов и сдвигов (см. compare_variants)
+
+        Params:
+            other: DataFrame с которым происходит сравнение (должен иметь колонку 'Year'),
+            using: Функция сравнения (Принимает на вход DataFrame с колонкой 'Year'),
+            clim_indexes: Климатические индексы. По-умолчанию все колонки кроме Year, Month и Days
+            previous_years: Сдвиги: False -- климатика этого года, True -- предыдущего
+        Returns:
+            DataFrame с колонками Index, Previous year, Month, Stat, P-value
+        """
+
+        clim_indexes = clim_indexes or [column for column in self.columns if column not in ('Year', 'Month', 'Days')]
+        variants = [(clim_index, previous_year) for clim_index in clim_indexes for previous_year in previous_years]
+        comparisons = self.compare_variants(other, using, variants)
+
+        return pd.concat(
+            [
+                comparison.assign(**{'Index': clim_index, 'Previous year': previous_year})
+                for (clim_index, previous_year), comparison in zip(variants, comparisons)
+            ],
+            ignore_index=True
+        )[['Index', 'Previous year', 'Month', 'Stat', 'P-value']]
+
     def to_wide(self, clim_index: str = 'Temperature') -> pd.DataFrame:
         return (
             self.
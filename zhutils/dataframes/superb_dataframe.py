@@ -1,4 +1,7 @@
-from numpy import NaN, arange
+from concurrent.futures import Executor
+from functools import partial
+from numpy import NaN, arange, array, empty, eye, full, stack, triu_indices
+from numpy.random import SeedSequence
 from pandas import ( 
     DataFrame,
     Series,
@@ -6,39 +9,90 @@ from pandas import (
     read_excel,
 )
 from pandas.core.common import is_bool_indexer
-from scipy.stats import bootstrap
 from typing import (
     Dict,
     Optional
 )
+from zhutils.bootstrap import batched_bootstrap_options, bootstrap_corr_pairs, scipy_bootstrap_task
+from zhutils.cache import cached_method
 from zhutils.common import CorrFunction, OutputFunction
+from zhutils.dataframes.corr_result import CorrResult
+from zhutils.dataframes.export import check_table_extension
+from zhutils.dataframes.validation import validate
+from zhutils.parallel import get_n_workers, map_shared
+from zhutils.profiling import profiled, stage
 from zhutils.correlation import (
-    dropna,
+    BATCHED_CORR_METHODS,
+    corr_function_task,
+    nan_corr_matrix,
+    pairwise_overlap,
     get_p_value,
     dropna_pearsonr,
     dropna_spearmanr,
     print_r_anp_p,
-    print_conf_interval_and_se,
-    check_highlight
+    print_conf_interval_and_se
 )
 
 
 class SuperbDataFrame(DataFrame):
+    r"""
+    Subclasses with a _schema (name of a pandera schema in zhutils.dataframes.schemas) are validated
+    on construction according to the validation policy (see zhutils.dataframes.validation.set_validation_mode).
+    Boolean filters and reset_index of a validated frame are marked as validated,
+    any change of the data (assigning a column, .loc/.iloc/.at writes, inplace methods) clears the mark.
 
-    def __init__(self, *args, **kwargs):
+    Params:
+        validated: The data was already validated (e.g. derived from a validated frame)
+    """
+    _internal_names = DataFrame._internal_names + ['_validated']
+    _internal_names_set = set(_internal_names)
+    _schema: Optional[str] = None
+    _validated = False
+
+    def __init__(self, *args, validated: bool = False, **kwargs):
         super().__init__(*args, **kwargs)
-    
+        if self._schema is not None:
+            self._validated = validate(self, self._schema, validated)
+
     def __getitem__(self, key):
         result = super().__getitem__(key)
 
         if isinstance(result, DataFrame) and is_bool_indexer(key):
-            return self.__class__(result)
+            return self.__class__(result, validated=self._validated)
         else:
             return result
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._validated = False
+
+    def __delitem__(self, key) -> None:
+        super().__delitem__(key)
+        self._validated = False
+
+    def insert(self, *args, **kwargs) -> None:
+        super().insert(*args, **kwargs)
+        self._validated = False
+
+    def _clear_item_cache(self) -> None:
+        # Called by pandas on every change of the data: indexer writes and inplace methods
+        # (with and without Copy-on-Write). pandas 3 removes the item cache and this hook,
+        # so pandas is pinned below 3 and zhutils/tests/test_validation.py checks that it is called
+        super()._clear_item_cache()
+        self._validated = False
+
+    def copy(self, deep: bool = True):
+        # DataFrame.copy clears the item cache of the source, but does not change its data
+        validated = self._validated
+        result = super().copy(deep=deep)
+        self._validated = validated
+        return result
     
     def reset_index(self, *args, **kwargs):
         result = super().reset_index(*args, **kwargs)
-        return self.__class__(result)
+        if result is None:
+            return None
+        return self.__class__(result, validated=self._validated)
     
     @classmethod
     def from_csv(cls, path):
@@ -48,6 +102,50 @@ class SuperbDataFrame(DataFrame):
     def from_excel(cls, path):
         return cls(read_excel(path))
 
+    @profiled
+    @cached_method('n_jobs', 'executor')
+    def corr_result(
+            self,
+            corr_function: CorrFunction = dropna_pearsonr,
+            n_jobs: Optional[int] = None,
+            executor: Optional[Executor] = None
+        ) -> CorrResult:
+        r"""
+        Correlations between columns with their p-values and numbers of complete pairs as float matrices
+        (see CorrResult). corr_and_p_values is corr_result(...).format(...).
+
+        Params:
+            corr_function: Function for correlation calculations (default Pearson).
+                           Signature: corr_function(Iterable, Iterable) -> (float, float)
+            n_jobs: Number of worker processes. Default None: single process, -1: all cores.
+                    Custom corr_functions must be picklable and get numpy arrays in worker processes
+            executor: concurrent.futures.Executor to use instead of a new process pool
+        """
+        method = BATCHED_CORR_METHODS.get(corr_function)
+
+        with stage('corr_and_p_values correlations', 'compute'):
+            if method:
+                r, p, n = nan_corr_matrix(self.to_numpy(dtype=float), method=method, n_jobs=n_jobs, executor=executor)
+            else:
+                if n_jobs is not None or executor is not None:
+                    k = len(self.columns)
+                    pairs = [(j, i) for i in range(k) for j in range(k)]
+                    results = map_shared(partial(corr_function_task, corr_function), (self.to_numpy(dtype=float),), pairs, n_jobs, executor)
+                    r = array([r for r, _ in results]).reshape(k, k).T
+                    p = array([p for _, p in results]).reshape(k, k).T
+                else:
+                    # Custom functions may be asymmetric, so every ordered pair is computed.
+                    # r[j, i] holds corr_function(self[c1], self[c2]) to match the cell of result[c1][c2]
+                    r = empty((len(self.columns), len(self.columns)))
+                    p = empty((len(self.columns), len(self.columns)))
+                    for i, c1 in enumerate(self.columns):
+                        for j, c2 in enumerate(self.columns):
+                            r[j, i], p[j, i] = corr_function(self[c1], self[c2])
+                n = pairwise_overlap(self.notna().to_numpy(), n_jobs, executor)
+
+        return CorrResult(self.columns, self.columns, r, p, n)
+
+    @profiled
     def corr_and_p_values(
             self,
             corr_function: CorrFunction = dropna_pearsonr,
@@ -55,47 +153,147 @@ class SuperbDataFrame(DataFrame):
             r_decimals: int = 2,
             p_decimals: int = 3,
             print_p_exponent: bool = True,
-            highlight_from: Optional[float] = None
+            highlight_from: Optional[float] = None,
+            n_jobs: Optional[int] = None,
+            executor: Optional[Executor] = None
         ) -> DataFrame:
         r"""
         Similar to DataFrame.corr(), but returns correlations between columns with their p-values.
         Cell format: '0.90\n(p=0.001)'.
 
+        dropna_pearsonr and dropna_spearmanr are computed for all column pairs at once,
+        other corr_functions are called for every pair of columns.
+        Use corr_result for the numbers instead of the formatted strings.
+        Only corr_result is cached (see zhutils.cache), the cells are formatted on every call.
+
         Params:
             corr_function: Function for correlation calculations (default Pearson).
                            Signature: corr_function(Iterable, Iterable) -> (float, float)
             r_decimals: Number of decimal places of the correlation coefficient
             p_decimals: Number of decimal places of the p-value
             highlight_from: Minimum highlighted p-value. Default None: nothing is highlighted
+            n_jobs: Number of worker processes. Default None: single process, -1: all cores.
+                    Custom corr_functions must be picklable and get numpy arrays in worker processes
+            executor: concurrent.futures.Executor to use instead of a new process pool
+        """
+        result = self.corr_result(corr_function, n_jobs, executor)
+
+        with stage('corr_and_p_values cells', 'format'):
+            return result.format(output_function, r_decimals, p_decimals, print_p_exponent, highlight_from)
+
+    @profiled
+    def export_corr_and_p_values(
+            self,
+            path: str,
+            corr_function: CorrFunction = dropna_pearsonr,
+            output_function: OutputFunction = print_r_anp_p,
+            r_decimals: int = 2,
+            p_decimals: int = 3,
+            print_p_exponent: bool = True,
+            highlight_from: Optional[float] = None,
+            n_jobs: Optional[int] = None,
+            executor: Optional[Executor] = None
+        ) -> str:
+        r"""
+        Writes the highlighted table of corr_and_p_values to an .html or .xlsx file row by row,
+        without building a pandas Styler (much faster for hundreds of columns).
+        The extension is checked before the correlations are computed
+
+        Params:
+            path: Output .html or .xlsx file
+            Other params are the same as in corr_and_p_values
+        Returns:
+            path
         """
+        check_table_extension(path)
+        result = self.corr_result(corr_function, n_jobs, executor)
 
-        result = DataFrame(columns=self.columns)
-        result = result.transpose().join(result, how='outer')
+        with stage('export_corr_and_p_values write', 'format'):
+            return result.export(path, output_function, r_decimals, p_decimals, print_p_exponent, highlight_from)
 
-        to_highlight = {}
+    @profiled
+    def bootstrap_corr_result(
+            self,
+            bootstrap_parameters: Dict,
+            corr_function: CorrFunction = dropna_spearmanr,
+            batched: bool = False,
+            seed: Optional[int] = None,
+            n_jobs: Optional[int] = None,
+            executor: Optional[Executor] = None
+        ) -> CorrResult:
+        r"""
+        Bootstrap correlations between columns as float matrices (see CorrResult):
+        r is the middle of the confidence interval [low, high], se is the bootstrap standard error,
+        the cells with the same row and column are NaN. bootstrap_corr is bootstrap_corr_result(...).format(...).
 
-        for c1 in self.columns:
-            for c2 in self.columns:
-                r, p = corr_function(self[c1], self[c2])
-                result[c1][c2] = output_function(r, p, r_decimals, p_decimals, print_p_exponent)
-                to_highlight[(c1, c2)] = check_highlight(r, p, highlight_from)
-        
-        if highlight_from:
-            result = result.style.apply(lambda x: [to_highlight[x.name, i] for i in x.index])
+        Params are the same as in bootstrap_corr
+        """
+        k = len(self.columns)
+        low, high, se, n = (full((k, k), NaN) for _ in range(4))
 
-        return result
+        if batched:
+            method = BATCHED_CORR_METHODS.get(corr_function)
+            if not method:
+                raise ValueError(
+                    'Batched bootstrap supports only dropna_pearsonr and dropna_spearmanr corr_functions!'
+                )
 
+            pairs = stack(triu_indices(k, 1), axis=1)
+            results = bootstrap_corr_pairs(
+                self.to_numpy(dtype=float),
+                pairs,
+                method,
+                **batched_bootstrap_options(bootstrap_parameters, seed),
+                n_jobs=n_jobs,
+                executor=executor
+            )
+            for values, pair_values in zip((low, high, se, n), results):
+                values[pairs[:, 0], pairs[:, 1]] = values[pairs[:, 1], pairs[:, 0]] = pair_values
+        else:
+            pairs = [(i, j) for i in range(k) for j in range(k) if i != j]
+            if seed is not None or get_n_workers(n_jobs, executor) > 1 or executor is not None:
+                # Worker processes must not share one default random state
+                seeds = SeedSequence(seed).spawn(k * k)
+                tasks = [(i, j, seeds[i * k + j]) for i, j in pairs]
+            else:
+                tasks = [(i, j, None) for i, j in pairs]
+
+            results = map_shared(
+                partial(scipy_bootstrap_task, corr_function, bootstrap_parameters),
+                (self.to_numpy(dtype=float),),
+                tasks,
+                n_jobs,
+                executor
+            )
+
+            # Cell [j, i] is the result of the pair (i, j), as result[c_i][c_j] of bootstrap_corr
+            for (i, j), pair_values in zip(pairs, results):
+                low[j, i], high[j, i], se[j, i], n[j, i] = pair_values
+
+        r = low + (high - low) / 2
+        p = full((k, k), NaN)
+        off_diagonal = ~eye(k, dtype=bool)
+        p[off_diagonal] = get_p_value(r[off_diagonal], n[off_diagonal])
+
+        return CorrResult(self.columns, self.columns, r, p, n, low, high, se)
+
+    @profiled
     def bootstrap_corr(
             self,
             bootstrap_parameters: Dict,
             corr_function: CorrFunction = dropna_spearmanr,
             output_function: OutputFunction = print_r_anp_p,
             r_decimals: int = 2,
-            p_decimals: int = 3
+            p_decimals: int = 3,
+            batched: bool = False,
+            seed: Optional[int] = None,
+            n_jobs: Optional[int] = None,
+            executor: Optional[Executor] = None
         ) -> DataFrame:
         r"""
         Similar to DataFrame.corr(), but returns bootstrap correlations between columns.
         Cell format must be described in output_func.
+        Use bootstrap_corr_result for the numbers instead of the formatted strings.
 
         Params:
             bootstrap_parameters: Parameters for the scipy.stats.bootstrap()
@@ -105,43 +303,32 @@ class SuperbDataFrame(DataFrame):
                          Signature: output_func(r, p, high, low, se, r_decimals, p_decimals) -> str|float
             r_decimals: Number of decimal places of the correlation coefficient
             p_decimals: Number of decimal places of the p-value
+            batched: Resample only the complete pairs of every column pair. One resample matrix is drawn
+                     per overlap pattern and shared by all pairs with this pattern, every pair is computed once.
+                     Supports dropna_pearsonr and dropna_spearmanr and the n_resamples, confidence_level,
+                     method ('percentile', 'basic', 'BCa') and integer random_state (used as seed)
+                     bootstrap_parameters, other bootstrap_parameters raise ValueError
+            seed: Seed for reproducible results
+            n_jobs: Number of worker processes. Default None: single process, -1: all cores.
+                    corr_function must be picklable. The results do not depend on n_jobs
+            executor: concurrent.futures.Executor to use instead of a new process pool
         """
-        result = DataFrame(columns=self.columns)
-        result = result.transpose().join(result, how='outer')
-
-        def get_corr(x, y):
-            return corr_function(x, y)[0]
-
-        for c1 in self.columns:
-            for c2 in self.columns:
-                if c1 != c2:
-                    res = bootstrap(data=(self[c1], self[c2]), statistic=get_corr,
-                                    vectorized=False, paired=True, **bootstrap_parameters)
-                    low, high = res.confidence_interval
-                    se = res.standard_error
-                    r = low + (high - low) / 2
-                    n = len(dropna(self[c1], self[c2])[0])
-                    p = get_p_value(r, n)
-
-                    params = {
-                        'r': r,
-                        'p': p,
-                        'low': low,
-                        'high': high,
-                        'se': se,
-                        'r_decimals': r_decimals,
-                        'p_decimals': p_decimals
-                    }
-
-                    result[c1][c2] = output_function(**params)
-                else:
-                    result[c1][c2] = NaN
-        return result
+        result = self.bootstrap_corr_result(bootstrap_parameters, corr_function, batched, seed, n_jobs, executor)
+        return result.format(output_function, r_decimals, p_decimals)
 
-    def pairwise_len(self) -> DataFrame:
+    @profiled
+    def pairwise_len(
+            self,
+            n_jobs: Optional[int] = None,
+            executor: Optional[Executor] = None
+        ) -> DataFrame:
         r"""
         Returns the DataFrame with lengths of pairwise overlay of columns
 
+        Params:
+            n_jobs: Number of worker processes. Default None: single process, -1: all cores
+            executor: concurrent.futures.Executor to use instead of a new process pool
+
         Example:
             For DataFrame:
                 A B C
@@ -156,13 +343,13 @@ class SuperbDataFrame(DataFrame):
               C 3 2 4
               
         """
-        dfcols = DataFrame(columns=self.columns)
-        result = dfcols.transpose().join(dfcols, how='outer')
-        for c1 in self.columns:
-            for c2 in self.columns:
-                result[c1][c2] = len(dropna(self[c1], self[c2])[0])
-        return result
+        return DataFrame(
+            pairwise_overlap(self.notna().to_numpy(), n_jobs, executor),
+            index=self.columns,
+            columns=self.columns
+        )
     
+    @profiled
     def median_index(self) -> Series:
         r"""
         Returns the Series with indexes for the median elements per column
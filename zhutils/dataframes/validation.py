@@ -0,0 +1,82 @@
+from contextlib import contextmanager
+from pandas import DataFrame
+from typing import TYPE_CHECKING, Iterator, Optional, Union
+
+from zhutils.lazy import lazy_import
+from zhutils.profiling import stage
+
+if TYPE_CHECKING:
+    from pandera import DataFrameSchema
+
+schemas = lazy_import('zhutils.dataframes.schemas')
+
+
+VALIDATION_MODES = ('full', 'trusted', 'sampled', 'off')
+
+validation_options = {
+    'mode': 'trusted',
+    'sample_size': 1000
+}
+
+
+def set_validation_mode(mode: str, sample_size: Optional[int] = None) -> None:
+    r"""
+    Sets the schema validation policy of DailyDataFrame and MonthlyDataFrame constructors
+
+    Params:
+        mode: 'full' -- every construction is validated (including boolean filters and reset_index),
+              'trusted' -- frames derived from validated frames are not validated again (default),
+              'sampled' -- as 'trusted', but only sample_size random rows of new data are validated,
+              'off' -- no validation
+        sample_size: Number of rows validated in the 'sampled' mode
+    """
+    if mode not in VALIDATION_MODES:
+        raise ValueError(f"Wrong validation mode {mode}. Expected one of {', '.join(VALIDATION_MODES)}")
+
+    validation_options['mode'] = mode
+    if sample_size is not None:
+        validation_options['sample_size'] = sample_size
+
+
+@contextmanager
+def validation_mode(mode: str, sample_size: Optional[int] = None) -> Iterator[None]:
+    r"""
+    Context manager that temporarily sets the validation policy (see set_validation_mode)
+    """
+    previous = dict(validation_options)
+    set_validation_mode(mode, sample_size)
+    try:
+        yield
+    finally:
+        validation_options.update(previous)
+
+
+def validate(df: DataFrame, schema: Union[str, 'DataFrameSchema'], validated: bool = False) -> bool:
+    r"""
+    Validates df with schema according to the validation policy
+
+    Params:
+        df: DataFrame to validate
+        schema: pandera schema or name of a schema in zhutils.dataframes.schemas
+                (pandera is imported only on the first validation)
+        validated: df is derived from a validated DataFrame without changing its values
+    Returns:
+        True if df can be trusted by the frames derived from it
+    """
+    mode = validation_options['mode']
+
+    if mode == 'off':
+        return False
+    if mode != 'full' and validated:
+        return True
+
+    if isinstance(schema, str):
+        schema = getattr(schemas, schema)
+
+    with stage(f'{type(df).__name__} schema', 'validate'):
+        if mode == 'sampled' and len(df) > validation_options['sample_size']:
+            schema.validate(df, sample=validation_options['sample_size'])
+        else:
+            schema.validate(df)
+
+    return True
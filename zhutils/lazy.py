@@ -0,0 +1,30 @@
+from importlib import import_module
+from typing import Any
+
+
+class LazyModule:
+    r"""
+    Module proxy that imports the module on the first attribute access,
+    so heavy dependencies (scipy.stats, matplotlib, pandera) cost nothing until they are used
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr: str) -> Any:
+        if self._module is None:
+            self._module = import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self) -> str:
+        state = 'imported' if self._module is not None else 'not imported'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    r"""
+    Returns a proxy of the module name, imported on the first attribute access.
+    Usage: stats = lazy_import('scipy.stats'), then stats.pearsonr(x, y)
+    """
+    return LazyModule(name)
@@ -0,0 +1,105 @@
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor
+)
+from contextlib import ExitStack
+from functools import partial
+from time import perf_counter
+from typing import (
+    Any,
+    Callable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union
+)
+
+from pandas import DataFrame
+
+from zhutils.parallel import (
+    get_n_workers,
+    split_into_chunks
+)
+from zhutils.profiling import stage
+
+
+LOADING_MODES = {
+    'thread': ThreadPoolExecutor,
+    'process': ProcessPoolExecutor
+}
+
+Sheet = Union[int, str]
+LoadTask = Tuple[str, Sheet]
+
+
+def _load_chunk(
+        function: Callable[[Any, Sheet], Any],
+        open_source: Optional[Callable[[str], Any]],
+        tasks: Sequence[LoadTask]
+    ) -> List[Tuple[Any, float]]:
+    handles = {}
+    results = []
+    try:
+        for source, sheet in tasks:
+            start = perf_counter()
+            with stage(f'{getattr(function, "__name__", "load")} {sheet}', 'load'):
+                if source not in handles:
+                    handles[source] = open_source(source) if open_source else source
+                result = function(handles[source], sheet)
+            results.append((result, perf_counter() - start))
+    finally:
+        for handle in handles.values():
+            if hasattr(handle, 'close'):
+                handle.close()
+    return results
+
+
+def load_sheets(
+        function: Callable[[Any, Sheet], Any],
+        tasks: Sequence[LoadTask],
+        n_jobs: Optional[int] = None,
+        mode: str = 'process',
+        executor: Optional[Executor] = None,
+        open_source: Optional[Callable[[str], Any]] = None
+    ) -> Tuple[List, DataFrame]:
+    r"""
+    Calls function(open_source(source), sheet) for every (source, sheet) task, concurrently with n_jobs or executor.
+    Tasks are split into consecutive chunks, one per worker, and every worker opens each of its sources once.
+    Results are returned in the order of tasks regardless of the order of completion.
+
+    Params:
+        function: Function that loads one sheet / file (must be picklable for the process mode)
+        tasks: (source, sheet) pairs
+        n_jobs: Number of workers. Default None: serial loading, -1: all cores
+        mode: 'process' or 'thread'. Parsing with openpyxl holds the GIL, so 'process' is usually faster
+        executor: Executor to load the sheets in (overrides n_jobs and mode)
+        open_source: Function that opens a source (e.g. pandas.ExcelFile). Default: function gets the source itself
+    Returns:
+        results: Results of function in the order of tasks
+        timings: DataFrame with Source, Sheet and Seconds columns.
+                 Seconds of the first sheet of a source in a worker include opening the source
+    """
+    if mode not in LOADING_MODES:
+        raise ValueError(f"Wrong loading mode {mode}. Expected 'process' or 'thread'")
+
+    n_workers = get_n_workers(n_jobs, executor)
+
+    if executor is None and n_workers == 1:
+        timed_results = _load_chunk(function, open_source, tasks)
+    else:
+        chunks = split_into_chunks(tasks, n_workers)
+        with ExitStack() as stack:
+            stack.enter_context(stage('load_sheets', 'load'))
+            if executor is None:
+                executor = stack.enter_context(LOADING_MODES[mode](max_workers=len(chunks) or 1))
+            results = executor.map(partial(_load_chunk, function, open_source), chunks)
+            timed_results = [result for chunk in results for result in chunk]
+
+    timings = DataFrame(
+        [(source, sheet, seconds) for (source, sheet), (_, seconds) in zip(tasks, timed_results)],
+        columns=['Source', 'Sheet', 'Seconds']
+    )
+
+    return [result for result, _ in timed_results], timings
@@ -1,26 +1,126 @@
 from typing import List
+from numpy import (
+    add,
+    arange,
+    asarray,
+    concatenate,
+    cumsum,
+    diff,
+    empty,
+    ndarray,
+    repeat,
+    searchsorted,
+    union1d
+)
 from pandas import DataFrame
 
 
-def get_normalized_list(x: List, norm: int) -> List:
-    l_raw = []
+def get_normalized_array(x: ndarray, norm: int) -> ndarray:
+    r"""
+    Same as get_normalized_list for every column of x in O(n + norm).
+
+    Every one of n cells is stretched to norm equal parts and every one of norm
+    resulting cells averages n consecutive parts, so only the boundaries of cells
+    (multiples of norm) and of resulting cells (multiples of n) matter.
+
+    Params:
+        x: Array of shape (n,) or (n, columns)
+        norm: Number of resulting cells
+    Returns:
+        Array of shape (norm,) or (norm, columns)
+    """
+    x = asarray(x, dtype=float)
     n = len(x)
-    for el in x:
-        l_raw.extend([el] * norm)
-    l_norm = []
-    for i in range(norm):
-        l_norm.append(1 / n * sum([l_raw[j] for j in range(n * i, n * (i + 1))]))
-    return l_norm
+
+    bounds = union1d(arange(0, n * norm + 1, norm), arange(0, n * norm + 1, n))
+    starts, lengths = bounds[:-1], diff(bounds)
+    weighted = x[starts // norm] * (lengths if x.ndim == 1 else lengths[:, None])
+
+    return add.reduceat(weighted, searchsorted(starts, arange(norm) * n), axis=0) / n
+
+
+def _group_ranges(counts: ndarray) -> ndarray:
+    r"""
+    Concatenated arange(count) for every count
+    """
+    return arange(counts.sum()) - repeat(cumsum(counts) - counts, counts)
+
+
+def _normalize_batch(values: ndarray, sizes: ndarray, norms: ndarray) -> ndarray:
+    r"""
+    get_normalized_groups for one batch of groups without the memory limit
+    """
+    # Cell bounds (multiples of norm) and resulting cell bounds (multiples of size) of all groups
+    # on one axis, where every group occupies size * norm of it
+    bases = concatenate(([0], cumsum(sizes * norms)))
+    bounds = union1d(
+        repeat(bases[:-1], sizes + 1) + _group_ranges(sizes + 1) * repeat(norms, sizes + 1),
+        repeat(bases[:-1], norms + 1) + _group_ranges(norms + 1) * repeat(sizes, norms + 1)
+    )
+    starts, lengths = bounds[:-1], diff(bounds)
+
+    group = searchsorted(bases, starts, side='right') - 1
+    local = starts - bases[group]
+    cells = (cumsum(sizes) - sizes)[group] + local // norms[group]
+    parts = (cumsum(norms) - norms)[group] + local // sizes[group]
+
+    weighted = values[cells] * lengths[:, None]
+    return add.reduceat(weighted, searchsorted(parts, arange(norms.sum())), axis=0) / repeat(sizes, norms)[:, None]
+
+
+def get_normalized_groups(
+        values: ndarray,
+        offsets: ndarray,
+        norms: ndarray,
+        max_segments: int = 2 ** 22
+    ) -> ndarray:
+    r"""
+    get_normalized_array for many consecutive groups of rows at once.
+    Groups are processed in batches of about max_segments weighted segments,
+    every batch is written into one preallocated result array.
+
+    Params:
+        values: Array of shape (rows, columns) with the rows of every group one after another
+        offsets: Start row of every group and the total number of rows at the end
+        norms: Number of resulting cells for every group
+    Returns:
+        Array of shape (norms.sum(), columns) with the normalized groups one after another
+    """
+    values = asarray(values, dtype=float)
+    offsets, norms = asarray(offsets), asarray(norms)
+    sizes = diff(offsets)
+    result_offsets = concatenate(([0], cumsum(norms)))
+    result = empty((result_offsets[-1], values.shape[1]))
+
+    # A group has at most size + norm segments
+    segments = cumsum(sizes + norms)
+    start = 0
+    while start < len(sizes):
+        limit = (segments[start - 1] if start else 0) + max_segments
+        end = max(start + 1, searchsorted(segments, limit, side='right'))
+        result[result_offsets[start]:result_offsets[end]] = _normalize_batch(
+            values[offsets[start]:offsets[end]],
+            sizes[start:end],
+            norms[start:end]
+        )
+        start = end
+
+    return result
+
+
+def get_normalized_list(x: List, norm: int) -> List:
+    return get_normalized_array(x, norm).tolist()
 
 
 def get_normalized_df(df: DataFrame, norm: int) -> DataFrame:
     loc_df = df.reset_index(drop=True)
     columns = [column for column in loc_df.columns if 'D' in column or 'CWT' in column]
+    normalized = get_normalized_array(loc_df[columns].to_numpy(dtype=float), norm)
     result = {
         'TRW': [loc_df['TRW'][0]]*norm,
         '№': range(1, norm+1)
     }
-    for column in columns:
-        result[column] = get_normalized_list(loc_df[column], norm)
+    for i, column in enumerate(columns):
+        result[column] = normalized[:, i]
 
     return DataFrame(result)
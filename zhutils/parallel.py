@@ -0,0 +1,114 @@
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+from math import ceil
+from os import cpu_count, path
+from shutil import rmtree
+from tempfile import mkdtemp
+from typing import (
+    Any,
+    Callable,
+    List,
+    Optional,
+    Sequence
+)
+
+from numpy import (
+    ascontiguousarray,
+    load,
+    ndarray,
+    save
+)
+
+
+CHUNKS_PER_WORKER = 4
+
+
+class SharedArray:
+    r"""
+    Array stored in a memory-mapped .npy file.
+    Worker processes map the same file, so the array is shared instead of being pickled for every task
+    """
+
+    def __init__(self, array: ndarray, directory: Optional[str] = None):
+        self._directory = mkdtemp(prefix='zhutils-', dir=directory)
+        self.path = path.join(self._directory, 'array.npy')
+        save(self.path, ascontiguousarray(array))
+
+    def close(self) -> None:
+        rmtree(self._directory, ignore_errors=True)
+
+    def __enter__(self) -> 'SharedArray':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def get_n_workers(n_jobs: Optional[int] = None, executor: Optional[Executor] = None) -> int:
+    r"""
+    Returns the number of workers for n_jobs / executor parameters.
+    n_jobs: None or 1 -- serial execution, -1 -- all cores.
+    With an executor n_jobs is the number of its workers (the tasks are split for them),
+    default None: the number of cores. Executors do not expose their size in the public API
+    """
+    if n_jobs is None:
+        return (cpu_count() or 1) if executor is not None else 1
+    if n_jobs < 0:
+        return max(1, (cpu_count() or 1) + 1 + n_jobs)
+    return max(1, n_jobs)
+
+
+def split_into_chunks(items: Sequence, n_chunks: int) -> List[Sequence]:
+    r"""
+    Splits items into at most n_chunks consecutive chunks of nearly equal length
+    """
+    chunk_size = max(1, ceil(len(items) / max(1, n_chunks)))
+    return [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+
+
+def _run_chunk(function: Callable, paths: List[str], tasks: Sequence) -> List:
+    arrays = [load(array_path, mmap_mode='r') for array_path in paths]
+    return [function(*arrays, task) for task in tasks]
+
+
+def map_shared(
+        function: Callable[..., Any],
+        arrays: Sequence[ndarray],
+        tasks: Sequence,
+        n_jobs: Optional[int] = None,
+        executor: Optional[Executor] = None
+    ) -> List:
+    r"""
+    Calls function(*arrays, task) for every task and returns the results in the order of tasks.
+
+    With n_jobs or executor the tasks are split into chunks and run in worker processes.
+    Arrays are passed to the workers as memory-mapped files, function and tasks must be picklable.
+    Every task is computed by the same function in both modes, so the results do not depend on n_jobs.
+
+    Params:
+        function: Function with signature function(*arrays, task)
+        arrays: Arrays shared by all tasks
+        tasks: Task descriptions
+        n_jobs: Number of worker processes. Default None: serial execution, -1: all cores
+        executor: Executor to run the chunks in. n_jobs is then the number of its workers (see get_n_workers)
+    """
+    n_workers = get_n_workers(n_jobs, executor)
+
+    if executor is None and n_workers == 1:
+        return [function(*arrays, task) for task in tasks]
+
+    with ExitStack() as stack:
+        shared = {}
+        for array in arrays:
+            if id(array) not in shared:
+                shared[id(array)] = stack.enter_context(SharedArray(array))
+        paths = [shared[id(array)].path for array in arrays]
+
+        if executor is None:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=n_workers))
+
+        chunks = split_into_chunks(tasks, n_workers * CHUNKS_PER_WORKER)
+        results = executor.map(partial(_run_chunk, function, paths), chunks)
+
+        return [result for chunk in results for result in chunk]
@@ -1,6 +1,27 @@
 import random
+from functools import lru_cache
 from math import ceil
-from typing import Dict, List
+from numpy import (
+    arange,
+    array,
+    asarray,
+    clip,
+    empty,
+    floor,
+    isnan,
+    linspace,
+    minimum,
+    nan_to_num,
+    ndarray,
+    rint,
+    trunc,
+    uint8,
+    where
+)
+from typing import Dict, List, Sequence, Tuple, Union
+
+
+HEX_BYTES = [f'{value:02x}' for value in range(256)]
 
 
 def random_hex_color() -> str:
@@ -29,6 +50,71 @@ def combine_hex_colors(colors_to_weights: Dict[str, float]) -> str:
     return f'#{res}'
 
 
+def parse_hex_colors(colors: Sequence[str]) -> ndarray:
+    """
+    params:
+        colors: List of colors in HEX format
+    returns:
+        Array of shape (len(colors), 3) with red, green and blue of the colors
+    """
+    return array([[int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)] for color in colors], dtype=int)
+
+
+def format_hex_colors(rgb: ndarray) -> List[str]:
+    """
+    params:
+        rgb: Integer array of shape (N, 3)
+    returns:
+        List of N colors in HEX format (as combine_hex_colors formats them)
+    """
+    if rgb.size and (rgb.min() < 0 or rgb.max() > 255):
+        zpad = lambda x: x if len(x) == 2 else '0' + x
+        return ['#' + ''.join(zpad(hex(value)[2:]) for value in color) for color in rgb.tolist()]
+    return ['#' + HEX_BYTES[red] + HEX_BYTES[green] + HEX_BYTES[blue] for red, green, blue in rgb.tolist()]
+
+
+def interpolate_colors(colors: List[str], points: int, as_hex: bool = True) -> Union[List[str], ndarray]:
+    """
+    Vectorized interpotate_between_colors: anchor colors are parsed once
+    and all points are interpolated with the same float operations as combine_hex_colors
+
+    params:
+        colors: List of colors in HEX format to interpolate between
+        points: number of points to generate
+        as_hex: Return HEX colors, else array of shape (points, 3) with uint8 red, green and blue
+    returns:
+        List of HEX colors with length "points" or array of colors
+    """
+    points_for_color = ceil(points / (len(colors) - 1))
+    if points <= 0:
+        return [] if as_hex else empty((0, 3), dtype=uint8)
+
+    # The loop of interpotate_between_colors moves to the next pair of colors once the proportion reaches 1.
+    # Rounding of weight * (1.0 / points_for_color) can leave it below 1 for weight == points_for_color,
+    # then every pair of colors takes one point more
+    step = 1.0 / points_for_color
+    period = points_for_color if points_for_color * step >= 1 else points_for_color + 1
+
+    number = arange(points)
+    color_number = number // period
+    proportion = (number % period + 1) * step
+
+    if color_number[-1] + 1 >= len(colors):
+        raise IndexError('list index out of range')
+
+    anchors = parse_hex_colors(colors[:color_number[-1] + 2])
+    first, second = anchors[color_number], anchors[color_number + 1]
+    first_weight, second_weight = (1.0 - proportion)[:, None], proportion[:, None]
+
+    # Equal anchors are one key of the dictionary of combine_hex_colors, the key keeps the last weight
+    same = array([first_color == second_color for first_color, second_color in zip(colors, colors[1:])])[color_number][:, None]
+    total = where(same, second * second_weight, first * first_weight + second * second_weight)
+    total_weight = where(same, second_weight, first_weight + second_weight)
+    rgb = trunc(total / total_weight).astype(int)
+
+    return format_hex_colors(rgb) if as_hex else clip(rgb, 0, 255).astype(uint8)
+
+
 def interpotate_between_colors(colors: List[str], points: int) -> List[str]:
     """
     params:
@@ -37,21 +123,92 @@ def interpotate_between_colors(colors: List[str], points: int) -> List[str]:
     returns:
         List of HEX colors with length "points" 
     """
-    points_for_color = ceil(points / (len(colors) - 1))
-    result = []
-    color_number = 0
-    color_weight = 0
-    for _ in range(points):
-        color_weight += 1
-
-        color_proportion = color_weight * (1.0 / points_for_color)
-        color = combine_hex_colors({
-            colors[color_number]: 1.0 - color_proportion,
-            colors[color_number+1]: color_proportion
-        })
-        result.append(color)
-        if color_proportion >= 1:
-            color_weight = 0
-            color_number += 1 
-
-    return result
+    return interpolate_colors(colors, points)
+
+
+def linear_colors(colors: Sequence[str], points: int) -> ndarray:
+    """
+    Colors evenly spaced between the anchor colors: the first and the last points are the first
+    and the last anchors, and (points - 1) / (len(colors) - 1) steps lead from an anchor to the next one.
+    Unlike interpolate_colors, it has no offset of the first point
+
+    params:
+        colors: Anchor colors in HEX format
+        points: Number of colors
+    returns:
+        uint8 array of shape (points, 3) with red, green and blue
+    """
+    anchors = parse_hex_colors(colors).astype(float)
+    if len(anchors) == 1:
+        return anchors.repeat(points, axis=0).astype(uint8)
+
+    position = linspace(0, len(anchors) - 1, points)
+    segment = minimum(floor(position).astype(int), len(anchors) - 2)
+    proportion = (position - segment)[:, None]
+    rgb = anchors[segment] * (1 - proportion) + anchors[segment + 1] * proportion
+    return clip(rint(rgb), 0, 255).astype(uint8)
+
+
+class Colormap:
+    """
+    Lookup table of colors linearly interpolated between anchor colors (see linear_colors)
+    for mapping numeric arrays (e.g. correlation coefficients) to colors in bulk.
+    vmin maps to the first anchor, vmax to the last one and the values evenly spaced between them
+    to the other anchors (e.g. 0 to the middle color of three for vmin=-1, vmax=1)
+
+    params:
+        colors: Anchor colors in HEX format, from vmin to vmax
+        n: Number of colors in the table. It is rounded up so that every anchor is in the table
+        vmin, vmax: Values mapped to the first and the last colors (values outside are clipped)
+        nan_color: Color of NaN values
+    """
+
+    def __init__(
+            self,
+            colors: Sequence[str],
+            n: int = 256,
+            vmin: float = -1.0,
+            vmax: float = 1.0,
+            nan_color: str = '#ffffff'
+        ):
+        self.colors = tuple(colors)
+        self.vmin = vmin
+        self.vmax = vmax
+        steps = max(len(self.colors) - 1, 1)
+        self.rgb = linear_colors(self.colors, steps * ceil((max(n, 2) - 1) / steps) + 1)
+        self.hex = array(format_hex_colors(self.rgb.astype(int)), dtype=object)
+        self.nan_color = nan_color
+        self.nan_rgb = parse_hex_colors([nan_color])[0].astype(uint8)
+
+    def indexes(self, values: ndarray) -> ndarray:
+        """
+        returns:
+            Indexes of the colors of values in the table, -1 for NaN
+        """
+        values = asarray(values, dtype=float)
+        scaled = (clip(values, self.vmin, self.vmax) - self.vmin) / (self.vmax - self.vmin) * (len(self.rgb) - 1)
+        return where(isnan(values), -1, rint(nan_to_num(scaled)).astype(int))
+
+    def __call__(self, values: ndarray, as_hex: bool = True) -> ndarray:
+        """
+        returns:
+            Array of HEX colors of the shape of values or uint8 array of shape values.shape + (3,)
+        """
+        indexes = self.indexes(values)
+        if as_hex:
+            return where(indexes >= 0, self.hex[indexes], self.nan_color)
+        return where((indexes >= 0)[..., None], self.rgb[indexes], self.nan_rgb)
+
+
+@lru_cache(maxsize=32)
+def get_colormap(
+        colors: Tuple[str, ...],
+        n: int = 256,
+        vmin: float = -1.0,
+        vmax: float = 1.0,
+        nan_color: str = '#ffffff'
+    ) -> Colormap:
+    """
+    Cached Colormap: the table of the same colors and parameters is interpolated once
+    """
+    return Colormap(colors, n, vmin, vmax, nan_color)
@@ -0,0 +1,239 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple
+)
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.dates import DateFormatter, MonthLocator
+from matplotlib.figure import Figure
+from matplotlib.ticker import NullFormatter
+from numpy import arange, nan, zeros
+from pandas import DataFrame
+
+from zhutils.parallel import get_n_workers, split_into_chunks
+
+
+MONTH_LABELS = ['J', 'F', 'M', 'A', 'M ', 'J', 'J', 'A', 'S', 'O', 'N', 'D']
+
+# Job of render: (output path, data for template.update, title)
+RenderJob = Tuple[str, Any, str]
+
+
+def total_plot_data(daily: DataFrame) -> Tuple[List[float], List[float]]:
+    r"""
+    Mean monthly temperatures and precipitation totals of a DailyDataFrame over all years
+
+    Returns:
+        (mean_temp, mean_prec), lists of 12 values
+    """
+    monthly = daily.to_monthly().groupby('Month')[['Precipitation', 'Temperature']].mean().reindex(range(1, 13))
+    return monthly['Temperature'].tolist(), monthly['Precipitation'].tolist()
+
+
+def draw_total(
+        fig: Figure,
+        ax,
+        mean_temp: List[float],
+        mean_prec: List[float],
+        temp_ylim: List[float] = [-25, 25],
+        prec_ylim: List[float] = [0, 70],
+        title: str = '',
+        temperature_label: str = 'T, °C',
+        precipitation_label: str = 'P, mm'
+    ) -> tuple:
+    r"""
+    Draws the climate diagram of DailyDataFrame.plot_total on ax
+
+    Returns:
+        (temperature line, precipitation bars, title text)
+    """
+    fig.subplots_adjust(top=0.95, bottom=.1, right=.89, left=.11)
+
+    ax.yaxis.set_label_coords(-.08, .5)
+    ax2 = ax.twinx()
+    ax.set_zorder(1)  # default zorder is 0 for ax1 and ax2
+    ax.patch.set_visible(False)  # prevents ax1 from hiding ax2
+    ax2.patch.set_visible(True)
+
+    ax.axhline(0, c='lightgrey')
+    line, = ax.plot(mean_temp, c='firebrick', linewidth=3)
+    bars = ax2.bar(range(12), mean_prec, color='royalblue', width=1)
+    ax.set_xticks(range(12))
+    ax.set_xticklabels(MONTH_LABELS)
+    ax.set_ylabel(temperature_label)
+
+    ax2.set_ylabel(precipitation_label)
+    ax.set_ylim(temp_ylim)
+    ax2.set_ylim(prec_ylim)
+    ax.set_xlabel('Month')
+
+    return line, bars, ax.set_title(title)
+
+
+def draw_comparison(ax, comparison: DataFrame, xlim: List[int] = [-180, 280], title: str = '') -> tuple:
+    r"""
+    Draws the daily comparison of DailyDataFrame.plot_full_comparison on ax
+
+    Returns:
+        (Temperature, Precipitation, previous Temperature, previous Precipitation lines, title text)
+    """
+    ax.xaxis.set_major_locator(MonthLocator())
+    ax.xaxis.set_minor_locator(MonthLocator(bymonthday=15))
+    ax.xaxis.set_major_formatter(NullFormatter())
+    ax.xaxis.set_minor_formatter(DateFormatter('%b'))
+
+    x = range(1, len(comparison) + 1)
+    prev_x = range(-len(comparison) + 1, 1)
+
+    lines = (
+        ax.plot(x, comparison['Stat Temp'], color='red')[0],
+        ax.plot(x, comparison['Stat Prec'], color='blue')[0],
+        ax.plot(prev_x, comparison['Stat Temp prev'], color='red', label='Temperature')[0],
+        ax.plot(prev_x, comparison['Stat Prec prev'], color='blue', label='Precipitation')[0]
+    )
+
+    ax.legend()
+    ax.set_xlim(xlim)
+
+    return (*lines, ax.set_title(title))
+
+
+class FigureTemplate(ABC):
+    r"""
+    Figure drawn once without pyplot (Agg canvas) and updated with the data of every plot,
+    so rendering many plots does not create and leak pyplot figures.
+    Subclasses draw the figure in __init__ and implement update
+
+    Params:
+        dpi: Resolution of the saved images
+        figsize: Size of the figure in inches
+    """
+
+    def __init__(self, dpi: int, figsize: Tuple[float, float]):
+        self.dpi = dpi
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+
+    @abstractmethod
+    def update(self, data: Any, title: str = '') -> None:
+        r"""
+        Replaces the data and the title of the drawn figure
+        """
+
+    def save(self, path: str) -> str:
+        r"""
+        Writes the figure to path, format is taken from the extension (e.g. .png, .svg)
+        """
+        self.figure.savefig(path, dpi=self.dpi)
+        return path
+
+    def render(self, path: str, data: Any, title: str = '') -> str:
+        self.update(data, title)
+        return self.save(path)
+
+
+class TotalTemplate(FigureTemplate):
+    r"""
+    Template of DailyDataFrame.plot_total. update takes a DailyDataFrame or (mean_temp, mean_prec)
+    """
+
+    def __init__(
+            self,
+            temp_ylim: List[float] = [-25, 25],
+            prec_ylim: List[float] = [0, 70],
+            temperature_label: str = 'T, °C',
+            precipitation_label: str = 'P, mm',
+            dpi: int = 300,
+            figsize: Tuple[float, float] = (6, 6)
+        ):
+        super().__init__(dpi, figsize)
+        # Zeros instead of NaN keep the autoscaled x limits of the data
+        empty = zeros(12)
+        self.line, self.bars, self.title = draw_total(
+            self.figure, self.ax, empty, empty, temp_ylim, prec_ylim, '', temperature_label, precipitation_label
+        )
+
+    def update(self, data: Any, title: str = '') -> None:
+        mean_temp, mean_prec = data if isinstance(data, tuple) else total_plot_data(data)
+        self.line.set_ydata(mean_temp)
+        for bar, height in zip(self.bars, mean_prec):
+            bar.set_height(height)
+        self.title.set_text(title)
+
+
+class ComparisonTemplate(FigureTemplate):
+    r"""
+    Template of DailyDataFrame.plot_full_comparison. update takes the result of get_full_comparison
+    """
+
+    def __init__(
+            self,
+            xlim: List[int] = [-180, 280],
+            dpi: int = 200,
+            figsize: Tuple[float, float] = (15, 3)
+        ):
+        super().__init__(dpi, figsize)
+        empty = DataFrame(nan, index=range(366), columns=['Stat Temp', 'Stat Prec', 'Stat Temp prev', 'Stat Prec prev'])
+        *self.lines, self.title = draw_comparison(self.ax, empty, xlim)
+
+    def update(self, data: DataFrame, title: str = '') -> None:
+        x = arange(1, len(data) + 1)
+        prev_x = arange(-len(data) + 1, 1)
+        columns = ['Stat Temp', 'Stat Prec', 'Stat Temp prev', 'Stat Prec prev']
+
+        for line, column, line_x in zip(self.lines, columns, (x, x, prev_x, prev_x)):
+            line.set_data(line_x, data[column].to_numpy())
+        self.ax.relim()
+        self.ax.autoscale_view(scalex=False)
+        self.title.set_text(title)
+
+
+def _render_chunk(template_class: type, template_kwargs: Dict, jobs: Sequence[RenderJob]) -> List[str]:
+    template = template_class(**template_kwargs)
+    return [template.render(path, data, title) for path, data, title in jobs]
+
+
+def render(
+        template_class: type,
+        jobs: Sequence[RenderJob],
+        template_kwargs: Optional[Dict] = None,
+        n_jobs: Optional[int] = None,
+        executor: Optional[Executor] = None
+    ) -> List[str]:
+    r"""
+    Renders the plots of jobs to image files. Every worker draws one template_class figure
+    and only updates its data for every job of its chunk.
+
+    Example:
+        render(TotalTemplate, [(f'{site}.png', daily, site) for site, daily in sites.items()], n_jobs=-1)
+
+    Params:
+        template_class: FigureTemplate subclass (TotalTemplate, ComparisonTemplate)
+        jobs: (output path, data for template.update, title) triples
+        template_kwargs: Parameters of template_class (limits, labels, dpi, figsize)
+        n_jobs: Number of worker processes. Default None: current process, -1: all cores
+        executor: concurrent.futures.Executor to use instead of a new process pool
+    Returns:
+        Output paths in the order of jobs
+    """
+    template_kwargs = template_kwargs or {}
+    n_workers = get_n_workers(n_jobs, executor)
+
+    if executor is None and n_workers == 1:
+        return _render_chunk(template_class, template_kwargs, jobs)
+
+    chunks = split_into_chunks(jobs, n_workers)
+    with ExitStack() as stack:
+        if executor is None:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=len(chunks) or 1))
+        results = executor.map(partial(_render_chunk, template_class, template_kwargs), chunks)
+        return [path for chunk in results for path in chunk]
@@ -0,0 +1,250 @@
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from functools import wraps
+from json import dump
+from logging import DEBUG, Logger, getLogger
+from os import getpid
+from threading import get_ident, local
+from time import perf_counter
+from tracemalloc import (
+    get_traced_memory,
+    is_tracing,
+    reset_peak,
+    start as start_tracing,
+    stop as stop_tracing
+)
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional
+)
+
+from pandas import DataFrame
+
+
+STAGES = ('call', 'load', 'validate', 'group', 'merge', 'compute', 'format')
+
+profiling_options = {
+    'profiler': None
+}
+
+_DISABLED = nullcontext()
+
+
+@dataclass
+class ProfileEvent:
+    r"""
+    Params:
+        name: Method or stage name (e.g. 'DailyDataFrame.compare_variants')
+        category: One of STAGES
+        start: perf_counter() at the start, seconds
+        seconds: Wall time
+        peak_memory: Peak of the traced memory above the memory at the start, bytes (None if memory is not traced)
+        thread: Thread identifier
+        depth: Number of the enclosing events
+    """
+    name: str
+    category: str
+    start: float
+    seconds: float
+    peak_memory: Optional[int]
+    thread: int
+    depth: int
+
+
+class LogSink:
+    r"""
+    Writes every event to a logger (default: 'zhutils.profiling' at the DEBUG level)
+    """
+
+    def __init__(self, logger: Optional[Logger] = None, level: int = DEBUG):
+        self.logger = logger or getLogger('zhutils.profiling')
+        self.level = level
+
+    def emit(self, event: ProfileEvent) -> None:
+        memory = '' if event.peak_memory is None else f', peak {event.peak_memory / 2 ** 20:.1f} MiB'
+        self.logger.log(self.level, '%s%s [%s]: %.6f s%s', '  ' * event.depth, event.name, event.category, event.seconds, memory)
+
+    def close(self) -> None:
+        pass
+
+
+class DictSink:
+    r"""
+    Keeps all events and aggregates them by (name, category): calls, total and max seconds, peak memory
+    """
+
+    def __init__(self):
+        self.events: List[ProfileEvent] = []
+        self.stats: Dict[tuple, Dict[str, Any]] = defaultdict(lambda: {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'peak_memory': None})
+
+    def emit(self, event: ProfileEvent) -> None:
+        self.events.append(event)
+        stats = self.stats[event.name, event.category]
+        stats['calls'] += 1
+        stats['seconds'] += event.seconds
+        stats['max_seconds'] = max(stats['max_seconds'], event.seconds)
+        if event.peak_memory is not None:
+            stats['peak_memory'] = max(stats['peak_memory'] or 0, event.peak_memory)
+
+    def close(self) -> None:
+        pass
+
+    def to_frame(self) -> DataFrame:
+        r"""
+        Returns:
+            DataFrame with columns Name, Category, Calls, Seconds, Max seconds, Peak memory sorted by Seconds
+        """
+        return DataFrame(
+            [
+                [name, category, stats['calls'], stats['seconds'], stats['max_seconds'], stats['peak_memory']]
+                for (name, category), stats in self.stats.items()
+            ],
+            columns=['Name', 'Category', 'Calls', 'Seconds', 'Max seconds', 'Peak memory']
+        ).sort_values('Seconds', ascending=False, ignore_index=True)
+
+
+class ChromeTraceSink:
+    r"""
+    Writes the events to a Chrome trace JSON file (chrome://tracing, Perfetto) when the profiling ends
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.trace_events = []
+
+    def emit(self, event: ProfileEvent) -> None:
+        self.trace_events.append({
+            'name': event.name,
+            'cat': event.category,
+            'ph': 'X',
+            'ts': event.start * 1e6,
+            'dur': event.seconds * 1e6,
+            'pid': getpid(),
+            'tid': event.thread,
+            'args': {} if event.peak_memory is None else {'peak_memory': event.peak_memory}
+        })
+
+    def close(self) -> None:
+        with open(self.path, 'w', encoding='utf-8') as file:
+            dump({'traceEvents': self.trace_events, 'displayTimeUnit': 'ms'}, file)
+
+
+class Profiler:
+    r"""
+    Records the wall time, calls and (optionally) peak memory of the zhutils methods and their stages
+    and passes every finished event to the sinks.
+    Enabled with set_profiler or the profile context manager
+
+    Params:
+        sinks: Objects with emit(ProfileEvent) and close() methods (LogSink, DictSink, ChromeTraceSink)
+        memory: Trace the peak memory with tracemalloc (slows down the Python code noticeably)
+    """
+
+    def __init__(self, sinks: List[Any], memory: bool = False):
+        self.sinks = sinks
+        self.memory = memory
+        self._local = local()
+        self._started_tracing = False
+
+    def start(self) -> None:
+        if self.memory and not is_tracing():
+            start_tracing()
+            self._started_tracing = True
+
+    def close(self) -> None:
+        if self._started_tracing:
+            stop_tracing()
+            self._started_tracing = False
+        for sink in self.sinks:
+            sink.close()
+
+    @contextmanager
+    def stage(self, name: str, category: str) -> Iterator[None]:
+        stack = self._local.__dict__.setdefault('stack', [])
+        memory = self.memory and is_tracing()
+
+        if memory:
+            current, peak = get_traced_memory()
+            if stack:
+                stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+            reset_peak()
+        frame = {'peak': current if memory else 0}
+
+        stack.append(frame)
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            seconds = perf_counter() - start
+            stack.pop()
+
+            peak_memory = None
+            if memory:
+                peak = max(frame['peak'], get_traced_memory()[1])
+                peak_memory = peak - current
+                if stack:
+                    stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+
+            event = ProfileEvent(name, category, start, seconds, peak_memory, get_ident(), len(stack))
+            for sink in self.sinks:
+                sink.emit(event)
+
+
+def set_profiler(profiler: Optional[Profiler]) -> None:
+    r"""
+    Sets the profiler of the zhutils methods. None disables profiling (default)
+    """
+    profiling_options['profiler'] = profiler
+
+
+@contextmanager
+def profile(*sinks: Any, memory: bool = False) -> Iterator[Profiler]:
+    r"""
+    Context manager that profiles the zhutils calls inside it. Default sink: DictSink
+
+    Example:
+        with profile(DictSink(), ChromeTraceSink('trace.json')) as profiler:
+            daily.get_full_comparison(chronology, CorrComparison('Std'))
+        profiler.sinks[0].to_frame()
+    """
+    profiler = Profiler(list(sinks) or [DictSink()], memory)
+    previous = profiling_options['profiler']
+    profiler.start()
+    set_profiler(profiler)
+    try:
+        yield profiler
+    finally:
+        profiling_options['profiler'] = previous
+        profiler.close()
+
+
+def stage(name: str, category: str = 'compute'):
+    r"""
+    Context manager that records a stage of a method (see STAGES) if the profiling is enabled
+    """
+    profiler = profiling_options['profiler']
+    if profiler is None:
+        return _DISABLED
+    return profiler.stage(name, category)
+
+
+def profiled(method: Callable) -> Callable:
+    r"""
+    Decorator that records every call of a public method if the profiling is enabled
+    """
+    name = method.__qualname__
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        profiler = profiling_options['profiler']
+        if profiler is None:
+            return method(*args, **kwargs)
+        with profiler.stage(name, 'call'):
+            return method(*args, **kwargs)
+
+    return wrapper
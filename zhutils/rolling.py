@@ -0,0 +1,103 @@
+from math import ceil
+from numpy import (
+    add,
+    arange,
+    asarray,
+    errstate,
+    full,
+    inf,
+    isnan,
+    maximum,
+    minimum,
+    nan,
+    ndarray,
+    ufunc,
+    where
+)
+
+
+ROLLING_FUNCTIONS = {
+    'sum': (add, 0.0),
+    'min': (minimum, inf),
+    'max': (maximum, -inf)
+}
+
+
+def window_reduce(values: ndarray, window: int, function: ufunc, identity: float) -> ndarray:
+    r"""
+    Reduces every window of window consecutive rows with function (add, minimum or maximum).
+
+    Rows are split into blocks of window rows and scanned forwards and backwards inside the blocks
+    (van Herk / Gil-Werman), so every window is one function call of a suffix and a prefix scan: O(1) per row.
+    Sums are accumulated over at most window rows, so they do not lose precision on long series.
+
+    Params:
+        values: Array with rows along the first axis
+        window: Number of rows in a window
+        function: numpy ufunc with accumulate
+        identity: Identity of function (0 for add, inf for minimum, -inf for maximum)
+    Returns:
+        Array with len(values) - window + 1 rows, row i is the reduction of values[i:i + window]
+    """
+    n_blocks = ceil(len(values) / window)
+    padded = full((n_blocks * window,) + values.shape[1:], identity)
+    padded[:len(values)] = values
+
+    blocks = padded.reshape((n_blocks, window) + values.shape[1:])
+    prefix = function.accumulate(blocks, axis=1).reshape(padded.shape)
+    suffix = function.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(padded.shape)
+
+    starts = arange(len(values) - window + 1)
+    ends = starts + window - 1
+    result = function(suffix[starts], prefix[ends])
+
+    aligned = starts % window == 0
+    result[aligned] = prefix[ends[aligned]]
+
+    return result
+
+
+def rolling(
+        values: ndarray,
+        window: int,
+        how: str = 'mean',
+        min_count: int = 1,
+        center: bool = True
+    ) -> ndarray:
+    r"""
+    NaN-aware rolling sum / mean / min / max over the rows of an array, for all columns at once.
+    Same as DataFrame.rolling(window, center=center, min_periods=min_count) with the same function
+
+    Params:
+        values: 1D or 2D array with rows along the first axis
+        window: Number of rows in a window
+        how: 'sum', 'mean', 'min' or 'max'
+        min_count: Minimal number of observed (not NaN) values in a window, otherwise the result is NaN
+        center: Center the windows on the rows (as pandas: (window - 1) // 2 rows after the row), else trailing windows
+    """
+    if how not in ('mean', *ROLLING_FUNCTIONS):
+        raise ValueError(f"Wrong rolling function {how}. Expected 'sum', 'mean', 'min' or 'max'")
+    if window < 1 or min_count < 1:
+        raise ValueError('window and min_count must be positive')
+
+    values = asarray(values, dtype=float)
+    mask = ~isnan(values)
+
+    after = (window - 1) // 2 if center else 0
+    before = window - 1 - after
+
+    def reduce(array: ndarray, function: ufunc, identity: float) -> ndarray:
+        padded = full((len(array) + window - 1,) + array.shape[1:], identity)
+        padded[before:before + len(array)] = array
+        return window_reduce(padded, window, function, identity)
+
+    count = reduce(mask.astype(float), add, 0.0)
+
+    if how == 'mean':
+        with errstate(divide='ignore', invalid='ignore'):
+            result = reduce(where(mask, values, 0.0), add, 0.0) / count
+    else:
+        function, identity = ROLLING_FUNCTIONS[how]
+        result = reduce(where(mask, values, identity), function, identity)
+
+    return where(count >= min_count, result, nan)
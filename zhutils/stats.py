@@ -1,7 +1,10 @@
 import numpy as np
-from scipy import stats
 from typing import Tuple, Iterable
 
+from zhutils.lazy import lazy_import
+
+stats = lazy_import('scipy.stats')
+
 
 def dropna_mannwhitneyu(x: Iterable, y: Iterable) -> Tuple[float, float]:
     x = x[~np.isnan(x)]
@@ -0,0 +1,20 @@
+import pytest
+
+from zhutils.bootstrap import batched_bootstrap_options
+from zhutils.correlation import dropna_pearsonr
+from zhutils.dataframes import SuperbDataFrame
+
+
+def test_unsupported_batched_parameters_raise():
+    df = SuperbDataFrame({'A': [1.0, 2.0, 3.0, 4.0], 'B': [2.0, 1.0, 4.0, 3.0]})
+    with pytest.raises(ValueError, match='alternative'):
+        df.bootstrap_corr_result({'n_resamples': 10, 'alternative': 'less'}, dropna_pearsonr, batched=True)
+
+
+def test_random_state_is_used_as_seed():
+    assert batched_bootstrap_options({'random_state': 3})['seed'] == 3
+    assert batched_bootstrap_options({'random_state': 3}, seed=3)['seed'] == 3
+    with pytest.raises(ValueError):
+        batched_bootstrap_options({'random_state': 3}, seed=4)
+    with pytest.raises(ValueError):
+        batched_bootstrap_options({'random_state': object()})
@@ -0,0 +1,81 @@
+import subprocess
+import sys
+from threading import Lock
+
+from zhutils.cache import ResultCache, cached_method, content_hash, result_cache
+from zhutils.dataframes import SuperbDataFrame
+
+
+FUNCTION_SOURCE = '''
+from zhutils.correlation import {corr_function}
+
+def corr_function(x, y):
+    return {corr_function}(x, y)
+'''
+
+SCRIPT = '''
+from zhutils.cache import content_hash
+
+def function(values):
+    return [value * 2 for value in values if value in {'a', 'b', 'c'}], (lambda x: x + 1)
+
+print(content_hash(function))
+'''
+
+
+def define(corr_function: str):
+    namespace = {}
+    exec(FUNCTION_SOURCE.format(corr_function=corr_function), namespace)
+    return namespace['corr_function']
+
+
+def test_redefined_function_changes_key():
+    pearson, spearman = define('dropna_pearsonr'), define('dropna_spearmanr')
+    assert pearson.__code__.co_code == spearman.__code__.co_code
+    assert content_hash(pearson) != content_hash(spearman)
+    assert content_hash(pearson) == content_hash(define('dropna_pearsonr'))
+
+
+def test_redefined_function_is_not_served_from_cache():
+    df = SuperbDataFrame({'A': [1.0, 2.0, 3.0, 4.0, 5.0], 'B': [2.0, 1.0, 4.0, 3.0, 6.0]})
+    with result_cache(ResultCache()):
+        pearson = df.corr_and_p_values(define('dropna_pearsonr'))
+        spearman = df.corr_and_p_values(define('dropna_spearmanr'))
+
+    assert pearson.equals(df.corr_and_p_values(define('dropna_pearsonr')))
+    assert spearman.equals(df.corr_and_p_values(define('dropna_spearmanr')))
+    assert not pearson.equals(spearman)
+
+
+def test_function_hash_is_stable_between_processes():
+    keys = {
+        subprocess.run([sys.executable, '-c', SCRIPT], capture_output=True, text=True, check=True).stdout
+        for _ in range(2)
+    }
+    assert len(keys) == 1
+
+
+def test_changed_method_is_not_served_from_cache(tmp_path):
+    def make(offset):
+        def method(self, value):
+            return value + offset
+        return cached_method()(method)
+
+    with result_cache(ResultCache(cache_dir=str(tmp_path))):
+        assert make(1)(None, 1) == 2
+        assert make(2)(None, 1) == 3
+
+
+def test_unhashable_arguments_are_not_cached():
+    class Local:
+        pass
+
+    @cached_method()
+    def method(self, value):
+        return 1
+
+    with result_cache(ResultCache()) as cache:
+        assert method(None, 0) == 1
+        assert method(None, Lock()) == 1
+        assert method(None, Local()) == 1
+    assert cache.info()['memory_entries'] == 1
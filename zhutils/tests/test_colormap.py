@@ -0,0 +1,13 @@
+from numpy import nan
+
+from zhutils.plots.colors import get_colormap, interpotate_between_colors
+
+
+def test_colormap_maps_values_to_anchors():
+    colormap = get_colormap(('#ff0000', '#ffffff', '#0000ff'))
+    assert colormap([-1, 0, 1]).tolist() == ['#ff0000', '#ffffff', '#0000ff']
+    assert colormap([-0.5, 0.5, nan]).tolist() == ['#ff8080', '#8080ff', '#ffffff']
+
+
+def test_interpotate_between_colors_keeps_legacy_steps():
+    assert interpotate_between_colors(['#ff0000', '#0000ff'], 4) == ['#bf003f', '#7f007f', '#3f00bf', '#0000ff']
@@ -0,0 +1,89 @@
+from os import listdir, replace
+
+import pytest
+from numpy import arange, memmap
+from pandas import DataFrame
+
+from zhutils import columnar
+from zhutils.columnar import load_columns, save_columns
+from zhutils.tracheids import Tracheids
+
+
+def is_memory_mapped(values) -> bool:
+    while values is not None:
+        if isinstance(values, memmap):
+            return True
+        values = values.base
+    return False
+
+
+def test_load_columns_memory_maps_the_bundle(tmp_path):
+    bundle_path = str(tmp_path / 'bundle')
+    df = DataFrame({'Width': arange(10, dtype=float), 'Cell': arange(10), 'Tree': list('abcdefghij')})
+    save_columns(df, bundle_path)
+
+    loaded = load_columns(bundle_path)
+    assert loaded.equals(df)
+    assert is_memory_mapped(loaded['Width'].to_numpy())
+    assert is_memory_mapped(loaded['Cell'].to_numpy())
+    assert not is_memory_mapped(load_columns(bundle_path, mmap=False)['Width'].to_numpy())
+
+
+def test_changes_of_memory_mapped_columns_are_not_saved(tmp_path):
+    bundle_path = str(tmp_path / 'bundle')
+    save_columns(DataFrame({'Width': arange(3, dtype=float)}), bundle_path)
+
+    loaded = load_columns(bundle_path)
+    loaded.loc[0, 'Width'] = 100.0
+    assert load_columns(bundle_path).loc[0, 'Width'] == 0.0
+
+
+def test_existing_content_addressed_bundle_is_kept(tmp_path):
+    bundle_path = str(tmp_path / 'bundle')
+    save_columns(DataFrame({'Width': arange(3, dtype=float)}), bundle_path)
+    loaded = load_columns(bundle_path)
+
+    save_columns(DataFrame({'Width': arange(5, dtype=float)}), bundle_path, overwrite=False)
+    assert load_columns(bundle_path).equals(loaded)
+    assert [name for name in listdir(tmp_path) if name != 'bundle'] == []
+
+
+def test_concurrent_writer_of_the_same_bundle_counts_as_saved(tmp_path, monkeypatch):
+    bundle_path = str(tmp_path / 'bundle')
+    df = DataFrame({'Width': arange(3, dtype=float)})
+
+    def replace_after_other_writer(source, destination):
+        monkeypatch.setattr(columnar, 'replace', replace)
+        save_columns(df, bundle_path)
+        replace(source, destination)
+
+    monkeypatch.setattr(columnar, 'replace', replace_after_other_writer)
+    save_columns(df, bundle_path, overwrite=False)
+
+    assert load_columns(bundle_path).equals(df)
+    assert [name for name in listdir(tmp_path) if name != 'bundle'] == []
+
+
+def test_overwrite_replaces_bundle(tmp_path):
+    bundle_path = str(tmp_path / 'bundle')
+    save_columns(DataFrame({'Width': arange(3, dtype=float)}), bundle_path)
+    save_columns(DataFrame({'Cell': arange(5)}), bundle_path)
+
+    assert load_columns(bundle_path).equals(DataFrame({'Cell': arange(5)}))
+    assert listdir(tmp_path) == ['bundle']
+
+
+def test_object_columns_with_missing_values_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        save_columns(DataFrame({'Tree': ['a', None]}), str(tmp_path / 'bundle'))
+
+
+def test_tracheids_round_trip(tmp_path):
+    df = DataFrame({'Tree': ['a', 'a', 'b'], 'Year': [2000, 2000, 2001], '№': [1, 2, 1], 'D1': [1.0, 2.0, 3.0]})
+    tracheids = Tracheids('site', 'site.csv', ['a', 'b'], data=df)
+    tracheids.to_cache(str(tmp_path / 'bundle'))
+
+    loaded = Tracheids.from_cache(str(tmp_path / 'bundle'))
+    assert loaded == tracheids
+    assert loaded.data.equals(df)
+    assert loaded.load_timings is None and loaded.cache_dir is None
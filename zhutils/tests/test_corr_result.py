@@ -0,0 +1,75 @@
+from io import BytesIO
+
+from numpy import arange, array, isnan, nan
+from numpy.testing import assert_array_equal
+
+from zhutils.cache import ResultCache, result_cache
+from zhutils.dataframes import CorrResult, SuperbDataFrame
+
+
+def result() -> CorrResult:
+    r = arange(9, dtype=float).reshape(3, 3) / 10
+    p = array([[0.0, 0.01, 0.2], [0.01, 0.0, nan], [0.2, nan, 0.0]])
+    n = array([[5.0, 4.0, 3.0], [4.0, 5.0, 2.0], [3.0, 2.0, 5.0]])
+    return CorrResult(['A', 'B', 'C'], ['A', 'B', 'C'], r, p, n)
+
+
+def test_slicing():
+    corr = result()
+
+    square = corr[['A', 'C']]
+    assert list(square.index) == list(square.columns) == ['A', 'C']
+    assert_array_equal(square.r, corr.r[[0, 2]][:, [0, 2]])
+
+    rows = corr['B', 'A':'B']
+    assert rows.shape == (1, 2)
+    assert_array_equal(rows.p, [[0.01, 0.0]])
+
+    masked = corr[[True, False, True], 'C']
+    assert_array_equal(masked.n, [[3.0], [5.0]])
+
+
+def test_where_significant():
+    significant = result().where_significant(0.05)
+
+    assert_array_equal(isnan(significant.r), [[False, False, True], [False, False, True], [True, True, False]])
+    assert isnan(significant.n[0, 2]) and significant.n[0, 1] == 4.0
+
+
+def test_to_long():
+    long = result().to_long(alpha=0.05)
+
+    assert list(long.columns) == ['Row', 'Column', 'r', 'p', 'n']
+    assert list(zip(long['Row'], long['Column'])) == [
+        ('A', 'A'), ('A', 'B'), ('B', 'A'), ('B', 'B'), ('C', 'C')
+    ]
+    assert len(result().to_long()) == 9
+
+
+def test_save_load_round_trip():
+    corr = result()
+    file = BytesIO()
+    corr.save(file)
+    file.seek(0)
+
+    assert CorrResult.load(file) == corr
+
+
+def test_object_labels_are_loaded_as_strings(tmp_path):
+    corr = CorrResult([1, 'B'], [1, 'B'], [[1.0, 0.5], [0.5, 1.0]], [[0.0, 0.1], [0.1, 0.0]])
+    corr.save(tmp_path / 'result.npz')
+    loaded = CorrResult.load(tmp_path / 'result.npz')
+
+    assert list(loaded.index) == list(loaded.columns) == ['1', 'B']
+    assert_array_equal(loaded.r, corr.r)
+    assert loaded.n is None
+
+
+def test_only_corr_result_is_cached():
+    df = SuperbDataFrame({'A': [1.0, 2.0, 3.0, 4.0, 5.0], 'B': [2.0, 1.0, 4.0, 3.0, 6.0]})
+    with result_cache(ResultCache()) as cache:
+        plain = df.corr_and_p_values()
+        styled = df.corr_and_p_values(highlight_from=0.05)
+
+    assert cache.info()['memory_entries'] == 1 and cache.hits == 1
+    assert styled.data.equals(plain)
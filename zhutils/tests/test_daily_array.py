@@ -0,0 +1,39 @@
+from pandas import DataFrame
+
+from zhutils.dataframes import DailyDataFrame
+
+
+def daily_with_station() -> DailyDataFrame:
+    return DailyDataFrame(DataFrame({
+        'Station': ['A', 'A', 'A'],
+        'Year': [2000, 2000, 2001],
+        'Month': [1, 2, 1],
+        'Day': [1, 29, 1],
+        'Temperature': [-5.0, -3.0, 3.0],
+        'Precipitation': [0.0, 1.5, 2.0]
+    }))
+
+
+def test_to_array_skips_non_numeric_columns():
+    array = daily_with_station().to_array()
+    assert array.columns == ['Temperature', 'Precipitation']
+    assert array['Temperature'][0, 0] == -5.0
+
+
+def test_to_array_is_cached_until_the_table_changes():
+    df = daily_with_station()
+    array = df.to_array()
+    assert df.to_array() is array
+    assert DailyDataFrame.from_array(array).to_array() is array
+
+    df.loc[0, 'Temperature'] = 1.0
+    assert df.to_array() is not array
+    assert df.to_array()['Temperature'][0, 0] == 1.0
+
+
+def test_to_array_cache_keeps_requested_columns():
+    df = daily_with_station()
+    assert df.to_array(['Temperature']).columns == ['Temperature']
+    assert df.to_array().columns == ['Temperature', 'Precipitation']
+    assert df.to_array(dtype='float32').values.dtype == 'float32'
+    assert df.to_array().values.dtype == float
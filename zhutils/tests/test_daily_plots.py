@@ -0,0 +1,43 @@
+import pytest
+from matplotlib import pyplot as plt
+from matplotlib.image import imread
+from numpy import arange, cos, pi
+from numpy.testing import assert_array_equal
+from pandas import DataFrame, date_range
+
+from zhutils.dataframes import DailyDataFrame
+from zhutils.plots.daily import FigureTemplate, TotalTemplate, render
+
+
+def daily() -> DailyDataFrame:
+    dates = date_range('2000-01-01', '2001-12-31')
+    days = arange(len(dates))
+    return DailyDataFrame(DataFrame({
+        'Year': dates.year.astype('int64'),
+        'Month': dates.month.astype('int64'),
+        'Day': dates.day.astype('int64'),
+        'Temperature': -10 * cos(2 * pi * days / 365.25),
+        'Precipitation': (days % 7).astype(float)
+    }))
+
+
+def test_template_requires_update():
+    with pytest.raises(TypeError):
+        FigureTemplate(100, (2, 2))
+
+
+def test_render_matches_plot_total(tmp_path):
+    df = daily()
+    paths = render(
+        TotalTemplate,
+        [(str(tmp_path / 'rendered.png'), df, 'Site')],
+        {'dpi': 50},
+        n_jobs=None
+    )
+
+    fig, _ = df.plot_total(title='Site', dpi=50)
+    fig.savefig(tmp_path / 'plotted.png', dpi=50)
+    plt.close(fig)
+
+    assert paths == [str(tmp_path / 'rendered.png')]
+    assert_array_equal(imread(paths[0]), imread(tmp_path / 'plotted.png'))
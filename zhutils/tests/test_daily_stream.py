@@ -0,0 +1,38 @@
+from numpy import arange, sin
+from pandas import DataFrame, concat, date_range
+from pandas.testing import assert_frame_equal
+
+from zhutils.dataframes import DailyDataFrame
+from zhutils.dataframes.daily_stream import DailyStream
+
+
+def station(name: str, start: str, end: str) -> DataFrame:
+    dates = date_range(start, end)
+    days = arange(len(dates))
+    return DataFrame({
+        'Station': name,
+        'Year': dates.year.astype('int64'),
+        'Month': dates.month.astype('int64'),
+        'Day': dates.day.astype('int64'),
+        'Temperature': 10 * sin(days / 20),
+        'Precipitation': (days % 5).astype(float)
+    })
+
+
+def test_moving_avg_halo_spans_several_chunks(tmp_path):
+    stations = [station('A', '2000-01-01', '2003-12-31'), station('B', '2001-03-01', '2002-06-30')]
+    path = tmp_path / 'daily.csv'
+    concat(stations).to_csv(path, index=False)
+
+    window = 1000
+    streamed = concat(DailyStream(str(path), years=1, by='Station', chunksize=200).moving_avg(window))
+
+    expected = concat([
+        DailyDataFrame(df.drop(columns='Station')).moving_avg(window).assign(Station=name)
+        for name, df in zip('AB', stations)
+    ])
+    assert_frame_equal(
+        streamed.reset_index(drop=True),
+        expected[streamed.columns].reset_index(drop=True),
+        check_dtype=False
+    )
@@ -0,0 +1,82 @@
+from html.parser import HTMLParser
+
+import pytest
+from numpy import array, nan
+from openpyxl import load_workbook
+
+from zhutils.correlation import HIGHLIGHT_NEGATIVE, HIGHLIGHT_POSITIVE, highlight_css
+from zhutils.dataframes import CorrResult, SuperbDataFrame
+from zhutils.dataframes.errors import FileExtentionError
+from zhutils.dataframes.export import write_styled_html, write_styled_xlsx
+
+
+CELLS = array([['1.00\n(p=0)', '-0.50\n(p=0.01)'], ['<0.2>', nan]], dtype=object)
+CSS = array([[HIGHLIGHT_POSITIVE, HIGHLIGHT_NEGATIVE], ['', '']], dtype=object)
+
+
+class TableParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.tags = []
+        self.cells = []
+        self.styles = []
+
+    def handle_starttag(self, tag, attrs):
+        self.tags.append(tag)
+        if tag == 'td':
+            self.styles.append(dict(attrs).get('style', ''))
+            self.cells.append('')
+
+    def handle_data(self, data):
+        if self.tags and self.tags[-1] == 'td':
+            self.cells[-1] += data
+
+    def handle_endtag(self, tag):
+        self.tags.pop()
+
+
+def test_highlight_css():
+    r = array([[1.0, -0.5], [0.2, nan]])
+    p = array([[0.0, 0.01], [0.2, nan]])
+
+    assert highlight_css(r, p, 0.05).tolist() == [[HIGHLIGHT_POSITIVE, HIGHLIGHT_NEGATIVE], ['', '']]
+    assert highlight_css(r, p, None).tolist() == [['', ''], ['', '']]
+
+
+def test_write_styled_html(tmp_path):
+    path = write_styled_html(str(tmp_path / 'table.html'), iter(CELLS), iter(CSS), ['A', 'B'], ['A', 'B'])
+    with open(path, encoding='utf-8') as file:
+        text = file.read()
+    parser = TableParser()
+    parser.feed(text)
+
+    assert text.index('<style>') < text.index('<table>')
+    assert parser.cells == ['1.00\n(p=0)', '-0.50\n(p=0.01)', '<0.2>', 'nan']
+    assert parser.styles == [HIGHLIGHT_POSITIVE, HIGHLIGHT_NEGATIVE, '', '']
+
+
+def test_write_styled_xlsx(tmp_path):
+    path = write_styled_xlsx(str(tmp_path / 'table.xlsx'), iter(CELLS), iter(CSS), ['A', 'B'], ['A', 'B'])
+    rows = list(load_workbook(path).active.iter_rows())
+
+    assert [cell.value for cell in rows[0]] == [None, 'A', 'B']
+    assert [cell.value for cell in rows[1]] == ['A', '1.00\n(p=0)', '-0.50\n(p=0.01)']
+    assert rows[1][1].fill.start_color.rgb.endswith('90EE90')
+    assert rows[1][2].fill.start_color.rgb.endswith('F08080')
+    assert rows[2][1].fill.fill_type is None
+
+
+def test_export_matches_format(tmp_path):
+    result = CorrResult(['A', 'B'], ['A', 'B'], [[1.0, -0.5], [-0.5, 1.0]], [[0.0, 0.01], [0.01, 0.0]])
+    rows = list(load_workbook(result.export(str(tmp_path / 'table.xlsx'))).active.iter_rows(min_row=2, min_col=2))
+
+    assert [[cell.value for cell in row] for row in rows] == result.format().values.tolist()
+
+
+def test_extension_is_checked_before_computing(tmp_path):
+    def corr_function(x, y):
+        raise AssertionError('computed')
+
+    df = SuperbDataFrame({'A': [1.0, 2.0, 3.0], 'B': [2.0, 1.0, 3.0]})
+    with pytest.raises(FileExtentionError):
+        df.export_corr_and_p_values(str(tmp_path / 'table.csv'), corr_function)
@@ -0,0 +1,46 @@
+import json
+import subprocess
+import sys
+
+
+# Startup budget of zhutils itself: numpy and pandas are imported before the measurement
+IMPORT_BUDGET_SECONDS = 0.3
+DEFERRED_MODULES = ('scipy.stats', 'matplotlib', 'pandera')
+
+SCRIPT = '''
+import json, sys, time
+import numpy, pandas
+start = time.perf_counter()
+{imports}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'modules': [m for m in {deferred!r} if m in sys.modules]}}))
+'''
+
+
+def measure_import(imports: str) -> dict:
+    script = SCRIPT.format(imports=imports, deferred=DEFERRED_MODULES)
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def test_import_zhutils():
+    result = measure_import('import zhutils')
+    assert result['modules'] == []
+    assert result['seconds'] < IMPORT_BUDGET_SECONDS
+
+
+def test_import_submodules_without_heavy_dependencies():
+    result = measure_import(
+        'import zhutils.normalization, zhutils.correlation, zhutils.comparison, zhutils.tracheids, zhutils.plots\n'
+        'from zhutils.dataframes import DailyDataFrame, MonthlyDataFrame, SuperbDataFrame'
+    )
+    assert result['modules'] == []
+    assert result['seconds'] < IMPORT_BUDGET_SECONDS
+
+
+def test_heavy_dependencies_are_imported_on_first_use():
+    result = measure_import(
+        'from zhutils.correlation import dropna_pearsonr\n'
+        'dropna_pearsonr([1.0, 2.0, 3.0], [1.0, 3.0, 2.0])'
+    )
+    assert result['modules'] == ['scipy.stats']
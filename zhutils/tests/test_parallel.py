@@ -0,0 +1,17 @@
+from concurrent.futures import ThreadPoolExecutor
+from os import cpu_count
+
+from numpy import arange
+
+from zhutils.parallel import get_n_workers, map_shared
+
+
+def take(values, task):
+    return float(values[task])
+
+
+def test_executor_size_is_taken_from_n_jobs():
+    with ThreadPoolExecutor(3) as executor:
+        assert get_n_workers(3, executor) == 3
+        assert get_n_workers(None, executor) == (cpu_count() or 1)
+        assert map_shared(take, (arange(10),), range(10), 3, executor) == list(map(float, range(10)))
@@ -0,0 +1,65 @@
+import pytest
+from pandas import DataFrame, option_context
+from pandera.errors import SchemaError
+
+from zhutils.dataframes import DailyDataFrame
+
+
+def daily() -> DailyDataFrame:
+    return DailyDataFrame(DataFrame({
+        'Year': [2000, 2000, 2001],
+        'Month': [1, 1, 1],
+        'Day': [1, 2, 1],
+        'Temperature': [-5.0, float('nan'), 3.0],
+        'Precipitation': [0.0, 1.5, 2.0]
+    }))
+
+
+WRITES = {
+    'loc': lambda df: df.loc.__setitem__((0, 'Temperature'), 500.0),
+    'iloc': lambda df: df.iloc.__setitem__((0, 3), 500.0),
+    'at': lambda df: df.at.__setitem__((0, 'Temperature'), 500.0),
+    'fillna': lambda df: df.fillna(500.0, inplace=True),
+    'update': lambda df: df.update(DataFrame({'Temperature': [500.0]})),
+    'query': lambda df: (df.query('Year > 2000', inplace=True), df.update(DataFrame({'Temperature': [500.0]}, index=[2])))
+}
+
+
+@pytest.mark.parametrize('copy_on_write', [False, True], ids=['default', 'copy_on_write'])
+@pytest.mark.parametrize('write', WRITES.values(), ids=WRITES.keys())
+def test_writes_clear_validated_mark(write, copy_on_write):
+    with option_context('mode.copy_on_write', copy_on_write):
+        df = daily()
+        assert df._validated
+
+        write(df)
+        assert not df._validated
+        with pytest.raises(SchemaError):
+            df[df['Year'] > 0]
+
+
+@pytest.mark.parametrize('copy_on_write', [False, True], ids=['default', 'copy_on_write'])
+@pytest.mark.parametrize('write', WRITES.values(), ids=WRITES.keys())
+def test_writes_call_clear_item_cache(write, copy_on_write, monkeypatch):
+    # The validated mark and the caches of DailyDataFrame are dropped only by this pandas hook
+    calls = []
+    clear_item_cache = DailyDataFrame._clear_item_cache
+    monkeypatch.setattr(DailyDataFrame, '_clear_item_cache', lambda df: (calls.append(df), clear_item_cache(df)))
+
+    with option_context('mode.copy_on_write', copy_on_write):
+        df = daily()
+        df.calendar, df.to_array()
+        write(df)
+
+    assert any(call is df for call in calls)
+    assert df._calendar is None and df._daily_array is None
+
+
+def test_reads_keep_validated_mark():
+    df = daily()
+    df.copy()
+    df.to_numpy()
+    df.calendar
+    filtered = df[df['Year'] > 0]
+
+    assert df._validated and filtered._validated
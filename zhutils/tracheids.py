@@ -4,86 +4,183 @@ from pandas import (
     concat,
     read_csv
 )
-from dataclasses import dataclass
-from typing import Union
-from zhutils.normalization import get_normalized_df
+from dataclasses import dataclass, field
+from numpy import (
+    arange,
+    bincount,
+    concatenate,
+    cumsum,
+    full,
+    repeat
+)
+from os import makedirs, path
+from typing import (
+    Optional,
+    Union
+)
+from zhutils.columnar import (
+    get_file_key,
+    load_columns,
+    load_meta,
+    save_columns
+)
+from zhutils.loading import load_sheets
+from zhutils.normalization import get_normalized_groups
+from zhutils.profiling import profiled, stage
+
+
+def read_tree_sheet(xlsx_file: ExcelFile, tree: str) -> DataFrame:
+    r"""
+    Reads and cleans the sheet of one tree from the tracheids workbook
+    """
+    df = xlsx_file.parse(tree)
+    df = df.loc[:, ~df.columns.str.contains('^Unnamed')]
+    df = df.dropna(axis=0)
+    df.insert(0, 'Tree', tree)
+    return df.rename(columns={'Год': 'Year', 'ШГК': 'TRW'}).reset_index(drop=True)
 
 
 @dataclass
 class Tracheids:
+    r"""
+    Params:
+        name: Name of the dataset
+        file_path: Path to the xlsx workbook (one sheet per tree) or csv file
+        trees: Names of the tree sheets
+        cache_dir: Directory of the columnar cache for xlsx workbooks (see zhutils.columnar)
+        n_jobs: Number of workers that parse the tree sheets (see zhutils.loading.load_sheets)
+        loading_mode: 'process' or 'thread' workers
+        data: Already loaded data (e.g. see from_cache). Default None: the data is loaded from file_path
+    """
     name: str
     file_path: str
     trees: list
+    cache_dir: Optional[str] = None
+    n_jobs: Optional[int] = None
+    loading_mode: str = 'process'
+    data: Optional[DataFrame] = field(default=None, repr=False, compare=False)
 
     def __post_init__(self):
-        if self.file_path.endswith('.xlsx'):
-            self.data = self._load_from_xlsx_()
-        elif self.file_path.endswith('.csv'):
-            self.data = self._load_from_csv_()
+        self.load_timings = None
+        if self.data is not None:
+            return
+        with stage('Tracheids.load', 'load'):
+            if self.file_path.endswith('.xlsx'):
+                self.data = self._load_from_cached_xlsx_() if self.cache_dir else self._load_from_xlsx_()
+            elif self.file_path.endswith('.csv'):
+                self.data = self._load_from_csv_()
 
     def _load_from_xlsx_(self) -> DataFrame:
-
-        xlsx_file = ExcelFile(self.file_path)
-        
-        dataframes = []
-
-        for tree in self.trees:
-            df = xlsx_file.parse(tree)
-            df = df.loc[:, ~df.columns.str.contains('^Unnamed')]
-            df = df.dropna(axis=0)
-            df.insert(0, 'Tree', tree)
-            dataframes.append(df.rename(columns={'Год': 'Year', 'ШГК': 'TRW'}).reset_index(drop=True))
+        dataframes, self.load_timings = load_sheets(
+            read_tree_sheet,
+            [(self.file_path, tree) for tree in self.trees],
+            self.n_jobs,
+            self.loading_mode,
+            open_source=ExcelFile
+        )
 
         result = concat(dataframes).reset_index(drop=True)
         result = result.astype({'Year': 'int32', '№': 'int32'})
 
         return result
-    
+
+    def _load_from_cached_xlsx_(self) -> DataFrame:
+        r"""
+        Loads the sheets from the columnar cache in cache_dir.
+        The cache entry is keyed by the file path, modification time, size and the tree list,
+        so a modified workbook is parsed again
+        """
+        cache_path = path.join(self.cache_dir, get_file_key(self.file_path, self.trees))
+
+        if not path.isdir(cache_path):
+            makedirs(self.cache_dir, exist_ok=True)
+            save_columns(
+                self._load_from_xlsx_(),
+                cache_path,
+                {'name': self.name, 'file_path': self.file_path, 'trees': self.trees},
+                overwrite=False
+            )
+
+        return load_columns(cache_path)
+
     def _load_from_csv_(self) -> DataFrame:
         result = read_csv(self.file_path)
         return result
 
+    @profiled
     def to_csv(self, output_path) -> None:
         self.data.to_csv(f'{output_path}{self.name}.csv', index=False)
+
+    @profiled
+    def to_cache(self, cache_path: str) -> None:
+        r"""
+        Saves the data as a columnar bundle of .npy files (see zhutils.columnar)
+
+        Params:
+            cache_path: Directory of the bundle
+        """
+        save_columns(self.data, cache_path, {'name': self.name, 'file_path': self.file_path, 'trees': self.trees})
+
+    @classmethod
+    def from_cache(cls, cache_path: str, mmap: bool = True) -> 'Tracheids':
+        r"""
+        Loads Tracheids saved with to_cache without parsing the source file
+
+        Params:
+            cache_path: Directory of the bundle
+            mmap: Memory-map the column files instead of reading them
+        """
+        meta = load_meta(cache_path)
+        return cls(
+            meta['name'],
+            meta.get('file_path', cache_path),
+            meta['trees'],
+            data=load_columns(cache_path, mmap)
+        )
     
+    @profiled
     def normalize(self, to: Union[int, str] = 'mean') -> DataFrame:
         """
         Params:
             to: The number of cells to which the tracheidograms should be normalized
+                or 'mean', 'min', 'median', 'max' number of cells of the year over all trees
         """
-        if isinstance(to, int):
-            result = (
-                self
-                    .data
-                    .groupby(['Tree', 'Year'])
-                    .apply(get_normalized_df, to)
-            )
-        elif isinstance(to, str):
-            # TODO: min \ max \ median \ other support?
-            year_to_norm = (
-                self
-                    .data[['Tree', 'Year', '№']]
-                    .groupby(['Tree', 'Year'])
-                    .max()
-                    .reset_index()
-                    .groupby('Year')
-                    .mean()
-                    .applymap(lambda x: int(round(x)))
-                    .to_dict()
-                    ['№']
-            )
-            
-            def get_conditional_normalized_df(df):
-                year = df.head(1)['Year'].values[0]
-                return get_normalized_df(df, year_to_norm[year])
-            
-            result = (
-                self
-                    .data
-                    .groupby(['Tree', 'Year'])
-                    .apply(get_conditional_normalized_df)
-            )
-        else:
-            raise TypeError(f'Wrong type for argument {type(to)}. Expected int or str!')
+        with stage('Tracheids.normalize groups', 'group'):
+            grouped = self.data.groupby(['Tree', 'Year'])
+            group_number = grouped.ngroup().to_numpy()
+            order = group_number.argsort(kind='stable')
+            offsets = concatenate(([0], cumsum(bincount(group_number))))
+            first_rows = self.data.iloc[order[offsets[:-1]]]
+
+            if isinstance(to, int):
+                norms = full(len(first_rows), to)
+            elif isinstance(to, str):
+                if to not in ('mean', 'min', 'median', 'max'):
+                    raise ValueError(f"Wrong target {to}. Expected 'mean', 'min', 'median' or 'max'!")
+                year_to_norm = (
+                    grouped['№']
+                        .max()
+                        .groupby('Year')
+                        .agg(to)
+                        .round()
+                        .astype(int)
+                )
+                norms = year_to_norm[first_rows['Year']].to_numpy()
+            else:
+                raise TypeError(f'Wrong type for argument {type(to)}. Expected int or str!')
 
-        return result.reset_index().drop(columns=['level_2'])
+        columns = [column for column in self.data.columns if 'D' in column or 'CWT' in column]
+        with stage('Tracheids.normalize kernel', 'compute'):
+            normalized = get_normalized_groups(self.data[columns].to_numpy(dtype=float)[order], offsets, norms)
+
+        with stage('Tracheids.normalize result', 'format'):
+            result = DataFrame({
+                'Tree': repeat(first_rows['Tree'].to_numpy(), norms),
+                'Year': repeat(first_rows['Year'].to_numpy(), norms),
+                'TRW': repeat(first_rows['TRW'].to_numpy(), norms),
+                '№': arange(norms.sum()) - repeat(cumsum(norms) - norms, norms) + 1
+            })
+            for i, column in enumerate(columns):
+                result[column] = normalized[:, i]
+
+        return result